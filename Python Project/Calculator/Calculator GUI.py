@@ -1,52 +1,122 @@
+import csv
+import io
+import os
+import sys
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import filedialog, messagebox
+
+# Shared modules live in "Python Project/common".
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from common.background import BackgroundTasks
+from batch import run_batch
+from expression import OPERATIONS, ExpressionError, compile_expression, split_assignment
+from history import CalculationHistory, ResultMemo
+from numeric import BACKEND_NAMES, DEFAULT_PRECISION, make_backend
+
+BATCH_EXPRESSION = "expression line" # Batch choice that uses the expression line
+HISTORY_SHOWN = 50
 
 class CalculatorGUI:
     def __init__(self, master):
         self.master = master
         master.title("Simple Calculator")
-        master.geometry("300x250") # Set a fixed size for the window
+        master.geometry("360x640") # Set a fixed size for the window
         master.resizable(False, False) # Make window non-resizable
 
+        # --- Expression Line ---
+        self.label_expression = tk.Label(master, text="Expression:")
+        self.label_expression.grid(row=0, column=0, padx=10, pady=5, sticky="w")
+        self.entry_expression = tk.Entry(master, width=20)
+        self.entry_expression.grid(row=0, column=1, padx=10, pady=5)
+        self.entry_expression.bind("<Return>", lambda event: self.evaluate_expression())
+        self.entry_expression.focus_set() # Set focus to the expression line
+
+        self.button_evaluate = tk.Button(master, text="=", width=5, command=self.evaluate_expression)
+        self.button_evaluate.grid(row=1, column=1, padx=10, pady=5, sticky="e")
+
+        # --- Number Type ---
+        self.backend_frame = tk.Frame(master)
+        self.backend_frame.grid(row=1, column=0, columnspan=2, padx=10, sticky="w")
+        self.backend_name = tk.StringVar(value="float")
+        tk.OptionMenu(self.backend_frame, self.backend_name, *BACKEND_NAMES).pack(side=tk.LEFT)
+        tk.Label(self.backend_frame, text="Digits:").pack(side=tk.LEFT)
+        self.entry_precision = tk.Entry(self.backend_frame, width=6)
+        self.entry_precision.pack(side=tk.LEFT)
+        self.entry_precision.insert(0, str(DEFAULT_PRECISION))
+        self.backends = {} # (name, precision) -> backend, which keeps its compiled expressions
+
         # --- Input Fields ---
         self.label_num1 = tk.Label(master, text="First Number:")
-        self.label_num1.grid(row=0, column=0, padx=10, pady=5, sticky="w")
+        self.label_num1.grid(row=2, column=0, padx=10, pady=5, sticky="w")
         self.entry_num1 = tk.Entry(master, width=20)
-        self.entry_num1.grid(row=0, column=1, padx=10, pady=5)
-        self.entry_num1.focus_set() # Set focus to the first entry field
+        self.entry_num1.grid(row=2, column=1, padx=10, pady=5)
 
         self.label_num2 = tk.Label(master, text="Second Number:")
-        self.label_num2.grid(row=1, column=0, padx=10, pady=5, sticky="w")
+        self.label_num2.grid(row=3, column=0, padx=10, pady=5, sticky="w")
         self.entry_num2 = tk.Entry(master, width=20)
-        self.entry_num2.grid(row=1, column=1, padx=10, pady=5)
+        self.entry_num2.grid(row=3, column=1, padx=10, pady=5)
 
         # --- Operation Buttons ---
         self.button_add = tk.Button(master, text="+", width=5, command=lambda: self.calculate("add"))
-        self.button_add.grid(row=2, column=0, padx=5, pady=10)
+        self.button_add.grid(row=4, column=0, padx=5, pady=10)
 
         self.button_subtract = tk.Button(master, text="-", width=5, command=lambda: self.calculate("subtract"))
-        self.button_subtract.grid(row=2, column=1, padx=5, pady=10)
+        self.button_subtract.grid(row=4, column=1, padx=5, pady=10)
 
         self.button_multiply = tk.Button(master, text="*", width=5, command=lambda: self.calculate("multiply"))
-        self.button_multiply.grid(row=3, column=0, padx=5, pady=5)
+        self.button_multiply.grid(row=5, column=0, padx=5, pady=5)
 
         self.button_divide = tk.Button(master, text="/", width=5, command=lambda: self.calculate("divide"))
-        self.button_divide.grid(row=3, column=1, padx=5, pady=5)
+        self.button_divide.grid(row=5, column=1, padx=5, pady=5)
 
         # --- Result Display ---
         self.label_result_text = tk.Label(master, text="Result:")
-        self.label_result_text.grid(row=4, column=0, padx=10, pady=10, sticky="w")
-        self.label_result = tk.Label(master, text="", width=20, anchor="w", relief="sunken", borderwidth=2)
-        self.label_result.grid(row=4, column=1, padx=10, pady=10, sticky="ew")
+        self.label_result_text.grid(row=6, column=0, padx=10, pady=10, sticky="w")
+        self.label_result = tk.Label(master, text="", width=20, anchor="w", justify="left", wraplength=180, relief="sunken", borderwidth=2)
+        self.label_result.grid(row=6, column=1, padx=10, pady=10, sticky="ew")
+
+        self.variables = {} # Names assigned with "name = expression", plus "ans" for the last result
+
+        # --- Batch Mode ---
+        self.batch_frame = tk.LabelFrame(master, text="Batch (columns a, b, ...)")
+        self.batch_frame.grid(row=7, column=0, columnspan=2, padx=10, pady=5, sticky="ew")
+        self.batch_operation = tk.StringVar(value=BATCH_EXPRESSION)
+        tk.OptionMenu(self.batch_frame, self.batch_operation, BATCH_EXPRESSION, *OPERATIONS).grid(row=0, column=0, columnspan=2, padx=5, pady=2, sticky="w")
+        self.button_batch_file = tk.Button(self.batch_frame, text="From File...", command=self.batch_from_file)
+        self.button_batch_file.grid(row=1, column=0, padx=5, pady=2)
+        tk.Button(self.batch_frame, text="From Clipboard", command=self.batch_from_clipboard).grid(row=1, column=1, padx=5, pady=2)
+        self.batch_status = tk.Label(self.batch_frame, text="", anchor="w")
+        self.batch_status.grid(row=2, column=0, columnspan=2, padx=5, sticky="w")
+        self.background = BackgroundTasks(master)
+        self.batch_task = None # The running file batch, if any
+        self.clipboard_task = None # The running clipboard batch, if any
+
+        # --- History ---
+        self.history_frame = tk.LabelFrame(master, text="History (double-click to recall)")
+        self.history_frame.grid(row=8, column=0, columnspan=2, padx=10, pady=5, sticky="ew")
+        self.entry_search = tk.Entry(self.history_frame, width=40)
+        self.entry_search.pack(fill=tk.X, padx=5, pady=2)
+        self.entry_search.bind("<KeyRelease>", lambda event: self.update_history_list())
+        self.history_list = tk.Listbox(self.history_frame, height=6, width=45)
+        self.history_list.pack(fill=tk.X, padx=5, pady=2)
+        self.history_list.bind("<Double-Button-1>", lambda event: self.recall_history())
+
+        self.history = CalculationHistory()
+        self.history_shown = [] # Entries in the list, top to bottom
+        self.memo = ResultMemo() # Slow results (big powers, long divisions) by expression and operands
+        self.update_history_list()
 
     def get_numbers(self):
         """
         Retrieves numbers from the entry fields and validates them.
         Returns (num1, num2) if valid, None otherwise.
         """
+        backend = self.backend()
+        if backend is None:
+            return None, None
         try:
-            num1 = float(self.entry_num1.get())
-            num2 = float(self.entry_num2.get())
+            num1 = backend.parse(self.entry_num1.get())
+            num2 = backend.parse(self.entry_num2.get())
             return num1, num2
         except ValueError:
             messagebox.showerror("Input Error", "Please enter valid numbers in both fields.")
@@ -61,30 +131,192 @@ class CalculatorGUI:
         if num1 is None or num2 is None:
             self.label_result.config(text="") # Clear previous result on error
             return
+        # Each button evaluates a cached expression with the two numbers bound to a and b.
+        self.show_result(compile_expression(OPERATIONS[operation]), {"a": num1, "b": num2})
+
+    def evaluate_expression(self):
+        """
+        Evaluates the expression line, which may use earlier results: "ans" is
+        the last one and "name = expression" stores a result under a name.
+        """
+        name, text = split_assignment(self.entry_expression.get())
+        try:
+            expression = compile_expression(text)
+        except ExpressionError as e:
+            messagebox.showerror("Input Error", str(e))
+            self.label_result.config(text="")
+            return
+        result = self.show_result(expression, self.variables, self.entry_expression.get().strip())
+        if result is not None and name is not None:
+            self.variables[name] = result
+
+    def backend(self):
+        """Returns the selected numeric backend, or None after showing an error."""
+        name = self.backend_name.get()
+        try:
+            precision = int(self.entry_precision.get()) if name == "decimal" else DEFAULT_PRECISION
+        except ValueError:
+            messagebox.showerror("Input Error", "Please enter a whole number of digits.")
+            return None
+        key = (name, precision)
+        if key not in self.backends:
+            try:
+                self.backends[key] = make_backend(name, precision)
+            except ValueError as e:
+                messagebox.showerror("Input Error", str(e))
+                return None
+        return self.backends[key]
+
+    def show_result(self, expression, variables, text=None):
+        """
+        Evaluates `expression`, displays the result, records it in the history
+        (as `text`, default the expression) and returns it (None after an error).
+        """
+        backend = self.backend()
+        if backend is None:
+            self.label_result.config(text="")
+            return None
+        try:
+            result = self.memo.evaluate(backend, expression, variables)
+        except ZeroDivisionError:
+            messagebox.showerror("Calculation Error", "Cannot divide by zero!")
+            result = None
+        except (ExpressionError, ArithmeticError, ValueError, TypeError) as e:
+            messagebox.showerror("Calculation Error", str(e))
+            result = None
+        if result is None:
+            self.label_result.config(text="")
+            return None
+        self.variables["ans"] = result
+        self.label_result.config(text=backend.format(result))
+        used = {name: variables[name] for name in expression.variables if name in variables}
+        try:
+            self.history.append(backend, text or expression.text, used, result)
+        except OSError as e:
+            self.history.path = None # Keep the history in memory only from now on
+            messagebox.showerror("History Error", f"Could not save the history: {e}")
+        self.update_history_list()
+        return result
+
+    def update_history_list(self):
+        """Shows the newest history entries matching the search field."""
+        self.history_shown = self.history.search(self.entry_search.get(), HISTORY_SHOWN)
+        self.history_list.delete(0, tk.END)
+        self.history_list.insert(tk.END, *(str(entry) for entry in self.history_shown))
+
+    def recall_history(self):
+        """Puts the selected calculation back: operands into the number fields or the text into the expression line."""
+        selection = self.history_list.curselection()
+        if not selection:
+            return
+        entry = self.history_shown[selection[0]]
+        if entry.expression in OPERATIONS.values() and set(entry.variables) == {"a", "b"}:
+            for field, name in ((self.entry_num1, "a"), (self.entry_num2, "b")):
+                field.delete(0, tk.END)
+                field.insert(0, entry.variables[name])
+        else:
+            self.entry_expression.delete(0, tk.END)
+            self.entry_expression.insert(0, entry.expression)
+        if entry.backend in BACKEND_NAMES:
+            self.backend_name.set(entry.backend)
+        elif entry.backend.startswith("decimal"):
+            self.backend_name.set("decimal")
+            self.entry_precision.delete(0, tk.END)
+            self.entry_precision.insert(0, entry.backend[len("decimal"):])
+
+    def batch_expression(self):
+        """Returns the selected operation or the expression line for batch mode, or None after an error."""
+        operation = self.batch_operation.get()
+        if operation != BATCH_EXPRESSION:
+            return operation
+        text = self.entry_expression.get().strip()
+        if not text:
+            messagebox.showerror("Input Error", "Enter an expression over the columns, such as a / b.")
+            return None
+        return text
+
+    def batch_from_file(self):
+        """
+        Evaluates a CSV file into a new CSV file with a result column. The
+        batch runs as a background task and reports its progress back to the
+        Tk thread; while it runs, the button cancels it.
+        """
+        if self.batch_task is not None:
+            self.batch_task.cancel()
+            self.batch_finished("Cancelled.")
+            return
+        text = self.batch_expression()
+        if text is None:
+            return
+        source_path = filedialog.askopenfilename(title="Batch input", filetypes=[("CSV files", "*.csv *.txt *.tsv"), ("All files", "*")])
+        if not source_path:
+            return
+        output_path = filedialog.asksaveasfilename(title="Save results", defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
+        if not output_path:
+            return
+
+        def run(task):
+            with open(source_path, newline="") as source, open(output_path, "w", newline="") as out:
+                return run_batch(source, out, text, progress=lambda report: task.report(str(report)))
+
+        def failed(error):
+            self.batch_finished("")
+            if not isinstance(error, (OSError, ValueError, csv.Error)): # ValueError includes ExpressionError
+                raise error
+            messagebox.showerror("Batch Error", str(error))
+
+        self.button_batch_file.config(text="Cancel")
+        self.batch_status.config(text="Running...")
+        self.batch_task = self.background.submit(run, on_progress=lambda text: self.batch_status.config(text=text),
+                                                 on_done=lambda report: self.batch_finished(str(report)),
+                                                 on_error=failed)
+
+    def batch_finished(self, status):
+        self.batch_task = None
+        self.button_batch_file.config(text="From File...")
+        self.batch_status.config(text=status)
+
+    def batch_from_clipboard(self):
+        """
+        Evaluates columns pasted from a spreadsheet and puts the result column
+        back on the clipboard. The clipboard is read and written on the Tk
+        thread; the batch runs as a background task. Starting another one
+        cancels a batch still running.
+        """
+        text = self.batch_expression()
+        if text is None:
+            return
+        try:
+            pasted = self.master.clipboard_get()
+        except tk.TclError:
+            messagebox.showerror("Input Error", "The clipboard holds no text.")
+            return
+        if self.clipboard_task is not None:
+            self.clipboard_task.cancel()
+
+        def run(task):
+            out = io.StringIO()
+            report = run_batch(io.StringIO(pasted), out, text, result_only=True,
+                               progress=lambda report: task.report(str(report)))
+            return out.getvalue(), report
+
+        def done(result):
+            results, report = result
+            self.clipboard_task = None
+            self.master.clipboard_clear()
+            self.master.clipboard_append(results)
+            self.batch_status.config(text=f"Results copied: {report}")
+
+        def failed(error):
+            self.clipboard_task = None
+            self.batch_status.config(text="")
+            if not isinstance(error, (ValueError, csv.Error)): # ValueError includes ExpressionError
+                raise error
+            messagebox.showerror("Batch Error", str(error))
 
-        result = None
-        op_symbol = ""
-
-        if operation == "add":
-            result = num1 + num2
-            op_symbol = "+"
-        elif operation == "subtract":
-            result = num1 - num2
-            op_symbol = "-"
-        elif operation == "multiply":
-            result = num1 * num2
-            op_symbol = "*"
-        elif operation == "divide":
-            if num2 == 0:
-                messagebox.showerror("Calculation Error", "Cannot divide by zero!")
-                self.label_result.config(text="")
-                return
-            result = num1 / num2
-            op_symbol = "/"
-
-        # Display the result
-        if result is not None:
-            self.label_result.config(text=f"{result:.2f}") # Format to 2 decimal places
+        self.batch_status.config(text="Running...")
+        self.clipboard_task = self.background.submit(run, on_progress=lambda text: self.batch_status.config(text=text),
+                                                     on_done=done, on_error=failed)
 
 # Main part of the script
 if __name__ == "__main__":
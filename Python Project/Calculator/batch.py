@@ -0,0 +1,294 @@
+"""
+Batch mode: one operation or expression applied to whole columns of numbers.
+
+Input is CSV (or tab-separated text pasted from a spreadsheet). Columns are
+named a, b, c, ... by position and, when the first row is a header, by their
+header names as well, so "a / b" or "price * (1 + vat)" both work. Rows are
+read, evaluated and written in chunks, so inputs of any length stream
+through in bounded memory. With NumPy installed a chunk is evaluated as
+arrays by the same compiled expression tree the calculator uses; otherwise
+row by row. Either way a row whose inputs are not numbers or whose result
+is undefined (division by zero, sqrt(-1), overflow) gets ERROR_VALUE
+instead of aborting the batch.
+
+Command line:
+    python batch.py "a / b" input.csv [-o output.csv] [--result-only]
+"""
+import argparse
+import csv
+import functools
+import math
+import re
+import sys
+import time
+from itertools import islice
+
+from expression import BINARY_OPERATORS, OPERATIONS, ExpressionError, compile_expression, compile_tree
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CHUNK_ROWS = 100_000
+ERROR_VALUE = "#N/A"
+POSITIONAL_NAMES = "abcdefghijklmnopqrstuvwxyz"
+
+if np is not None:
+    NUMPY_OPERATORS = {
+        **BINARY_OPERATORS,
+        "/": np.true_divide,
+        "//": np.floor_divide,
+        "%": np.mod,
+        "^": np.power,
+        "**": np.power,
+    }
+    NUMPY_FUNCTIONS = {
+        "abs": np.abs,
+        "sqrt": np.sqrt,
+        "exp": np.exp,
+        "ln": np.log,
+        "log": np.log10,
+        "sin": np.sin,
+        "cos": np.cos,
+        "tan": np.tan,
+        "round": lambda values, decimals=0: np.round(values, _digit_count(decimals)),
+        "floor": np.floor,
+        "ceil": np.ceil,
+        "min": lambda *values: functools.reduce(np.minimum, values),
+        "max": lambda *values: functools.reduce(np.maximum, values),
+    }
+
+
+def _digit_count(decimals):
+    """Returns round()'s digit count, which arrives as a float literal, as an int. Raises ValueError if it is not whole."""
+    if decimals != int(decimals):
+        raise ValueError("round() needs a whole number of digits.")
+    return int(decimals)
+
+
+class BatchReport:
+    """Counts and timing of one batch run."""
+
+    def __init__(self):
+        self.rows = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (f"{self.rows} rows, {self.errors} without a result, "
+                f"in {self.seconds:.1f} s ({self.rows_per_second():,.0f} rows/s)")
+
+
+def detect_delimiter(line):
+    """Returns tab for spreadsheet-pasted text, ";" or "," otherwise."""
+    for delimiter in ("\t", ";"):
+        if delimiter in line:
+            return delimiter
+    return ","
+
+
+def _is_number(cell):
+    try:
+        float(cell)
+        return True
+    except ValueError:
+        return False
+
+
+def column_names(header, width):
+    """
+    Returns {name: column index}: a, b, c, ... by position and, for a header
+    row, each header turned into a name (lowercase, other characters as "_").
+    A header name wins over a positional name it collides with.
+    """
+    names = {letter: index for index, letter in enumerate(POSITIONAL_NAMES[:width])}
+    for index, title in enumerate(header or ()):
+        name = re.sub(r"\W+", "_", title.strip()).strip("_").lower()
+        if name and not name[0].isdigit():
+            names[name] = index
+    return names
+
+
+class BatchEvaluator:
+    """
+    Evaluates one expression over columns. `text` is an expression or one of
+    the OPERATIONS names. Raises ExpressionError for invalid expressions.
+    """
+
+    def __init__(self, text, use_numpy=True):
+        self.expression = compile_expression(OPERATIONS.get(text, text))
+        self.use_numpy = use_numpy and np is not None
+        if self.use_numpy:
+            with np.errstate(all="ignore"):
+                self._array_function = compile_tree(self.expression.tree, functions=NUMPY_FUNCTIONS,
+                                                    operators=NUMPY_OPERATORS)
+
+    @property
+    def variables(self):
+        return self.expression.variables
+
+    def evaluate(self, columns, count):
+        """
+        `columns` maps each variable to a list of `count` cell strings.
+        Returns (values, errors): the list of result floats and the list of
+        row numbers without a result (their value is meaningless).
+        """
+        if self.use_numpy:
+            return self._evaluate_arrays(columns, count)
+        return self._evaluate_rows(columns, count)
+
+    def _evaluate_arrays(self, columns, count):
+        arrays = {}
+        invalid = np.zeros(count, dtype=bool)
+        for name, cells in columns.items():
+            try:
+                arrays[name] = np.array(cells, dtype=np.float64)
+            except ValueError:
+                # Some cells are not numbers: convert one by one, masking the bad ones.
+                values = [_to_float(cell) for cell in cells]
+                arrays[name] = np.array(values, dtype=np.float64)
+                invalid |= np.isnan(arrays[name])
+        try:
+            with np.errstate(all="ignore"):
+                values = np.broadcast_to(np.asarray(self._array_function(arrays), dtype=np.float64), (count,))
+        except (TypeError, ValueError):
+            # Not expressible over whole columns (e.g. a column as round()'s digit count): go row by row.
+            return self._evaluate_rows(columns, count)
+        errors = np.flatnonzero(invalid | ~np.isfinite(values))
+        return values.tolist(), errors.tolist()
+
+    def _evaluate_rows(self, columns, count):
+        function = self.expression.evaluate
+        numbers = {name: [_to_float(cell) for cell in cells] for name, cells in columns.items()}
+        items = list(numbers.items())
+        variables = {}
+        values = [0.0] * count
+        errors = []
+        for row in range(count):
+            for name, column in items:
+                variables[name] = column[row]
+            try:
+                value = function(variables)
+                if math.isfinite(value):
+                    values[row] = value
+                    continue
+            except (ArithmeticError, ValueError, TypeError):
+                pass
+            errors.append(row)
+        return values, errors
+
+
+def _to_float(cell):
+    """Returns the number in `cell`, or NaN if it holds none (NaN and infinities count as none too)."""
+    try:
+        value = float(cell)
+    except ValueError:
+        return math.nan
+    return value if math.isfinite(value) else math.nan
+
+
+def _chunks(rows, size):
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _column(rows, index):
+    try:
+        return [row[index] for row in rows]
+    except IndexError:
+        return [row[index] if index < len(row) else "" for row in rows]  # Short rows lack the cell
+
+
+def run_batch(source, out, text, chunk_rows=CHUNK_ROWS, result_only=False, use_numpy=True, progress=None):
+    """
+    Reads rows from the text file `source`, evaluates `text` on each and writes
+    them to the text file `out` with a result column added (or, with
+    `result_only`, just the results). `progress(report)` is called after
+    each chunk. Returns a BatchReport. Raises ExpressionError if the
+    expression is invalid or uses a column the input does not have.
+    """
+    evaluator = BatchEvaluator(text, use_numpy)
+    report = BatchReport()
+    first_line = source.readline()
+    if not first_line.strip():
+        report.seconds = time.perf_counter() - report.started
+        return report
+    delimiter = detect_delimiter(first_line)
+    first_row = next(csv.reader([first_line], delimiter=delimiter))
+    header = first_row if not all(_is_number(cell) for cell in first_row) else None
+
+    names = column_names(header, len(first_row))
+    unknown = sorted(evaluator.variables - names.keys())
+    if unknown:
+        raise ExpressionError(f"No column named {', '.join(unknown)}; columns are {', '.join(names)}.")
+    used = [(name, names[name]) for name in sorted(evaluator.variables)]
+
+    writer = csv.writer(out, delimiter=delimiter, lineterminator="\n")
+    if header is not None:
+        writer.writerow(["result"] if result_only else header + ["result"])
+    reader = csv.reader(source, delimiter=delimiter)
+    rows_iter = reader if header is not None else _prepend(first_row, reader)
+    for rows in _chunks(rows_iter, chunk_rows):
+        columns = {name: _column(rows, index) for name, index in used}
+        values, errors = evaluator.evaluate(columns, len(rows))
+        results = list(map(repr, values))
+        for row in errors:
+            results[row] = ERROR_VALUE
+        if result_only:
+            out.write("\n".join(results) + "\n")
+        else:
+            for row, result in zip(rows, results):
+                row.append(result)
+            writer.writerows(rows)
+        report.rows += len(rows)
+        report.errors += len(errors)
+        report.seconds = time.perf_counter() - report.started
+        if progress:
+            progress(report)
+    report.seconds = time.perf_counter() - report.started
+    return report
+
+
+def _prepend(row, rows):
+    yield row
+    yield from rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply a calculator expression to columns of a CSV file.")
+    parser.add_argument("expression", help='expression over the columns, e.g. "a / b", or add/subtract/multiply/divide')
+    parser.add_argument("input", help="CSV or tab-separated input file ('-' for stdin)")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    parser.add_argument("--result-only", action="store_true", help="write only the result column")
+    parser.add_argument("--no-numpy", action="store_true", help="evaluate row by row even if NumPy is installed")
+    args = parser.parse_args(argv)
+
+    try:
+        source = sys.stdin if args.input == "-" else open(args.input, newline="")
+        out = open(args.output, "w", newline="") if args.output else sys.stdout
+    except OSError as e:
+        parser.error(str(e))
+    try:
+        report = run_batch(source, out, args.expression, result_only=args.result_only, use_numpy=not args.no_numpy)
+    except (OSError, ExpressionError, csv.Error) as e:
+        print(f"Batch failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    print(report, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,379 @@
+"""
+Expression engine for the calculator.
+
+Text such as "2 * (x + 1) ^ 2 / sqrt(y)" is tokenized, parsed by precedence
+climbing into a small tree of tuples, and the tree is compiled into nested
+closures, with constant parts folded while compiling. Compiled expressions
+are cached by their text (LRU), so evaluating the same formula again, even
+with new variable values, skips tokenizing, parsing and compiling entirely.
+
+Grammar, loosest binding first:
+    expression := term (("+" | "-") term)*
+    term       := unary (("*" | "/" | "//" | "%") unary)*
+    unary      := ("-" | "+") unary | power
+    power      := atom (("^" | "**") unary)?          (right-associative)
+    atom       := number | name | name "(" arguments ")" | "(" expression ")"
+"""
+import math
+import operator
+import re
+from functools import lru_cache
+
+CACHE_SIZE = 512
+MAX_DEPTH = 250  # Deepest expression tree accepted; walking deeper ones could exhaust Python's stack
+
+TOKEN_PATTERN = re.compile(r"""
+    \s*(?:
+        (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+      | (?P<name>[A-Za-z_][A-Za-z_0-9]*)
+      | (?P<operator>\*\*|//|[-+*/%^(),])
+    )""", re.VERBOSE)
+
+
+def real_pow(base, exponent):
+    """
+    operator.pow for real numbers: raises ValueError where Python would
+    return a complex number, such as (-8) ** 0.5.
+    """
+    result = base ** exponent
+    if isinstance(result, complex):
+        raise ValueError("A negative number has no real power with a fractional exponent.")
+    return result
+
+
+
+def round_number(number, ndigits=None):
+    """
+    round() for expression values: `ndigits` arrives as a float, Decimal or
+    Fraction literal, so a whole one is made an int. Raises ValueError otherwise.
+    """
+    if ndigits is None:
+        return round(number)
+    if ndigits != int(ndigits):
+        raise ValueError("round() needs a whole number of digits.")
+    return round(number, int(ndigits))
+
+
+BINARY_OPERATORS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "//": operator.floordiv,
+    "%": operator.mod,
+    "^": real_pow,
+    "**": real_pow,
+}
+PRECEDENCE = {"+": 1, "-": 1, "*": 2, "/": 2, "//": 2, "%": 2}
+POWER_OPERATORS = ("^", "**")
+
+FUNCTIONS = {
+    "abs": abs,
+    "sqrt": math.sqrt,
+    "exp": math.exp,
+    "ln": math.log,
+    "log": math.log10,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "round": round_number,
+    "floor": math.floor,
+    "ceil": math.ceil,
+    "min": min,
+    "max": max,
+}
+CONSTANTS = {"pi": math.pi, "e": math.e}
+
+# The calculator's two-number operations, as expressions over a and b.
+OPERATIONS = {
+    "add": "a + b",
+    "subtract": "a - b",
+    "multiply": "a * b",
+    "divide": "a / b",
+}
+
+ASSIGNMENT_PATTERN = re.compile(r"\s*([A-Za-z_][A-Za-z_0-9]*)\s*=(?!=)(.*)", re.DOTALL)
+
+
+class ExpressionError(ValueError):
+    """Raised for text that is not a valid expression, or an unknown name when evaluating."""
+
+
+# --- Tokenizing and parsing ---
+
+def tokenize(text):
+    """Returns a list of (kind, value, position) tuples; kind is "number", "name", "operator" or "end"."""
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN_PATTERN.match(text, position)
+        if match is None:
+            bad = len(text) - len(text[position:].lstrip())
+            raise ExpressionError(f"Unexpected character {text[bad]!r} at position {bad + 1}.")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind), match.start(kind)))
+        position = match.end()
+    tokens.append(("end", "", len(text)))
+    return tokens
+
+
+class _Parser:
+    """
+    Builds the expression tree. Nodes are tuples:
+    ("number", text), ("name", name), ("negate", node), ("binary", operator, left, right)
+    and ("call", function name, [argument nodes]).
+    """
+
+    def __init__(self, text):
+        self.tokens = tokenize(text)
+        self.index = 0
+
+    def peek(self):
+        return self.tokens[self.index]
+
+    def take(self):
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def expect(self, value):
+        kind, found, position = self.take()
+        if found != value or kind != "operator":
+            raise ExpressionError(f"Expected {value!r} at position {position + 1}.")
+
+    def parse(self):
+        if self.peek()[0] == "end":
+            raise ExpressionError("The expression is empty.")
+        tree = self.binary(1)
+        kind, value, position = self.peek()
+        if kind != "end":
+            raise ExpressionError(f"Unexpected {value!r} at position {position + 1}.")
+        return tree
+
+    def binary(self, min_precedence):
+        """Precedence climbing over the left-associative operators."""
+        left = self.unary()
+        while True:
+            kind, value, _ = self.peek()
+            precedence = PRECEDENCE.get(value) if kind == "operator" else None
+            if precedence is None or precedence < min_precedence:
+                return left
+            self.take()
+            left = ("binary", value, left, self.binary(precedence + 1))
+
+    def unary(self):
+        kind, value, _ = self.peek()
+        if kind == "operator" and value in ("-", "+"):
+            self.take()
+            operand = self.unary()
+            return ("negate", operand) if value == "-" else operand
+        return self.power()
+
+    def power(self):
+        base = self.atom()
+        kind, value, _ = self.peek()
+        if kind == "operator" and value in POWER_OPERATORS:
+            self.take()
+            return ("binary", value, base, self.unary())  # 2^-1 and 2^3^2 == 2^(3^2)
+        return base
+
+    def atom(self):
+        kind, value, position = self.take()
+        if kind == "number":
+            return ("number", value)
+        if kind == "name":
+            if self.peek()[1] != "(":
+                return ("name", value)
+            self.take()
+            arguments = []
+            if self.peek()[1] != ")":
+                arguments.append(self.binary(1))
+                while self.peek()[1] == ",":
+                    self.take()
+                    arguments.append(self.binary(1))
+            self.expect(")")
+            return ("call", value, arguments)
+        if value == "(":
+            inner = self.binary(1)
+            self.expect(")")
+            return inner
+        if kind == "end":
+            raise ExpressionError("The expression ends too early.")
+        raise ExpressionError(f"Unexpected {value!r} at position {position + 1}.")
+
+
+def parse(text):
+    """
+    Returns the expression tree of `text`. Raises ExpressionError for invalid
+    syntax or a tree deeper than MAX_DEPTH.
+    """
+    try:
+        tree = _Parser(text).parse()
+    except RecursionError:
+        raise ExpressionError("The expression is nested too deeply.") from None
+    if tree_depth(tree) > MAX_DEPTH:
+        raise ExpressionError("The expression is nested too deeply.")
+    return tree
+
+
+def tree_depth(tree):
+    """Returns the number of levels in `tree`, without recursing (so any depth can be measured)."""
+    deepest = 0
+    stack = [(tree, 1)]
+    while stack:
+        tree, depth = stack.pop()
+        deepest = max(deepest, depth)
+        kind = tree[0]
+        if kind == "negate":
+            stack.append((tree[1], depth + 1))
+        elif kind == "binary":
+            stack.extend(((tree[2], depth + 1), (tree[3], depth + 1)))
+        elif kind == "call":
+            stack.extend((argument, depth + 1) for argument in tree[2])
+    return deepest
+
+
+def tree_names(tree):
+    """Returns the set of variable names `tree` refers to (function names excluded)."""
+    kind = tree[0]
+    if kind == "name":
+        return {tree[1]}
+    if kind == "negate":
+        return tree_names(tree[1])
+    if kind == "binary":
+        return tree_names(tree[2]) | tree_names(tree[3])
+    if kind == "call":
+        return set().union(*(tree_names(argument) for argument in tree[2]))
+    return set()
+
+
+def is_integer_only(tree):
+    """Returns True if `tree` has only integer literals, variables, negation, "+", "-" and "*"."""
+    kind = tree[0]
+    if kind == "number":
+        return tree[1].isdigit()
+    if kind == "name":
+        return tree[1] not in CONSTANTS
+    if kind == "negate":
+        return is_integer_only(tree[1])
+    if kind == "binary":
+        return tree[1] in ("+", "-", "*") and is_integer_only(tree[2]) and is_integer_only(tree[3])
+    return False
+
+
+# --- Compiling ---
+
+def compile_tree(tree, number=float, functions=FUNCTIONS, constants=CONSTANTS, operators=BINARY_OPERATORS):
+    """
+    Compiles `tree` into a function of one argument, the dict of variable values.
+    `number` converts numeric literals. Subtrees without variables are
+    evaluated once here; an arithmetic error in one is left to evaluation time.
+    Raises ExpressionError for an unknown function.
+    """
+    return _Compiler(number, functions, constants, operators).compile(tree)[0]
+
+
+class _Compiler:
+    def __init__(self, number, functions, constants, operators):
+        self.number = number
+        self.functions = functions
+        self.constants = constants
+        self.operators = operators
+
+    def compile(self, tree):
+        """Returns (function, constant) where `constant` is True if `tree` uses no variables."""
+        kind = tree[0]
+        if kind == "number":
+            value = self.number(tree[1])
+            return (lambda variables: value), True
+        if kind == "name":
+            name = tree[1]
+            if name in self.constants:
+                value = self.constants[name]
+                return (lambda variables: value), True
+
+            def lookup(variables):
+                try:
+                    return variables[name]
+                except KeyError:
+                    raise ExpressionError(f"Unknown variable {name!r}.") from None
+            return lookup, False
+
+        if kind == "negate":
+            operand, constant = self.compile(tree[1])
+            function = lambda variables: -operand(variables)
+        elif kind == "binary":
+            op = self.operators[tree[1]]
+            (left, left_constant), (right, right_constant) = self.compile(tree[2]), self.compile(tree[3])
+            constant = left_constant and right_constant
+            function = lambda variables: op(left(variables), right(variables))
+        else:
+            call = self.functions.get(tree[1])
+            if call is None:
+                raise ExpressionError(f"Unknown function {tree[1]!r}.")
+            compiled = [self.compile(argument) for argument in tree[2]]
+            arguments = [argument for argument, _ in compiled]
+            constant = all(argument_constant for _, argument_constant in compiled)
+            if len(arguments) == 1:
+                argument = arguments[0]
+                function = lambda variables: call(argument(variables))
+            else:
+                function = lambda variables: call(*[argument(variables) for argument in arguments])
+
+        if constant:
+            try:
+                value = function({})
+            except (ArithmeticError, ValueError, TypeError):
+                return function, False  # Raise when evaluated, like any other arithmetic error
+            return (lambda variables: value), True
+        return function, False
+
+
+class Expression:
+    """A compiled expression; `variables` holds the variable names it needs."""
+
+    def __init__(self, text):
+        self.text = text
+        self.tree = parse(text)
+        self.variables = frozenset(tree_names(self.tree) - CONSTANTS.keys())
+        self.integer_only = is_integer_only(self.tree)
+        self._function = compile_tree(self.tree)
+        self._compiled = {}  # Backend name -> function, see numeric.py
+
+    def evaluate(self, variables=None):
+        """
+        Returns the value for the given variable values. Raises ExpressionError
+        for a missing variable; arithmetic errors (ZeroDivisionError,
+        OverflowError, ValueError for a math domain error) propagate.
+        """
+        return self._function(variables or {})
+
+    def compiled(self, backend):
+        """Returns the function evaluating this expression with a numeric backend, compiled on first use."""
+        function = self._compiled.get(backend.name)
+        if function is None:
+            function = self._compiled[backend.name] = compile_tree(
+                self.tree, backend.number, backend.functions, backend.constants, backend.operators)
+        return function
+
+    def __repr__(self):
+        return f"Expression({self.text!r})"
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_expression(text):
+    """Returns the cached Expression for `text`, compiling it on first use."""
+    return Expression(text)
+
+
+def evaluate(text, variables=None):
+    return compile_expression(text).evaluate(variables)
+
+
+def split_assignment(text):
+    """Splits "name = expression" into (name, expression); other text gives (None, text)."""
+    match = ASSIGNMENT_PATTERN.match(text)
+    if match is None:
+        return None, text
+    return match.group(1), match.group(2)
@@ -0,0 +1,172 @@
+"""
+Calculation history and result memoization.
+
+Every calculation is appended as one JSON line to the history file and
+never rewritten, so recording costs one small write however long the
+history gets, and a crash can at most tear the last line (dropped on the
+next load). Loaded entries are indexed by the names and numbers in their
+expression, operands and result, so search is a few dict and bisect lookups rather
+than a scan.
+
+ResultMemo is a bounded LRU cache of results that took a while to compute
+(big powers, long-precision division), keyed by backend, expression and
+operand values.
+"""
+import bisect
+import json
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+HISTORY_FILE = "calculator_history.jsonl"
+MEMO_SIZE = 256
+MEMO_MIN_SECONDS = 0.001  # Faster results are not worth a memo slot
+SEARCH_TOKEN = re.compile(r"[a-z_][a-z_0-9]*|\d+(?:\.\d+)?")
+
+
+class HistoryEntry:
+    """One calculation: values are kept as the formatted text that was shown."""
+
+    __slots__ = ("time", "backend", "expression", "variables", "result")
+
+    def __init__(self, time, backend, expression, variables, result):
+        self.time = time
+        self.backend = backend
+        self.expression = expression
+        self.variables = variables  # name -> formatted value
+        self.result = result
+
+    def to_dict(self):
+        return {"time": self.time, "backend": self.backend, "expression": self.expression,
+                "variables": self.variables, "result": self.result}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["time"], data["backend"], data["expression"], data.get("variables", {}), data["result"])
+
+    def __str__(self):
+        operands = ", ".join(f"{name}={value}" for name, value in self.variables.items())
+        return f"{self.expression} = {self.result}" + (f"   [{operands}]" if operands else "")
+
+
+class CalculationHistory:
+    """
+    The append-only history in `path` (None keeps it in memory only). Raises
+    OSError from append() if the file cannot be written.
+    """
+
+    def __init__(self, path=HISTORY_FILE):
+        self.path = path
+        self.entries = []
+        self._index = {}  # Search token -> numbers of the entries containing it, ascending
+        self._tokens = []  # Sorted keys of _index, for prefix lookups
+        if path is not None:
+            self._load()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _load(self):
+        try:
+            with open(self.path, "rb+") as f:
+                good_end = 0
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # A torn final line from a crash mid-append
+                    try:
+                        entry = HistoryEntry.from_dict(json.loads(line))
+                    except (ValueError, KeyError, TypeError):
+                        good_end += len(line)
+                        continue  # Skip a damaged line, keep the rest
+                    self._add(entry)
+                    good_end += len(line)
+                f.truncate(good_end)
+        except FileNotFoundError:
+            pass
+
+    def _add(self, entry):
+        number = len(self.entries)
+        self.entries.append(entry)
+        operands = " ".join(f"{name} {value}" for name, value in entry.variables.items())
+        text = f"{entry.expression} {entry.result} {operands}".lower()
+        for token in set(SEARCH_TOKEN.findall(text)):
+            numbers = self._index.get(token)
+            if numbers is None:
+                numbers = self._index[token] = []
+                bisect.insort(self._tokens, token)
+            numbers.append(number)
+
+    def append(self, backend, expression, variables, result):
+        """
+        Records a calculation: `expression` is its text, `variables` the values
+        it used and `result` its value, all formatted by `backend`. Returns the entry.
+        """
+        entry = HistoryEntry(datetime.now().isoformat(timespec="seconds"), backend.name, expression,
+                             {name: backend.format(value) for name, value in variables.items()},
+                             backend.format(result))
+        if self.path is not None:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry.to_dict(), separators=(",", ":")) + "\n")
+        self._add(entry)
+        return entry
+
+    def recent(self, limit):
+        """Returns the last `limit` entries, newest first."""
+        return self.entries[:-limit - 1:-1] if limit else []
+
+    def search(self, query, limit):
+        """
+        Returns up to `limit` entries, newest first, in which every name or number
+        of `query` starts a name or number of the expression, operands or result.
+        A query without names or numbers matches every entry.
+        """
+        terms = SEARCH_TOKEN.findall(query.lower())
+        if not terms:
+            return self.recent(limit)
+        matches = None
+        for term in sorted(set(terms), key=len, reverse=True):  # Longer terms match fewer entries
+            numbers = set()
+            start = bisect.bisect_left(self._tokens, term)
+            for token in self._tokens[start:]:
+                if not token.startswith(term):
+                    break
+                numbers.update(self._index[token])
+            matches = numbers if matches is None else matches & numbers
+            if not matches:
+                return []
+        return [self.entries[number] for number in sorted(matches, reverse=True)[:limit]]
+
+
+class ResultMemo:
+    """LRU cache of slow results, keyed by backend name, expression text and operand values."""
+
+    def __init__(self, size=MEMO_SIZE, min_seconds=MEMO_MIN_SECONDS):
+        self.size = size
+        self.min_seconds = min_seconds
+        self._results = OrderedDict()
+
+    def __len__(self):
+        return len(self._results)
+
+    @staticmethod
+    def key(backend, expression, variables):
+        # The type is part of the key: 1, 1.0 and Decimal(1) are equal but give different results.
+        operands = tuple(sorted((name, type(variables[name]).__name__, variables[name])
+                                for name in expression.variables if name in variables))
+        return backend.name, expression.text, operands
+
+    def evaluate(self, backend, expression, variables):
+        """Returns backend.evaluate(expression, variables), from the cache when it was slow before."""
+        key = self.key(backend, expression, variables)
+        result = self._results.get(key)
+        if result is not None:
+            self._results.move_to_end(key)
+            return result
+        started = time.perf_counter()
+        result = backend.evaluate(expression, variables)
+        if time.perf_counter() - started >= self.min_seconds:
+            self._results[key] = result
+            if len(self._results) > self.size:
+                self._results.popitem(last=False)
+        return result
@@ -0,0 +1,268 @@
+"""
+Numeric backends for the calculator: binary floats, decimal.Decimal with a
+chosen number of significant digits, and exact fractions.Fraction.
+
+A backend parses input numbers, compiles expressions with its own literal
+type, functions and operators (see Expression.compiled), evaluates them and
+formats results. The exact backends keep Python's fast integer arithmetic
+where it loses nothing: an expression made of integer literals, variables,
+"+", "-" and "*" evaluated on integer values runs on plain ints. Functions
+without an exact or Decimal version (trigonometry, and for fractions every
+irrational function) are computed in float, so their results have float
+accuracy.
+"""
+import decimal
+import math
+import operator
+from decimal import Decimal
+from fractions import Fraction
+
+from expression import BINARY_OPERATORS, CONSTANTS, FUNCTIONS, real_pow
+
+DEFAULT_PRECISION = 28
+MAX_PRECISION = 10_000
+MAX_EXACT_BITS = 1 << 20  # Largest exact power computed, in bits of numerator and denominator
+MAX_SHOWN_DIGITS = 1000  # Longer exact results are shown in scientific notation
+BACKEND_NAMES = ("float", "decimal", "fraction")
+
+
+def bounded_pow(base, exponent):
+    """
+    pow() for exact numbers. An integer base is made a Fraction so that negative
+    exponents stay exact. Raises OverflowError instead of building a result
+    with more than MAX_EXACT_BITS bits, and ValueError instead of returning
+    a complex number.
+    """
+    if isinstance(base, int):
+        base = Fraction(base)
+    if isinstance(base, Fraction) and base not in (0, 1, -1):
+        size = base.numerator.bit_length() + base.denominator.bit_length()
+        if abs(exponent) * size > MAX_EXACT_BITS:
+            raise OverflowError("The result is too large to compute exactly.")
+    result = real_pow(base, exponent)
+    if isinstance(result, Fraction) and result.denominator == 1:
+        return result.numerator
+    return result
+
+
+def format_integer(value):
+    """Formats an int, in scientific notation past MAX_SHOWN_DIGITS digits."""
+    if value.bit_length() < MAX_SHOWN_DIGITS * 3.32:
+        return str(value)
+    with decimal.localcontext(prec=16):
+        return f"{+Decimal(value):.15e}"
+
+
+class FloatBackend:
+    """Binary floating point: the fastest backend, with about 15 significant digits."""
+
+    name = "float"
+    exact = False
+
+    def __init__(self):
+        self.number = float
+        self.functions = FUNCTIONS
+        self.constants = CONSTANTS
+        self.operators = BINARY_OPERATORS
+
+    def parse(self, text):
+        """Returns the number in `text`. Raises ValueError if there is none."""
+        return float(text)
+
+    def coerce(self, value):
+        """Converts a number of any backend into this backend's type."""
+        return float(value)
+
+    def evaluate(self, expression, variables):
+        """
+        Evaluates `expression` (an Expression) with `variables`. Raises the
+        same errors as Expression.evaluate.
+        """
+        return expression.evaluate({name: self.coerce(value) for name, value in variables.items()})
+
+    def format(self, value):
+        if isinstance(value, int):
+            return format_integer(value)
+        if isinstance(value, float):
+            return f"{value:.15g}"
+        return str(value)
+
+
+def _floor_divide(a, b):
+    """Floor division with Python's rounding toward minus infinity (Decimal's // truncates)."""
+    quotient = a // b
+    if a % b and (a < 0) != (b < 0):
+        quotient -= 1
+    return quotient
+
+
+def _modulo(a, b):
+    """Remainder with the sign of the divisor, like Python's % (Decimal's % takes the dividend's)."""
+    remainder = a % b
+    if remainder and (remainder < 0) != (b < 0):
+        remainder += b
+    return remainder
+
+
+def decimal_pi():
+    """Returns pi to the current context precision (the decimal module documentation's recipe)."""
+    context = decimal.getcontext()
+    context.prec += 2
+    three = Decimal(3)
+    last, t, s, n, na, d, da = 0, three, 3, 1, 0, 0, 24
+    while s != last:
+        last = s
+        n, na = n + na, na + 8
+        d, da = d + da, da + 32
+        t = (t * n) / d
+        s += t
+    context.prec -= 2
+    return +s
+
+
+class DecimalBackend(FloatBackend):
+    """
+    Decimal arithmetic rounded to `precision` significant digits. Raises
+    ValueError for a precision outside 1..MAX_PRECISION.
+    """
+
+    exact = True
+
+    def __init__(self, precision=DEFAULT_PRECISION):
+        if not 1 <= precision <= MAX_PRECISION:
+            raise ValueError(f"The precision must be between 1 and {MAX_PRECISION} digits.")
+        self.precision = precision
+        self.name = f"decimal{precision}"  # Constants depend on the precision, so it is part of the cache key
+        self.number = Decimal
+        self.functions = {
+            **FUNCTIONS,  # abs, round, floor, ceil, min and max work on Decimals as they are
+            "sqrt": lambda x: Decimal(x).sqrt(),
+            "exp": lambda x: Decimal(x).exp(),
+            "ln": lambda x: Decimal(x).ln(),
+            "log": lambda x: Decimal(x).log10(),
+            "sin": lambda x: Decimal(math.sin(x)),
+            "cos": lambda x: Decimal(math.cos(x)),
+            "tan": lambda x: Decimal(math.tan(x)),
+        }
+        with self.context():
+            self.constants = {"pi": decimal_pi(), "e": Decimal(1).exp()}
+        self.operators = {**BINARY_OPERATORS, "//": _floor_divide, "%": _modulo}
+
+    def context(self):
+        return decimal.localcontext(prec=self.precision)
+
+    def parse(self, text):
+        text = text.strip()
+        if text.isdigit():
+            return int(text)  # Integers take the exact int fast path
+        try:
+            return Decimal(text)
+        except decimal.InvalidOperation:
+            raise ValueError(f"Not a number: {text!r}") from None
+
+    def coerce(self, value):
+        if isinstance(value, Fraction):
+            with self.context():
+                return Decimal(value.numerator) / value.denominator
+        if isinstance(value, float):
+            return Decimal(repr(value))  # The value as shown, not its binary expansion
+        return Decimal(value)
+
+    def evaluate(self, expression, variables):
+        if expression.integer_only and all(type(variables.get(name)) is int for name in expression.variables):
+            return expression.compiled(INTEGERS)(variables)
+        values = {name: self.coerce(value) for name, value in variables.items()}
+        try:
+            with self.context():
+                return expression.compiled(self)(values)
+        except decimal.DivisionByZero:
+            raise ZeroDivisionError("division by zero") from None  # DivisionByZero carries no readable message
+        except decimal.Overflow:
+            raise OverflowError("The result is too large.") from None
+        except decimal.InvalidOperation:
+            raise ValueError("The result is undefined.") from None
+
+    def format(self, value):
+        if isinstance(value, Decimal):
+            return str(value)
+        return super().format(value)
+
+
+def _exact_divide(a, b):
+    if isinstance(a, float) or isinstance(b, float):
+        return a / b
+    result = Fraction(a) / b
+    return result.numerator if result.denominator == 1 else result
+
+
+def _fraction_sqrt(x):
+    """Exact square root of a perfect-square Fraction; float approximation otherwise."""
+    if not isinstance(x, float) and x >= 0:
+        x = Fraction(x)
+        numerator, denominator = math.isqrt(x.numerator), math.isqrt(x.denominator)
+        if numerator * numerator == x.numerator and denominator * denominator == x.denominator:
+            return Fraction(numerator, denominator)
+    return math.sqrt(x)
+
+
+class FractionBackend(FloatBackend):
+    """Exact rational arithmetic; irrational functions and constants give floats."""
+
+    name = "fraction"
+    exact = True
+
+    def __init__(self):
+        super().__init__()
+        self.number = self.parse
+        self.functions = {**FUNCTIONS, "sqrt": _fraction_sqrt}
+        self.operators = {**BINARY_OPERATORS, "/": _exact_divide, "^": bounded_pow, "**": bounded_pow}
+
+    def parse(self, text):
+        text = text.strip()
+        if text.isdigit():
+            return int(text)
+        return Fraction(text)  # Raises ValueError for non-numbers
+
+    def coerce(self, value):
+        if isinstance(value, (int, Fraction)):
+            return value
+        if isinstance(value, float):
+            return Fraction(repr(value))
+        return Fraction(value)
+
+    def evaluate(self, expression, variables):
+        return expression.compiled(self)({name: self.coerce(value) for name, value in variables.items()})
+
+    def format(self, value):
+        if isinstance(value, Fraction):
+            if value.denominator == 1:
+                return format_integer(value.numerator)
+            if max(value.numerator.bit_length(), value.denominator.bit_length()) < MAX_SHOWN_DIGITS * 3.32:
+                return f"{value.numerator}/{value.denominator}"
+            with decimal.localcontext(prec=16):
+                return f"{Decimal(value.numerator) / value.denominator:.15e}"
+        return super().format(value)
+
+
+class _IntegerBackend:
+    """The exact backends' fast path: only compiles integer-only expressions."""
+
+    name = "int"
+    number = int
+    functions = {}
+    constants = {}
+    operators = {"+": operator.add, "-": operator.sub, "*": operator.mul}
+
+
+INTEGERS = _IntegerBackend()
+
+
+def make_backend(name, precision=DEFAULT_PRECISION):
+    """Returns the backend called `name` (one of BACKEND_NAMES). Raises ValueError for others."""
+    if name == "float":
+        return FloatBackend()
+    if name == "decimal":
+        return DecimalBackend(precision)
+    if name == "fraction":
+        return FractionBackend()
+    raise ValueError(f"Unknown numeric backend {name!r}.")
@@ -1,7 +1,32 @@
 import tkinter as tk
-from tkinter import messagebox, simpledialog, ttk
+from tkinter import filedialog, messagebox, simpledialog, ttk
+from itertools import islice
+import csv
 import json
 import os
+import sqlite3
+import sys
+
+# Shared modules live in "Python Project/common".
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from common.autosave import Autosaver
+from common.background import BackgroundTasks
+from common.storage import open_sqlite
+from contact_dedup import find_duplicates, merge_contacts
+from contact_io import export_contacts, import_contacts
+from contact_journal import ContactJournal
+from contact_store import ContactStore
+from virtual_list import VirtualTreeview
+
+STORAGE_BACKEND = "sqlite"  # "sqlite" or "journal"
+CONTACT_INDEXED_FIELDS = ("name", "phone")
+SEARCH_RESULT_LIMIT = 200
+LOAD_BATCH_SIZE = 2000
+LOAD_QUEUE_BATCHES = 2  # Loaded batches buffered between the storage thread and the UI
+IMPORT_QUEUE_CHUNKS = 4  # Validated chunks buffered between the import thread and the UI
+STORAGE_LANE = "storage"  # Every storage read and write runs on this one background thread, in order
+REJECTS_SHOWN = 10
+DUPLICATE_GROUPS_SHOWN = 1000
 
 class ContactBookGUI:
     def __init__(self, master):
@@ -9,32 +34,279 @@ class ContactBookGUI:
         master.title("Contact Book")
         master.geometry("600x400")
 
-        self.contacts = self.load_contacts()
+        self.contacts = ContactStore()
+        self.storage = None
+        self.loading = False
+        self.status_text = tk.StringVar()
+        self.background = BackgroundTasks(master)
+        self.running = []  # Handles of the loads, imports and scans to cancel on close
+        self.autosave = None  # Started once the contacts are loaded
+        self.confirm_save = False  # "Save Contacts" was pressed: report how the save went
 
         self.create_widgets()
         self.update_contact_list()
+        self.load_contacts()
+        master.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def open_storage(self, filename="contacts.json"):
+        """Opens the configured storage backend. The SQLite backend imports the JSON contacts on first start."""
+        if STORAGE_BACKEND == "journal":
+            return ContactJournal(filename)
+
+        def legacy_contacts():
+            try:
+                return ContactJournal(filename).load()
+            except json.JSONDecodeError:
+                self.background.call_soon(messagebox.showerror, "Error",
+                                          "Error decoding the old contacts file. It was not migrated.")
+                return []
+
+        return open_sqlite(os.path.splitext(filename)[0] + ".db", "contacts", CONTACT_INDEXED_FIELDS, legacy_contacts)
+
+    def start(self, work, *args, **callbacks):
+        """Submits background work that is cancelled if the window closes first."""
+        def finished(callback):
+            def run(value):
+                self.running.remove(task)
+                if callback is not None:
+                    callback(value)
+            return run
+
+        on_done, on_error = callbacks.pop("on_done", None), callbacks.pop("on_error", None)
+        task = self.background.submit(work, *args, on_done=finished(on_done), on_error=finished(on_error), **callbacks)
+        self.running.append(task)
+        return task
 
     def load_contacts(self, filename="contacts.json"):
-        """Loads contacts from a JSON file."""
-        contacts = []
-        try:
-            with open(filename, "r") as f:
-                contacts = json.load(f)
-        except FileNotFoundError:
-            pass
-        except json.JSONDecodeError:
-            messagebox.showerror("Error", "Error decoding contacts file.")
-        return contacts
-
-    def save_contacts(self, filename="contacts.json"):
-        """Saves contacts to a JSON file."""
-        try:
-            with open(filename, "w") as f:
-                json.dump(self.contacts, f, indent=4)
+        """
+        Streams contacts from storage into the contact list in batches.
+        Storage is opened and read on the storage thread; each batch is added
+        from an after() callback, so the window and the first contacts appear
+        immediately while the rest keep loading. If the contacts cannot be
+        opened, the book is left empty and the user may retry.
+        """
+        self.loading = True
+        self.status_text.set("Loading contacts...")
+
+        def read(task):
+            storage = self.open_storage(filename)
+            records = storage.iter_records()
+            try:
+                for batch in iter(lambda: list(islice(records, LOAD_BATCH_SIZE)), []):
+                    task.report(batch)
+            except json.JSONDecodeError:
+                self.background.call_soon(messagebox.showerror, "Error", "Error decoding contacts file.")
+            except BaseException:
+                storage.close()
+                raise
+            return storage
+
+        def add_batch(batch):
+            self.contact_view.extend([self.contacts.add(record, record.get("id")) for record in batch])
+            self.status_text.set(f"Loading contacts... {len(self.contacts)} so far")
+
+        def loaded(storage):
+            self.storage = storage
+            self.autosave = Autosaver(self.background, lambda: storage.begin_save(self.contacts.to_list), STORAGE_LANE,
+                                      on_saved=self.saved, on_error=self.save_failed)
+            self.loading = False
+            self.status_text.set(f"{len(self.contacts)} contacts")
+
+        def failed(error):
+            # Drop what was read before the error; edits could not be saved anyway.
+            self.contacts = ContactStore()
+            self.update_contact_list()
+            self.loading = False
+            self.status_text.set("Could not open the contacts.")
+            if messagebox.askretrycancel("Error", f"Could not open the contacts: {error}"):
+                self.load_contacts(filename)
+
+        self.start(read, on_progress=add_batch, max_pending=LOAD_QUEUE_BATCHES,
+                   on_done=loaded, on_error=failed, lane=STORAGE_LANE)
+
+    def still_loading(self):
+        """
+        Tells the user to wait if contacts are still loading, or offers to
+        retry if they could not be opened. Returns True in either case.
+        """
+        if self.loading:
+            messagebox.showinfo("Please wait", "Contacts are still loading.")
+        elif self.storage is None:
+            if messagebox.askretrycancel("Error", "The contacts could not be opened."):
+                self.load_contacts()
+        return self.storage is None
+
+    def save_contacts(self):
+        """
+        Saves the changes made so far right away instead of waiting for the
+        autosave. The changes are taken here and written on the storage thread.
+        """
+        if self.still_loading():
+            return
+        self.confirm_save = True
+        self.autosave.save_now()
+
+    def saved(self):
+        if self.confirm_save:
+            self.confirm_save = False
             messagebox.showinfo("Success", "Contacts saved successfully!")
-        except IOError:
+
+    def save_failed(self, error):
+        if not isinstance(error, (IOError, sqlite3.Error)):
+            raise error
+        self.status_text.set(f"Autosave failed, retrying: {error}")
+        if self.confirm_save:
+            self.confirm_save = False
             messagebox.showerror("Error", "Error saving contacts.")
 
+    def on_close(self):
+        """Cancels loads, imports and scans, writes unsaved changes and waits for the writes, then closes the window."""
+        for task in self.running:
+            task.cancel()
+        if self.autosave is not None:
+            self.autosave.close()
+        self.background.shutdown()
+        if self.storage is not None:
+            try:
+                self.storage.close()  # Also waits for a journal compaction still being written
+            except (OSError, sqlite3.Error) as e:
+                messagebox.showerror("Error", f"Error finishing the contacts file: {e}")
+        self.master.destroy()
+
+    def import_contacts(self):
+        """
+        Imports a CSV or vCard file. Reading and validation run as a background
+        task (validation in a process pool); validated chunks come back as its
+        progress, at most a few at a time, and are added to the store and storage
+        on the Tk thread.
+        """
+        if self.still_loading():
+            return
+        path = filedialog.askopenfilename(title="Import contacts", filetypes=[
+            ("Contacts", "*.csv *.vcf *.vcard"), ("CSV files", "*.csv"), ("vCard files", "*.vcf *.vcard")])
+        if not path:
+            return
+
+        rejects = []
+
+        def on_reject(row_number, reason):
+            if len(rejects) < REJECTS_SHOWN:
+                rejects.append(f"Row {row_number}: {reason}")
+
+        def run(task):
+            return import_contacts(path, task.report, on_reject=on_reject,
+                                   progress=lambda report: task.report(str(report)))
+
+        def add_chunk(item):
+            if isinstance(item, str):
+                self.status_text.set(f"Importing... {item}")
+                return
+            records = []
+            for contact in item:
+                contact["id"] = self.contacts.add(contact)
+                records.append(contact)
+            self.storage.put_many(records)
+            self.autosave.changed()
+            self.contact_view.extend(contact["id"] for contact in records)
+
+        def finished(report):
+            self.loading = False
+            self.status_text.set(f"{len(self.contacts)} contacts. Last import: {report}")
+            message = str(report)
+            if rejects:
+                message += "\n\nRejected rows:\n" + "\n".join(rejects)
+            messagebox.showinfo("Import finished", message)
+
+        def failed(error):
+            self.loading = False
+            self.status_text.set(f"{len(self.contacts)} contacts")
+            if not isinstance(error, (OSError, ValueError, csv.Error)):
+                raise error
+            messagebox.showerror("Error", f"Import failed: {error}")
+
+        self.loading = True  # Blocks edits until the import is done
+        self.status_text.set("Importing...")
+        self.start(run, on_progress=add_chunk, max_pending=IMPORT_QUEUE_CHUNKS, on_done=finished, on_error=failed)
+
+    def export_contacts(self):
+        """Exports every contact to a CSV or vCard file, chosen by its extension."""
+        if self.still_loading():
+            return
+        path = filedialog.asksaveasfilename(title="Export contacts", defaultextension=".csv", filetypes=[
+            ("CSV files", "*.csv"), ("vCard files", "*.vcf")])
+        if not path:
+            return
+        try:
+            count = export_contacts(({"id": contact_id, **contact.to_dict()} for contact_id, contact in self.contacts), path)
+            messagebox.showinfo("Success", f"Exported {count} contacts.")
+        except OSError as e:
+            messagebox.showerror("Error", f"Export failed: {e}")
+
+    def find_duplicates(self):
+        """Looks for duplicate contacts on a background thread, then lists them as merge suggestions."""
+        if self.still_loading():
+            return
+        snapshot = list(self.contacts)  # (id, Contact) pairs; edits are blocked until the scan is done
+        self.loading = True
+        self.status_text.set("Looking for duplicates...")
+
+        def found(groups):
+            self.loading = False
+            self.status_text.set(f"{len(self.contacts)} contacts, {len(groups)} possible duplicate groups")
+            if not groups:
+                messagebox.showinfo("Duplicates", "No duplicate contacts found.")
+                return
+            self.show_merge_suggestions(groups[:DUPLICATE_GROUPS_SHOWN])
+
+        def failed(error):
+            self.loading = False
+            self.status_text.set(f"{len(self.contacts)} contacts")
+            raise error
+
+        self.start(lambda task: find_duplicates(snapshot, check_cancelled=task.raise_if_cancelled),
+                   on_done=found, on_error=failed)
+
+    def show_merge_suggestions(self, groups):
+        """Lists duplicate groups, best match first; selected groups are merged into their most complete contact."""
+        window = tk.Toplevel(self.master)
+        window.title("Possible Duplicates")
+
+        tree = ttk.Treeview(window, columns=("Score", "Contacts"), show="headings", height=15)
+        tree.heading("Score", text="Match")
+        tree.heading("Contacts", text="Contacts")
+        tree.column("Score", width=60, anchor=tk.CENTER)
+        tree.column("Contacts", width=500)
+        tree.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+
+        groups_by_item = {}
+        for group in groups:
+            contacts = [self.contacts.get(contact_id) for contact_id in group.ids]
+            summary = "  |  ".join(f"{contact.name} ({contact.phone})" for contact in contacts if contact is not None)
+            groups_by_item[tree.insert("", tk.END, values=(f"{group.score:.0%}", summary))] = group
+
+        def merge_selected():
+            if not tree.selection():
+                messagebox.showerror("Error", "Please select the groups to merge.", parent=window)
+                return
+            for item in tree.selection():
+                keep_id, deleted_ids = merge_contacts(self.contacts, groups_by_item.pop(item).ids)
+                with self.storage.transaction():
+                    for contact_id in deleted_ids:
+                        self.storage.delete(contact_id)
+                    if deleted_ids:
+                        self.storage.put(keep_id, self.contacts.get(keep_id).to_dict())
+                for contact_id in deleted_ids:
+                    self.contact_view.remove(contact_id)
+                if deleted_ids:
+                    self.autosave.changed()
+                    self.contact_view.refresh_row(keep_id)
+                tree.delete(item)
+            self.status_text.set(f"{len(self.contacts)} contacts")
+            self.show_contact_details(None)
+
+        tk.Button(window, text="Merge Selected", command=merge_selected).pack(side=tk.LEFT, padx=10, pady=(0, 10))
+        tk.Button(window, text="Close", command=window.destroy).pack(side=tk.RIGHT, padx=10, pady=(0, 10))
+
     def create_widgets(self):
         # --- Contact List Frame ---
         self.list_frame = tk.Frame(self.master)
@@ -44,11 +316,13 @@ class ContactBookGUI:
         self.contact_list.heading("Name", text="Name")
         self.contact_list.heading("Phone", text="Phone Number")
         self.contact_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        self.contact_list.bind('<<TreeviewSelect>>', self.show_contact_details)
 
-        self.scrollbar = tk.Scrollbar(self.list_frame, orient=tk.VERTICAL, command=self.contact_list.yview)
+        self.scrollbar = tk.Scrollbar(self.list_frame, orient=tk.VERTICAL)
         self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.contact_list.config(yscrollcommand=self.scrollbar.set)
+
+        # Only the visible rows exist in the Treeview; the view scrolls over contact IDs.
+        self.contact_view = VirtualTreeview(self.contact_list, self.scrollbar, self.contact_row,
+                                            on_select=lambda contact_id: self.show_contact_details(None))
 
         # --- Details Frame ---
         self.details_frame = tk.Frame(self.master)
@@ -85,28 +359,36 @@ class ContactBookGUI:
         tk.Button(self.button_frame, text="Delete Contact", command=self.delete_contact).pack(side=tk.LEFT, padx=5)
         tk.Button(self.button_frame, text="Save Contacts", command=self.save_contacts).pack(side=tk.LEFT, padx=5)
 
-    def update_contact_list(self, search_results=None):
-        """Updates the contact list Treeview."""
-        for item in self.contact_list.get_children():
-            self.contact_list.delete(item)
+        self.io_frame = tk.Frame(self.master)
+        self.io_frame.pack()
+        tk.Button(self.io_frame, text="Import CSV/vCard", command=self.import_contacts).pack(side=tk.LEFT, padx=5)
+        tk.Button(self.io_frame, text="Export CSV/vCard", command=self.export_contacts).pack(side=tk.LEFT, padx=5)
+        tk.Button(self.io_frame, text="Find Duplicates", command=self.find_duplicates).pack(side=tk.LEFT, padx=5)
 
-        contacts_to_display = search_results if search_results is not None else self.contacts
+        # --- Status Bar ---
+        tk.Label(self.master, textvariable=self.status_text, anchor=tk.W).pack(padx=10, pady=(0, 5), fill=tk.X)
 
-        for contact in contacts_to_display:
-            self.contact_list.insert("", tk.END, values=(contact.get("name", ""), contact.get("phone", "")))
+    def contact_row(self, contact_id):
+        """Returns the Treeview column values for a contact."""
+        contact = self.contacts.get(contact_id)
+        return (contact.name, contact.phone)
+
+    def update_contact_list(self, search_results=None):
+        """Shows all contacts, or the given contact IDs, in the contact list."""
+        ids_to_display = search_results if search_results is not None else self.contacts.ids()
+        self.contact_view.set_ids(ids_to_display)
 
     def show_contact_details(self, event):
         """Displays detailed information of the selected contact."""
-        selected_item = self.contact_list.selection()
+        selected_item = self.contact_view.selection()
         if selected_item:
-            selected_name = self.contact_list.item(selected_item[0])['values'][0]
-            for contact in self.contacts:
-                if contact.get("name") == selected_name:
-                    self.details_values["Name:"].set(contact.get("name", ""))
-                    self.details_values["Phone:"].set(contact.get("phone", ""))
-                    self.details_values["Email:"].set(contact.get("email", ""))
-                    self.details_values["Address:"].set(contact.get("address", ""))
-                    return
+            contact = self.contacts.get(selected_item[0])
+            if contact is not None:
+                self.details_values["Name:"].set(contact.name)
+                self.details_values["Phone:"].set(contact.phone)
+                self.details_values["Email:"].set(contact.email)
+                self.details_values["Address:"].set(contact.address)
+                return
 
         # Clear details if no contact is selected
         for var in self.details_values.values():
@@ -114,6 +396,8 @@ class ContactBookGUI:
 
     def add_contact(self):
         """Opens a dialog to add a new contact."""
+        if self.still_loading():
+            return
         add_window = tk.Toplevel(self.master)
         add_window.title("Add New Contact")
 
@@ -131,46 +415,48 @@ class ContactBookGUI:
             if not new_contact["name"] or not new_contact["phone"]:
                 messagebox.showerror("Error", "Name and Phone are required.")
                 return
-            self.contacts.append(new_contact)
-            self.update_contact_list()
+            contact_id = self.contacts.add(new_contact)
+            self.storage.put(contact_id, self.contacts.get(contact_id).to_dict())
+            self.autosave.changed()
+            self.contact_view.append(contact_id)
+            self.contact_view.select(contact_id)
             add_window.destroy()
 
         tk.Button(add_window, text="Save Contact", command=save_new_contact).grid(row=len(labels), column=0, columnspan=2, pady=10)
 
     def search_contact(self):
         """Opens a dialog to search for a contact."""
+        if self.still_loading():
+            return
         search_window = tk.Toplevel(self.master)
         search_window.title("Search Contact")
 
-        tk.Label(search_window, text="Search by Name or Phone:").pack(padx=10, pady=5)
+        tk.Label(search_window, text="Search by Name, Phone, Email or Address:").pack(padx=10, pady=5)
         search_entry = tk.Entry(search_window, width=30)
         search_entry.pack(padx=10, pady=5)
+        search_entry.focus_set()
 
-        def perform_search():
-            search_term = search_entry.get().strip().lower()
-            results = []
-            for contact in self.contacts:
-                if search_term in contact.get("name", "").lower() or search_term in contact.get("phone", "").lower():
-                    results.append(contact)
-            self.update_contact_list(results)
+        def perform_search(event=None):
+            search_term = search_entry.get().strip()
+            if not search_term:
+                self.update_contact_list()
+                return
+            self.update_contact_list(self.contacts.search(search_term, SEARCH_RESULT_LIMIT))
 
+        search_entry.bind("<KeyRelease>", perform_search)
         tk.Button(search_window, text="Search", command=perform_search).pack(pady=10)
 
     def update_contact(self):
         """Opens a dialog to update the selected contact."""
-        selected_item = self.contact_list.selection()
+        if self.still_loading():
+            return
+        selected_item = self.contact_view.selection()
         if not selected_item:
             messagebox.showerror("Error", "Please select a contact to update.")
             return
 
-        selected_name = self.contact_list.item(selected_item[0])['values'][0]
-        original_index = -1
-        for i, contact in enumerate(self.contacts):
-            if contact.get("name") == selected_name:
-                original_index = i
-                break
-
-        if original_index == -1:
+        contact_id = selected_item[0]
+        if contact_id not in self.contacts:
             messagebox.showerror("Error", "Selected contact not found in data.")
             return
 
@@ -180,13 +466,13 @@ class ContactBookGUI:
         labels = ["Name:", "Phone:", "Email:", "Address:"]
         entries = {}
 
-        current_contact = self.contacts[original_index]
+        current_contact = self.contacts.get(contact_id)
 
         for i, label_text in enumerate(labels):
             tk.Label(update_window, text=label_text).grid(row=i, column=0, padx=5, pady=5, sticky=tk.W)
             entry = tk.Entry(update_window, width=40)
             entry.grid(row=i, column=1, padx=5, pady=5, sticky=tk.EW)
-            entry.insert(0, current_contact.get(label_text[:-1].lower(), ""))
+            entry.insert(0, getattr(current_contact, label_text[:-1].lower()))
             entries[label_text[:-1].lower()] = entry
 
         def save_updated_contact():
@@ -194,8 +480,10 @@ class ContactBookGUI:
             if not updated_contact["name"] or not updated_contact["phone"]:
                 messagebox.showerror("Error", "Name and Phone are required.")
                 return
-            self.contacts[original_index] = updated_contact
-            self.update_contact_list()
+            self.contacts.update(contact_id, updated_contact)
+            self.storage.put(contact_id, self.contacts.get(contact_id).to_dict())
+            self.autosave.changed()
+            self.contact_view.refresh_row(contact_id)
             self.show_contact_details(None) # Refresh details view
             update_window.destroy()
 
@@ -203,25 +491,25 @@ class ContactBookGUI:
 
     def delete_contact(self):
         """Deletes the selected contact after confirmation."""
-        selected_item = self.contact_list.selection()
+        if self.still_loading():
+            return
+        selected_item = self.contact_view.selection()
         if not selected_item:
             messagebox.showerror("Error", "Please select a contact to delete.")
             return
 
-        selected_name = self.contact_list.item(selected_item[0])['values'][0]
-        index_to_delete = -1
-        for i, contact in enumerate(self.contacts):
-            if contact.get("name") == selected_name:
-                index_to_delete = i
-                break
-
-        if index_to_delete == -1:
+        contact_id = selected_item[0]
+        contact = self.contacts.get(contact_id)
+        if contact is None:
             messagebox.showerror("Error", "Selected contact not found in data.")
             return
 
+        selected_name = contact.name
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete '{selected_name}'?"):
-            del self.contacts[index_to_delete]
-            self.update_contact_list()
+            self.contacts.delete(contact_id)
+            self.storage.delete(contact_id)
+            self.autosave.changed()
+            self.contact_view.remove(contact_id)
             # Clear details view after deletion
             for var in self.details_values.values():
                 var.set("")
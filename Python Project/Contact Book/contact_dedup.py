@@ -0,0 +1,245 @@
+"""
+Duplicate contact detection and merging.
+
+Comparing every contact with every other one is quadratic, so contacts are
+first grouped into blocks that share a normalized phone number, email or
+phonetic name key; only pairs inside a block are scored. Scoring (bigram
+similarity of names and addresses) runs in a process pool, and pairs scoring above the
+threshold are joined into groups of duplicates.
+"""
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations, islice
+
+from normalize import name_sound_key, normalize_name, normalize_phone
+
+MATCH_THRESHOLD = 0.8
+# Blocks bigger than this (a shared switchboard number, a very common name)
+# would add a quadratic number of pairs while rarely being duplicates; they are skipped.
+MAX_BLOCK_SIZE = 50
+PHONE_KEY_DIGITS = 10  # Compare the national part only, so "+1 555..." matches "555..."
+PAIR_CHUNK_SIZE = 5000
+CANCEL_CHECK_EVERY = 5000  # Contacts blocked between calls to check_cancelled()
+MIN_PAIRS_FOR_POOL = 20000
+
+# Field weights for the match score; fields empty on either side are left out.
+WEIGHTS = {"name": 0.4, "phone": 0.3, "email": 0.2, "address": 0.1}
+
+_contacts = {}  # id -> normalized field tuple, set in each worker by _init_worker()
+_bigrams = {}  # text -> its bigram set, filled in as pairs are scored
+
+
+class DuplicateGroup:
+    """Contacts that look like the same person, with the best pair score among them."""
+
+    def __init__(self, ids, score):
+        self.ids = ids
+        self.score = score
+
+    def __repr__(self):
+        return f"DuplicateGroup({self.ids!r}, score={self.score:.2f})"
+
+
+def _normalized(contact):
+    phone = normalize_phone(contact.phone).lstrip("+")
+    return (normalize_name(contact.name), phone[-PHONE_KEY_DIGITS:], contact.email.strip().casefold(),
+            normalize_name(contact.address))
+
+
+def _blocking_keys(fields, name):
+    _, phone, email, _ = fields
+    if len(phone) >= 7:
+        yield "p:" + phone
+    if email:
+        yield "e:" + email
+    sound_key = name_sound_key(name)
+    if sound_key:
+        yield "n:" + sound_key
+
+
+def candidate_blocks(contacts, check_cancelled=None):
+    """
+    Returns the blocks worth comparing (lists of ids sharing a key) and the
+    normalized fields of every contact. `contacts` is an iterable of (id, Contact) pairs.
+    `check_cancelled()` is called now and then and may raise to stop.
+    """
+    fields_by_id = {}
+    blocks = defaultdict(list)
+    for count, (contact_id, contact) in enumerate(contacts):
+        if check_cancelled is not None and count % CANCEL_CHECK_EVERY == 0:
+            check_cancelled()
+        fields = fields_by_id[contact_id] = _normalized(contact)
+        for key in _blocking_keys(fields, contact.name):
+            blocks[key].append(contact_id)
+    return [ids for ids in blocks.values() if 1 < len(ids) <= MAX_BLOCK_SIZE], fields_by_id
+
+
+def candidate_pairs(blocks):
+    """
+    Yields the (id, id) pairs within each block. A pair sharing several keys
+    is yielded once per block; scoring it twice is cheaper than keeping a set
+    of every pair.
+    """
+    for ids in blocks:
+        yield from combinations(ids, 2)
+
+
+def _bigram_set(text):
+    grams = _bigrams.get(text)
+    if grams is None:
+        padded = f" {text} "
+        grams = _bigrams[text] = frozenset(padded[i:i + 2] for i in range(len(padded) - 1))
+    return grams
+
+
+def similarity(a, b):
+    """
+    Returns the Dice coefficient of the character bigrams of `a` and `b`:
+    1.0 for equal strings, about 0.8 for a one-letter typo in a full name.
+    Set intersection runs in C, so this is far cheaper than an edit distance.
+    """
+    if a == b:
+        return 1.0
+    x = _bigram_set(a)
+    y = _bigram_set(b)
+    return 2 * len(x & y) / (len(x) + len(y))
+
+
+def score_pair(a, b, threshold=0.0):
+    """
+    Returns a 0..1 match score for two normalized field tuples.
+    The exact fields are compared first; if even perfect name and address
+    similarity could not lift the score to `threshold`, 0.0 is returned
+    without computing them. Most pairs from name blocks end there.
+    """
+    name_a, phone_a, email_a, address_a = a
+    name_b, phone_b, email_b, address_b = b
+    total = 0.0
+    weight = 0.0
+    if phone_a and phone_b:
+        total += WEIGHTS["phone"] * (phone_a == phone_b)
+        weight += WEIGHTS["phone"]
+    if email_a and email_b:
+        total += WEIGHTS["email"] * (email_a == email_b)
+        weight += WEIGHTS["email"]
+    compare_names = name_a and name_b
+    compare_addresses = address_a and address_b
+    fuzzy_weight = WEIGHTS["name"] * bool(compare_names) + WEIGHTS["address"] * bool(compare_addresses)
+    weight += fuzzy_weight
+    # Agreement on the name alone is not enough evidence.
+    if weight <= WEIGHTS["name"] or total + fuzzy_weight < threshold * weight:
+        return 0.0
+    if compare_names:
+        total += WEIGHTS["name"] * similarity(name_a, name_b)
+    if compare_addresses:
+        total += WEIGHTS["address"] * similarity(address_a, address_b)
+    return total / weight
+
+
+def _init_worker(contacts):
+    global _contacts
+    _contacts = contacts
+    _bigrams.clear()
+
+
+def _score_chunk(pairs, threshold):
+    return [(a, b, score) for a, b in pairs if (score := score_pair(_contacts[a], _contacts[b], threshold)) >= threshold]
+
+
+def _chunks(items, size):
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def find_duplicates(contacts, threshold=MATCH_THRESHOLD, workers=None, check_cancelled=None):
+    """
+    Returns DuplicateGroups for `contacts`, an iterable of (id, Contact)
+    pairs such as a ContactStore. Groups are ordered best score first; ids
+    within a group keep the input order. `check_cancelled()` (such as
+    TaskHandle.raise_if_cancelled) is called between chunks of work and may
+    raise to stop the scan.
+    """
+    check_cancelled = check_cancelled or (lambda: None)
+    blocks, fields_by_id = candidate_blocks(contacts, check_cancelled)
+    pair_count = sum(len(ids) * (len(ids) - 1) // 2 for ids in blocks)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    matches = []
+    if workers <= 1 or pair_count < MIN_PAIRS_FOR_POOL:
+        _init_worker(fields_by_id)
+        for chunk in _chunks(candidate_pairs(blocks), PAIR_CHUNK_SIZE):
+            check_cancelled()
+            matches.extend(_score_chunk(chunk, threshold))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(fields_by_id,)) as pool:
+            futures = []
+            try:
+                for chunk in _chunks(candidate_pairs(blocks), PAIR_CHUNK_SIZE):
+                    check_cancelled()
+                    futures.append(pool.submit(_score_chunk, chunk, threshold))
+                for future in futures:
+                    check_cancelled()
+                    matches.extend(future.result())
+            except BaseException:
+                for future in futures:
+                    future.cancel()  # Leaving the pool then waits only for the chunks already running
+                raise
+    return _group(matches, list(fields_by_id))
+
+
+def _group(matches, order):
+    """Joins matching pairs into groups with union-find."""
+    parent = {}
+
+    def root(node):
+        while parent.get(node, node) != node:
+            parent[node] = parent.get(parent[node], parent[node])  # Path halving
+            node = parent[node]
+        return node
+
+    best = {}
+    for a, b, score in matches:
+        ra, rb = root(a), root(b)
+        if ra != rb:
+            parent[rb] = ra
+            best[ra] = max(best.get(ra, 0.0), best.pop(rb, 0.0), score)
+        else:
+            best[ra] = max(best.get(ra, 0.0), score)
+
+    position = {contact_id: i for i, contact_id in enumerate(order)}
+    members = defaultdict(list)
+    for node in parent.keys() | best.keys():
+        members[root(node)].append(node)
+    groups = [DuplicateGroup(sorted(ids, key=position.__getitem__), best[group_root])
+              for group_root, ids in members.items()]
+    groups.sort(key=lambda group: (-group.score, position[group.ids[0]]))
+    return groups
+
+
+def merge_contacts(store, ids):
+    """
+    Merges the contacts `ids` in a ContactStore into the most complete one;
+    empty fields are filled from the others, which are deleted.
+    Returns (kept id, deleted ids).
+    """
+    contacts = [(contact_id, store.get(contact_id)) for contact_id in ids if contact_id in store]
+    if len(contacts) < 2:
+        return (contacts[0][0] if contacts else None), []
+    keep_id, keep = max(contacts, key=lambda item: sum(bool(value) for value in item[1].to_dict().values()))
+    merged = keep.to_dict()
+    deleted = []
+    for contact_id, contact in contacts:
+        if contact_id == keep_id:
+            continue
+        for field, value in contact.to_dict().items():
+            if not merged[field]:
+                merged[field] = value
+        store.delete(contact_id)
+        deleted.append(contact_id)
+    store.update(keep_id, merged)
+    return keep_id, deleted
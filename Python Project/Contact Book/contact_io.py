@@ -0,0 +1,346 @@
+"""
+Streaming CSV and vCard import/export for the contact book.
+
+Input is read and validated in chunks, so files of any size are handled
+with bounded memory. Validation and phone normalization run in a process
+pool; accepted contacts are handed on a chunk at a time for batch inserts.
+
+Headless use:
+    python contact_io.py import contacts.csv [--storage contacts.db] [--workers N] [--rejects rejects.csv]
+    python contact_io.py export contacts.vcf [--storage contacts.db]
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from normalize import normalize_phone
+
+FIELDS = ("name", "phone", "email", "address")
+CHUNK_SIZE = 5000
+MIN_PHONE_DIGITS = 7
+MAX_PHONE_DIGITS = 15  # E.164 limit
+MAX_FIELD_LENGTH = 500
+
+# CSV header spellings used by common CRM exports, mapped to contact fields.
+CSV_HEADER_ALIASES = {
+    "name": "name", "full name": "name", "fullname": "name", "display name": "name", "contact": "name",
+    "phone": "phone", "phone number": "phone", "telephone": "phone", "tel": "phone", "mobile": "phone",
+    "mobile phone": "phone", "cell": "phone",
+    "email": "email", "e-mail": "email", "email address": "email", "e-mail address": "email",
+    "address": "address", "street address": "address", "home address": "address",
+}
+
+
+class ImportReport:
+    """Counts and timing of one import run."""
+
+    def __init__(self):
+        self.read = 0
+        self.imported = 0
+        self.rejected = 0
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+
+    def rows_per_second(self):
+        return self.read / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (f"{self.imported} imported, {self.rejected} rejected of {self.read} rows "
+                f"in {self.seconds:.1f} s ({self.rows_per_second():,.0f} rows/s)")
+
+
+def file_format(path):
+    """Returns "vcard" for .vcf/.vcard files and "csv" otherwise."""
+    return "vcard" if os.path.splitext(path)[1].lower() in (".vcf", ".vcard") else "csv"
+
+
+# --- Readers: yield (row number, name, phone, email, address) tuples ---
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = [CSV_HEADER_ALIASES.get(column.strip().lower()) for column in header]
+        if "name" not in columns or "phone" not in columns:
+            raise ValueError("The CSV header needs a name and a phone column.")
+        positions = [columns.index(field) if field in columns else None for field in FIELDS]
+        for row in reader:
+            if not any(row):
+                continue  # Blank line
+            yield (reader.line_num, *(row[i] if i is not None and i < len(row) else "" for i in positions))
+
+
+def _vcard_value(line):
+    """Returns the unescaped value of a vCard content line."""
+    value = line.split(":", 1)[1]
+    return value.replace("\\n", " ").replace("\\N", " ").replace("\\,", ",").replace("\\;", ";").replace("\\\\", "\\")
+
+
+def read_vcard(path):
+    """Streams vCard 2.1/3.0/4.0 cards; the first FN (or N), TEL, EMAIL and ADR of each card are used."""
+    with open(path, encoding="utf-8-sig") as f:
+        card = None
+        start = 0
+        unfolded = None
+        for line_number, raw in enumerate(f, 1):
+            raw = raw.rstrip("\r\n")
+            if raw[:1] in (" ", "\t") and unfolded is not None:
+                unfolded += raw[1:]  # Folded continuation line
+                continue
+            if unfolded is not None and card is not None:
+                _vcard_property(card, unfolded)
+            unfolded = raw
+            upper = raw.upper()
+            if upper == "BEGIN:VCARD":
+                card = {}
+                start = line_number
+                unfolded = None
+            elif upper == "END:VCARD" and card is not None:
+                yield (start, card.get("FN", card.get("N", "")), card.get("TEL", ""),
+                       card.get("EMAIL", ""), card.get("ADR", ""))
+                card = None
+                unfolded = None
+
+
+def _vcard_property(card, line):
+    if ":" not in line:
+        return
+    name = line.split(":", 1)[0].split(";", 1)[0].upper()
+    if "." in name:
+        name = name.split(".", 1)[1]  # Grouped property, e.g. "item1.TEL"
+    if name in card or name not in ("FN", "N", "TEL", "EMAIL", "ADR"):
+        return
+    value = _vcard_value(line)
+    if name == "N":
+        # Family;Given;Additional;Prefix;Suffix
+        parts = value.split(";")
+        value = " ".join(part for part in parts[1:2] + parts[:1] if part)
+    elif name == "ADR":
+        value = ", ".join(part.strip() for part in value.split(";") if part.strip())
+    card[name] = value
+
+
+def read_contacts(path):
+    return read_vcard(path) if file_format(path) == "vcard" else read_csv(path)
+
+
+# --- Validation (runs in worker processes) ---
+
+def validate_chunk(rows):
+    """
+    Validates and normalizes a chunk of rows.
+    Returns (contacts, rejects): contact dicts, and (row number, reason) pairs.
+    """
+    contacts = []
+    rejects = []
+    for row_number, name, phone, email, address in rows:
+        name = " ".join(name.split())
+        email = email.strip()
+        address = " ".join(address.split())
+        phone = normalize_phone(phone)
+        digits = len(phone) - phone.startswith("+")
+        if not name:
+            rejects.append((row_number, "missing name"))
+        elif not MIN_PHONE_DIGITS <= digits <= MAX_PHONE_DIGITS:
+            rejects.append((row_number, f"invalid phone number {phone!r}" if phone else "missing phone number"))
+        elif email and ("@" not in email or " " in email):
+            rejects.append((row_number, f"invalid email {email!r}"))
+        elif max(len(name), len(email), len(address)) > MAX_FIELD_LENGTH:
+            rejects.append((row_number, "field too long"))
+        else:
+            contacts.append({"name": name, "phone": phone, "email": email, "address": address})
+    return contacts, rejects
+
+
+def validated_chunks(rows, workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Yields validate_chunk() results for `rows` in input order.
+    With more than one worker, chunks are validated in a process pool with
+    only a few chunks in flight, so the input is never read ahead in full.
+    """
+    rows = iter(rows)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield validate_chunk(chunk)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        while True:
+            while len(pending) < workers * 2:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+                pending.append(pool.submit(validate_chunk, chunk))
+            if not pending:
+                return
+            yield pending.pop(0).result()
+
+
+def import_contacts(path, insert_batch, next_id=None, workers=None, chunk_size=CHUNK_SIZE, on_reject=None, progress=None):
+    """
+    Streams the contacts in `path` (CSV or vCard) into storage.
+    Each chunk of accepted contacts is passed to `insert_batch`, numbered
+    from `next_id` if given. `on_reject(row number, reason)` and `progress(report)`
+    are called as the import runs. Returns an ImportReport.
+    Raises ValueError for a CSV without name and phone columns.
+    """
+    report = ImportReport()
+    for contacts, rejects in validated_chunks(read_contacts(path), workers, chunk_size):
+        if next_id is not None:
+            for contact in contacts:
+                contact["id"] = str(next_id)
+                next_id += 1
+        if contacts:
+            insert_batch(contacts)
+        report.read += len(contacts) + len(rejects)
+        report.imported += len(contacts)
+        report.rejected += len(rejects)
+        if on_reject is not None:
+            for row_number, reason in rejects:
+                on_reject(row_number, reason)
+        report.seconds = time.perf_counter() - report.started
+        if progress is not None:
+            progress(report)
+    report.seconds = time.perf_counter() - report.started
+    return report
+
+
+# --- Writers ---
+
+def _vcard_escape(value):
+    return value.replace("\\", "\\\\").replace(",", "\\,").replace(";", "\\;").replace("\n", "\\n")
+
+
+def write_csv(contacts, f):
+    writer = csv.writer(f)
+    writer.writerow(FIELDS)
+    for contact in contacts:
+        writer.writerow([contact.get(field) or "" for field in FIELDS])
+
+
+def write_vcard(contacts, f):
+    for contact in contacts:
+        lines = ["BEGIN:VCARD", "VERSION:3.0", f"FN:{_vcard_escape(contact.get('name') or '')}"]
+        if contact.get("phone"):
+            lines.append(f"TEL;TYPE=VOICE:{_vcard_escape(contact['phone'])}")
+        if contact.get("email"):
+            lines.append(f"EMAIL:{_vcard_escape(contact['email'])}")
+        if contact.get("address"):
+            lines.append(f"ADR:;;{_vcard_escape(contact['address'])};;;;")
+        lines.append("END:VCARD")
+        f.write("\r\n".join(lines) + "\r\n")
+
+
+def export_contacts(contacts, path):
+    """
+    Streams an iterable of contact dicts to `path` as CSV or vCard and returns the count.
+    The file is written under a temporary name and renamed, so a failed export never leaves half a file.
+    """
+    count = 0
+
+    def counted():
+        nonlocal count
+        for contact in contacts:
+            count += 1
+            yield contact
+
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", newline="", encoding="utf-8") as f:
+        (write_vcard if file_format(path) == "vcard" else write_csv)(counted(), f)
+    os.replace(temp_path, path)
+    return count
+
+
+# --- Headless entry point ---
+
+def open_storage(path):
+    """
+    Opens the contact book's SQLite database, or a journaled contacts.json.
+    Like the GUI, a new database first imports the contacts.json next to it.
+    """
+    import json
+    from contact_journal import ContactJournal
+    if path.endswith(".json"):
+        return ContactJournal(path)
+    from common.storage import open_sqlite
+
+    def legacy_contacts():
+        try:
+            return ContactJournal(os.path.splitext(path)[0] + ".json").load()
+        except json.JSONDecodeError:
+            print("Error decoding the old contacts file. It was not migrated.")
+            return []
+
+    return open_sqlite(path, "contacts", ("name", "phone"), legacy_contacts)
+
+
+def run_command(args, storage):
+    """Runs a parsed import or export on an open storage backend; returns the exit status."""
+    if args.command == "export":
+        count = export_contacts(storage.iter_records(), args.file)
+        print(f"Exported {count} contacts to {args.file}")
+        return 0
+
+    rejects_file = open(args.rejects, "w", newline="") if args.rejects else None
+    rejects_writer = csv.writer(rejects_file) if rejects_file else None
+    if rejects_writer:
+        rejects_writer.writerow(("row", "reason"))
+
+    def on_reject(row_number, reason):
+        if rejects_writer:
+            rejects_writer.writerow((row_number, reason))
+
+    def progress(report):
+        print(f"\r{report}", end="", flush=True)
+
+    try:
+        report = import_contacts(args.file, storage.put_many, storage.next_id(), args.workers,
+                                 on_reject=on_reject, progress=progress)
+        storage.save(storage.load)
+    except (OSError, ValueError, csv.Error) as e:
+        print(f"\nImport failed: {e}")
+        return 1
+    finally:
+        if rejects_file:
+            rejects_file.close()
+    print(f"\r{report}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import or export contact book contacts.")
+    parser.add_argument("command", choices=("import", "export"))
+    parser.add_argument("file", help="CSV file, or vCard file (.vcf)")
+    parser.add_argument("--storage", default="contacts.db", help="contact database (default: contacts.db)")
+    parser.add_argument("--workers", type=int, default=None, help="validation processes (default: CPU count)")
+    parser.add_argument("--rejects", help="write rejected rows to this CSV file")
+    args = parser.parse_args(argv)
+
+    storage = open_storage(args.storage)
+    try:
+        status = run_command(args, storage)
+    except BaseException:
+        storage.close()
+        raise
+    try:
+        storage.close()  # Waits for a journal compaction still being written
+    except OSError as e:
+        print(f"Error finishing {args.storage}: {e}")
+        return 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
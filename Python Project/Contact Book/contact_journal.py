@@ -0,0 +1,256 @@
+import json
+import os
+import threading
+
+from common.json_stream import JsonArrayStream
+from common.storage import StorageBackend
+
+COMPACT_MIN_RECORDS = 1000
+
+
+def _write_json_atomic(path, data):
+    """Writes `data` to a temp file, fsyncs it and renames it over `path`."""
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+class ContactJournal(StorageBackend):
+    """
+    Snapshot plus append-only change journal for contacts.
+    The snapshot keeps the existing contacts.json layout (a JSON list, now
+    with an "id" per contact). Each save appends one compact JSON line per
+    changed contact to "<snapshot>.journal" and fsyncs once, so a save costs
+    O(changes). Once the journal grows past a fraction of the book, it is
+    compacted into a new snapshot on a background thread; close() waits for
+    it and raises the error it failed with, if any.
+    """
+
+    def __init__(self, path="contacts.json"):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.rotated_path = path + ".journal.old"
+        self._pending = {}  # id -> contact dict, or None for a delete
+        self._snapshot_size = 0
+        self._journal_records = 0
+        self._legacy_snapshot = False
+        self._compaction = None
+        self._compaction_error = None
+
+    def iter_records(self, batch_size=1000):
+        """
+        Streams the contacts from the snapshot with the journal applied.
+        The journal (small by construction) is read up front; the snapshot is
+        parsed incrementally. Raises json.JSONDecodeError if the snapshot is corrupt.
+        """
+        changes = {}  # id -> contact, or None if deleted
+        self._journal_records = 0
+        for path in (self.rotated_path, self.journal_path):
+            self._journal_records += self._replay(path, changes)
+
+        self._snapshot_size = 0
+        self._legacy_snapshot = False
+        try:
+            for contact in JsonArrayStream(self.path):
+                self._snapshot_size += 1
+                if "id" not in contact:
+                    # Files written before contacts had IDs cannot be journaled against. Such
+                    # contacts are numbered by position, as with_ids() and the ContactStore do.
+                    self._legacy_snapshot = True
+                    contact["id"] = str(self._snapshot_size)
+                    yield contact
+                elif contact["id"] in changes:
+                    changed = changes.pop(contact["id"])
+                    if changed is not None:
+                        yield changed
+                else:
+                    yield contact
+        except FileNotFoundError:
+            pass
+        # Contacts added since the snapshot was written
+        for changed in changes.values():
+            if changed is not None:
+                yield changed
+
+    def count(self):
+        return len(self.load())
+
+    def page(self, offset, limit):
+        return self.load()[offset:offset + limit]
+
+    def put(self, contact_id, contact):
+        """Records an added or updated contact for the next save."""
+        self._pending[contact_id] = contact
+
+    def delete(self, contact_id):
+        """Records a deleted contact for the next save."""
+        self._pending[contact_id] = None
+
+    def has_changes(self):
+        return bool(self._pending)
+
+    def save(self, snapshot):
+        """
+        Persists all recorded changes with a single fsync.
+        `snapshot` is a callable returning the full contact list; it is only
+        called when the journal needs compacting.
+        """
+        self.begin_save(snapshot)()
+
+    def begin_save(self, snapshot):
+        """
+        Takes the recorded changes (and the contact list, if the snapshot must be
+        rewritten) and returns a function that writes them. Changes recorded
+        after this call wait for the next save; if the write fails, the
+        taken changes are recorded again so the next save retries them.
+        The taken changes are applied to the snapshot, so it is complete even
+        when `snapshot` returns the stored contacts without them.
+        """
+        if self._legacy_snapshot:
+            pending, self._pending = self._pending, {}
+            records = self._apply(snapshot(), pending)
+
+            def write_snapshot():
+                try:
+                    _write_json_atomic(self.path, records)
+                except BaseException:
+                    self._restore(pending)
+                    raise
+                self._legacy_snapshot = False
+                self._snapshot_size = len(records)
+            return write_snapshot
+
+        pending, self._pending = self._pending, {}
+        compact = self._journal_records + len(pending) > max(COMPACT_MIN_RECORDS, self._snapshot_size // 4)
+        records = self._apply(snapshot(), pending) if compact else None
+
+        def write_changes():
+            if pending:
+                try:
+                    self._append(pending)
+                except BaseException:
+                    self._restore(pending)
+                    raise
+                self._journal_records += len(pending)
+            if records is not None:
+                self.compact_in_background(records)
+        return write_changes
+
+    def _append(self, changes):
+        with open(self.journal_path, "a") as f:
+            for contact_id, contact in changes.items():
+                if contact is None:
+                    record = {"op": "delete", "id": contact_id}
+                else:
+                    record = {"op": "put", "id": contact_id, "contact": contact}
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _apply(records, changes):
+        """Returns `records` with `changes` (id -> contact, or None if deleted) applied; new contacts go last."""
+        if not changes:
+            return records
+        changes = dict(changes)
+        applied = []
+        for record in records:
+            if record.get("id") not in changes:
+                applied.append(record)
+                continue
+            changed = changes.pop(record["id"])
+            if changed is not None:
+                applied.append({"id": record["id"], **changed})
+        applied.extend({"id": contact_id, **contact} for contact_id, contact in changes.items() if contact is not None)
+        return applied
+
+    def _restore(self, changes):
+        """Records `changes` again, under any newer change to the same contact."""
+        for contact_id, contact in changes.items():
+            self._pending.setdefault(contact_id, contact)
+
+    def version(self):
+        versions = []
+        for path in (self.path, self.journal_path):
+            try:
+                stat = os.stat(path)
+                versions.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                versions.append(None)
+        return tuple(versions)
+
+    def compact_in_background(self, records):
+        """
+        Writes `records` as the new snapshot on a background thread.
+        The journal is rotated first, so saves made while the snapshot is being
+        written go to a fresh journal and are never lost.
+        """
+        if self._compaction is not None and self._compaction.is_alive():
+            return
+        self._rotate_journal()
+        self._journal_records = 0
+        self._snapshot_size = len(records)
+        # Not a daemon thread, so the interpreter waits for it rather than killing it mid-write.
+        self._compaction = threading.Thread(target=self._compact, args=(records,))
+        self._compaction.start()
+
+    def wait_for_compaction(self):
+        """Waits for a running compaction. Raises the OSError it failed with, if any."""
+        if self._compaction is not None:
+            self._compaction.join()
+            self._compaction = None
+        error, self._compaction_error = self._compaction_error, None
+        if error is not None:
+            raise error
+
+    def close(self):
+        self.wait_for_compaction()
+
+    def _compact(self, records):
+        try:
+            _write_json_atomic(self.path, records)
+            # Replaying the rotated journal onto the new snapshot is harmless, so a
+            # crash before this point loses nothing.
+            os.remove(self.rotated_path)
+        except OSError as e:
+            # The rotated journal is kept and replayed on the next load; the error is reported by close().
+            self._compaction_error = e
+
+    def _rotate_journal(self):
+        if not os.path.exists(self.journal_path):
+            open(self.journal_path, "a").close()
+        if os.path.exists(self.rotated_path):
+            # Left over from an interrupted compaction: keep its records ahead of the new ones.
+            with open(self.journal_path, "r") as src, open(self.rotated_path, "a") as dst:
+                dst.write(src.read())
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.remove(self.journal_path)
+        else:
+            os.replace(self.journal_path, self.rotated_path)
+
+    @staticmethod
+    def _replay(path, changes):
+        """Collects journal records from `path` into `changes`; returns how many were read."""
+        applied = 0
+        try:
+            with open(path, "rb+") as f:
+                good_end = 0
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # A torn final line from a crash mid-append
+                    record = json.loads(line)
+                    if record["op"] == "put":
+                        changes[record["id"]] = {"id": record["id"], **record["contact"]}
+                    else:
+                        changes[record["id"]] = None
+                    applied += 1
+                    good_end += len(line)
+                # Drop any torn tail so the next append starts on a fresh line.
+                f.truncate(good_end)
+        except FileNotFoundError:
+            pass
+        return applied
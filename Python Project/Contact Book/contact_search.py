@@ -0,0 +1,131 @@
+import heapq
+import re
+from collections import defaultdict
+from itertools import islice
+
+from normalize import normalize_name, normalize_phone
+
+# Fields in ranking order: a name match always beats a phone match, and so on.
+SEARCH_FIELDS = ("name", "phone", "email", "address")
+PHONE_QUERY = re.compile(r"^[\d\s().+-]*\d[\d\s().+-]*$")
+WORD_SEPARATORS = re.compile(r"[ @.-]+")
+
+# Broad queries ("a", "street") can match most of the book. Only this many
+# candidates per field are verified and ranked, which keeps every keystroke
+# cheap; the result list is capped far below this anyway.
+MAX_CANDIDATES_PER_FIELD = 1000
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _word_prefixes(text):
+    prefixes = set()
+    for word in WORD_SEPARATORS.split(text):
+        if word:
+            prefixes.add(word[:1])
+            prefixes.add(word[:2])
+    return prefixes
+
+
+def _field_texts(contact):
+    """Returns the normalized, searchable text of each field of a Contact, in SEARCH_FIELDS order."""
+    return (
+        normalize_name(contact.name),
+        normalize_phone(contact.phone).lstrip("+"),
+        contact.email.strip().casefold(),
+        normalize_name(contact.address),
+    )
+
+
+def normalize_query(query):
+    """Normalizes a query the same way field text is; phone-like queries keep only digits."""
+    if PHONE_QUERY.match(query):
+        return re.sub(r"\D", "", query)
+    return normalize_name(query)
+
+
+class ContactSearchIndex:
+    """
+    Per-field trigram inverted index over name, phone, email and address.
+    Queries of three or more characters intersect trigram posting sets and
+    then verify substring matches; shorter queries use a word-prefix index.
+    """
+
+    def __init__(self):
+        self._texts = {}  # id -> tuple of normalized field texts
+        self._grams = tuple(defaultdict(set) for _ in SEARCH_FIELDS)     # trigram -> ids, per field
+        self._prefixes = tuple(defaultdict(set) for _ in SEARCH_FIELDS)  # word prefix -> ids, per field
+
+    def __len__(self):
+        return len(self._texts)
+
+    def add(self, contact_id, contact):
+        texts = _field_texts(contact)
+        self._texts[contact_id] = texts
+        for text, grams, prefixes in zip(texts, self._grams, self._prefixes):
+            for gram in _trigrams(text):
+                grams[gram].add(contact_id)
+            for prefix in _word_prefixes(text):
+                prefixes[prefix].add(contact_id)
+
+    def remove(self, contact_id):
+        texts = self._texts.pop(contact_id, None)
+        if texts is None:
+            return
+        for text, grams, prefixes in zip(texts, self._grams, self._prefixes):
+            for index, keys in ((grams, _trigrams(text)), (prefixes, _word_prefixes(text))):
+                for key in keys:
+                    postings = index.get(key)
+                    if postings is not None:
+                        postings.discard(contact_id)
+                        if not postings:
+                            del index[key]
+
+    def search(self, query, limit=100):
+        """
+        Returns up to `limit` matching contact IDs, best match first.
+        Fields are searched in ranking order and lower-ranked fields are
+        skipped once `limit` results are found. Within a field, whole-field
+        prefixes rank above word prefixes, which rank above substrings.
+        """
+        query = normalize_query(query)
+        if not query:
+            return []
+
+        results = []
+        seen = set()
+        for field_rank in range(len(SEARCH_FIELDS)):
+            ranked = []
+            for contact_id in islice(self._candidates(field_rank, query), MAX_CANDIDATES_PER_FIELD):
+                if contact_id in seen:
+                    continue
+                text = self._texts[contact_id][field_rank]
+                position = text.find(query)
+                if position == 0:
+                    ranked.append((0, len(text), contact_id))
+                elif position > 0:
+                    word_start = text[position - 1] in " @.-"
+                    ranked.append((1 if word_start else 2, len(text), contact_id))
+            for _, _, contact_id in heapq.nsmallest(limit - len(results), ranked):
+                results.append(contact_id)
+                seen.add(contact_id)
+            if len(results) >= limit:
+                break
+        return results
+
+    def _candidates(self, field_rank, query):
+        if len(query) < 3:
+            return iter(self._prefixes[field_rank].get(query, ()))
+        grams = self._grams[field_rank]
+        postings = []
+        for gram in _trigrams(query):
+            ids = grams.get(gram)
+            if not ids:
+                return iter(())
+            postings.append(ids)
+        postings.sort(key=len)
+        smallest, rest = postings[0], postings[1:]
+        # Lazy intersection, so a broad query stops after the candidate cap.
+        return (contact_id for contact_id in smallest if all(contact_id in ids for ids in rest))
@@ -0,0 +1,105 @@
+from common.records import Contact
+from contact_search import ContactSearchIndex
+from normalize import normalize_name, normalize_phone
+
+
+class ContactStore:
+    """
+    In-memory contact store of Contact records.
+    Every contact gets a stable string ID and is indexed by ID, normalized
+    name and normalized phone, so lookups and mutations take constant time.
+    A ContactSearchIndex is kept in step with every add, update and delete.
+    """
+
+    def __init__(self, contacts=()):
+        """`contacts` is an iterable of contact dicts, each optionally carrying its "id"."""
+        self._records = {}   # id -> Contact, in insertion order
+        self._by_name = {}   # normalized name -> {id: None}
+        self._by_phone = {}  # normalized phone -> {id: None}
+        self._search_index = ContactSearchIndex()
+        self._next_id = 1
+        for contact in contacts:
+            self.add(contact, contact.get("id"))
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, contact_id):
+        return contact_id in self._records
+
+    def __iter__(self):
+        """Iterates over (id, contact) pairs in insertion order."""
+        return iter(self._records.items())
+
+    def ids(self):
+        return self._records.keys()
+
+    def get(self, contact_id):
+        """Returns the contact with the given ID, or None."""
+        return self._records.get(contact_id)
+
+    def add(self, contact, contact_id=None):
+        """Adds a Contact (or contact dict) and returns its ID."""
+        if contact_id is None or contact_id in self._records:
+            contact_id = self._new_id()
+        else:
+            contact_id = str(contact_id)
+            if contact_id.isdigit():
+                self._next_id = max(self._next_id, int(contact_id) + 1)
+        if isinstance(contact, dict):
+            contact = Contact.from_dict(contact)
+        self._records[contact_id] = contact
+        self._index(contact_id, contact)
+        return contact_id
+
+    def update(self, contact_id, contact):
+        """Replaces the contact with the given ID with a Contact (or contact dict). Raises KeyError if missing."""
+        old_contact = self._records[contact_id]
+        self._unindex(contact_id, old_contact)
+        if isinstance(contact, dict):
+            contact = Contact.from_dict(contact)
+        self._records[contact_id] = contact
+        self._index(contact_id, contact)
+
+    def delete(self, contact_id):
+        """Removes and returns the contact with the given ID. Raises KeyError if missing."""
+        contact = self._records.pop(contact_id)
+        self._unindex(contact_id, contact)
+        return contact
+
+    def find_by_name(self, name):
+        """Returns the IDs of all contacts with the given name."""
+        return list(self._by_name.get(normalize_name(name), ()))
+
+    def find_by_phone(self, phone):
+        """Returns the IDs of all contacts with the given phone number."""
+        return list(self._by_phone.get(normalize_phone(phone), ()))
+
+    def search(self, query, limit=100):
+        """Returns up to `limit` IDs of contacts matching `query`, best match first."""
+        return self._search_index.search(query, limit)
+
+    def to_list(self):
+        """Returns the contacts as a list of dicts, each carrying its ID."""
+        return [{"id": contact_id, **contact.to_dict()} for contact_id, contact in self._records.items()]
+
+    def _new_id(self):
+        contact_id = str(self._next_id)
+        self._next_id += 1
+        return contact_id
+
+    def _index(self, contact_id, contact):
+        # Dicts are used as ordered sets so duplicates keep their insertion order.
+        self._by_name.setdefault(normalize_name(contact.name), {})[contact_id] = None
+        self._by_phone.setdefault(normalize_phone(contact.phone), {})[contact_id] = None
+        self._search_index.add(contact_id, contact)
+
+    def _unindex(self, contact_id, contact):
+        self._search_index.remove(contact_id)
+        for index, key in ((self._by_name, normalize_name(contact.name)),
+                           (self._by_phone, normalize_phone(contact.phone))):
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(contact_id, None)
+                if not bucket:
+                    del index[key]
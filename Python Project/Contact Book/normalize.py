@@ -0,0 +1,54 @@
+import re
+from functools import lru_cache
+
+
+def normalize_name(name):
+    """Returns a case- and whitespace-insensitive key for a contact name."""
+    return " ".join(name.split()).casefold()
+
+
+def normalize_phone(phone):
+    """Returns the digits of a phone number, keeping a leading '+'."""
+    phone = phone.strip()
+    digits = re.sub(r"\D", "", phone)
+    return "+" + digits if phone.startswith("+") else digits
+
+
+# Letters to Soundex digits; "9" marks h and w, which do not separate letters with the same code.
+SOUNDEX_TABLE = str.maketrans("aeiouyhwbfpvcgjkqsxzdtlmnr", "00000099111122222222334556")
+NON_LETTERS = re.compile(r"[^a-z]+")
+NAME_SEPARATORS = re.compile(r"[\s,.]+")
+
+
+@lru_cache(maxsize=1 << 16)
+def soundex(word):
+    """Returns the American Soundex code of a word ("Robert" -> "R163"), or "" if it has no letters."""
+    letters = NON_LETTERS.sub("", word.casefold())
+    if not letters:
+        return ""
+    code = letters[0].upper()
+    digits = letters.translate(SOUNDEX_TABLE)
+    previous = digits[0]
+    for digit in digits[1:]:
+        if digit == "9":
+            continue
+        if digit != previous and digit != "0":
+            code += digit
+            if len(code) == 4:
+                return code
+        previous = digit
+    return (code + "000")[:4]
+
+
+def name_sound_key(name):
+    """Returns an order-insensitive phonetic key for a name: "Jon Smyth" and "smith, john" share one."""
+    words = []
+    for word in NAME_SEPARATORS.split(name):
+        if word.isdigit():
+            words.append(word)
+        elif word:
+            code = soundex(word)
+            if code:
+                words.append(code)
+    words.sort()
+    return " ".join(words)
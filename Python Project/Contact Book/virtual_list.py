@@ -0,0 +1,173 @@
+from bisect import bisect_left
+from tkinter import ttk
+
+DEFAULT_ROW_HEIGHT = 20
+HEADER_HEIGHT = 24
+
+
+class VirtualTreeview:
+    """
+    Windowed (virtual-scroll) view over a ttk.Treeview.
+    The full list of row IDs lives here; the Treeview only holds rows for the
+    visible range plus a small buffer, and each row's iid is its ID. Scrolling
+    and single-row changes are applied as diffs against the rows on screen.
+
+    Each ID also gets an increasing sequence number, kept in a list parallel
+    to the IDs. That list stays sorted through appends and removals, so an
+    ID's position is a bisect of its number, and a removal never renumbers
+    the rows after it.
+    """
+
+    def __init__(self, tree, scrollbar, row_values, on_select=None, buffer=5):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.row_values = row_values  # callable: id -> tuple of column values
+        self.on_select = on_select
+        self.buffer = buffer
+        self.ids = []
+        self._seq = {}  # id -> sequence number
+        self._seqs = []  # Sequence number of each entry of self.ids, ascending
+        self.first = 0
+        self.visible_rows = 1
+        self._selected = None
+
+        scrollbar.config(command=self._on_scrollbar)
+        tree.bind("<Configure>", self._on_configure)
+        tree.bind("<MouseWheel>", self._on_mousewheel)
+        tree.bind("<Button-4>", lambda event: self._on_mousewheel(event, -1))
+        tree.bind("<Button-5>", lambda event: self._on_mousewheel(event, 1))
+        tree.bind("<<TreeviewSelect>>", self._on_treeview_select)
+
+    # --- Data ---
+    def set_ids(self, ids):
+        """Replaces the whole row list and scrolls back to the top."""
+        self.ids = list(ids)
+        self._seqs = list(range(len(self.ids)))
+        self._seq = dict(zip(self.ids, self._seqs))
+        self.first = 0
+        if self._selected not in self._seq:
+            self._set_selected(None)
+        self.refresh()
+
+    def append(self, row_id):
+        self.extend((row_id,))
+
+    def extend(self, row_ids):
+        seq = self._seqs[-1] + 1 if self._seqs else 0
+        for row_id in row_ids:
+            self.ids.append(row_id)
+            self._seqs.append(seq)
+            self._seq[row_id] = seq
+            seq += 1
+        self.refresh()
+
+    def index(self, row_id):
+        """Returns the position of a row in the full list."""
+        return bisect_left(self._seqs, self._seq[row_id])
+
+    def remove(self, row_id):
+        seq = self._seq.pop(row_id, None)
+        if seq is None:
+            return
+        position = bisect_left(self._seqs, seq)
+        del self.ids[position]
+        del self._seqs[position]
+        if self._selected == row_id:
+            self._set_selected(None)
+        self.refresh()
+
+    def refresh_row(self, row_id):
+        """Re-renders a single row if it is on screen."""
+        if self.tree.exists(row_id):
+            self.tree.item(row_id, values=self.row_values(row_id))
+
+    def selection(self):
+        """Returns the selected ID as a tuple, like Treeview.selection(), even if scrolled off screen."""
+        return (self._selected,) if self._selected is not None else ()
+
+    def select(self, row_id):
+        """Selects a row, scrolling it into view."""
+        if row_id in self._seq:
+            self.see(row_id)
+            self._set_selected(row_id)
+            self.tree.selection_set(row_id)
+
+    # --- Scrolling ---
+    def see(self, row_id):
+        position = self.index(row_id)
+        if position < self.first:
+            self.scroll_to(position)
+        elif position >= self.first + self.visible_rows:
+            self.scroll_to(position - self.visible_rows + 1)
+
+    def scroll(self, rows):
+        self.scroll_to(self.first + rows)
+
+    def scroll_to(self, first):
+        first = max(0, min(first, len(self.ids) - self.visible_rows))
+        if first != self.first:
+            self.first = first
+            self.refresh()
+
+    def refresh(self):
+        """Brings the Treeview rows in line with the current window."""
+        self.first = max(0, min(self.first, len(self.ids) - self.visible_rows))
+        window = self.ids[self.first:self.first + self.visible_rows + self.buffer]
+        current = self.tree.get_children()
+        if list(current) != window:
+            wanted = set(window)
+            stale = [row_id for row_id in current if row_id not in wanted]
+            if stale:
+                self.tree.delete(*stale)
+            for position, row_id in enumerate(window):
+                if self.tree.exists(row_id):
+                    if self.tree.index(row_id) != position:
+                        self.tree.move(row_id, "", position)
+                else:
+                    self.tree.insert("", position, iid=row_id, values=self.row_values(row_id))
+            if self._selected is not None and self._selected in wanted:
+                self.tree.selection_set(self._selected)
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        total = len(self.ids)
+        if total == 0:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + self.visible_rows) / total))
+
+    # --- Event handlers ---
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(round(float(amount) * len(self.ids)))
+        elif action == "scroll":
+            step = self.visible_rows if unit == "pages" else 1
+            self.scroll(int(amount) * step)
+
+    def _on_mousewheel(self, event, direction=None):
+        if direction is None:
+            direction = -1 if event.delta > 0 else 1
+        self.scroll(direction * 3)
+        return "break"  # Keep the Treeview from scrolling its own (windowed) rows
+
+    def _on_configure(self, event):
+        row_height = ttk.Style().lookup("Treeview", "rowheight") or DEFAULT_ROW_HEIGHT
+        visible_rows = max(1, (event.height - HEADER_HEIGHT) // int(row_height))
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.refresh()
+
+    def _on_treeview_select(self, event):
+        selection = self.tree.selection()
+        if selection:
+            self._set_selected(selection[0])
+        elif self._selected is not None and self.tree.exists(self._selected):
+            # The user cleared a visible selection; rows that merely scrolled
+            # out of the window keep theirs.
+            self._set_selected(None)
+
+    def _set_selected(self, row_id):
+        if row_id != self._selected:
+            self._selected = row_id
+            if self.on_select is not None:
+                self.on_select(row_id)
@@ -1,13 +1,19 @@
 import tkinter as tk
-from tkinter import messagebox
-import random
-import string
+from collections import OrderedDict
+from tkinter import filedialog, messagebox
+
+from breach_check import BreachChecker, default_corpus
+from passphrase import PassphraseGenerator, Wordlist, default_wordlist
+from password_engine import PasswordEngine
+from password_policy import PasswordPolicy, PolicyError
+
+POLICY_CACHE_SIZE = 8  # Recently used policies kept, as building one with rules counts every compliant password
 
 class PasswordGeneratorGUI:
     def __init__(self, master):
         self.master = master
         master.title("Password Generator")
-        master.geometry("350x200")
+        master.geometry("460x600")
         master.resizable(False, False)
 
         self.length_label = tk.Label(master, text="Password Length:")
@@ -17,28 +23,232 @@ class PasswordGeneratorGUI:
         self.length_entry.grid(row=0, column=1, padx=10, pady=10, sticky="ew")
         self.length_entry.insert(0, "12")  # Default length
 
+        # --- Policy ---
+        self.class_vars = {name: tk.BooleanVar(value=True) for name in ("lower", "upper", "digits", "symbols")}
+        self.class_frame = tk.Frame(master)
+        self.class_frame.grid(row=1, column=0, columnspan=2, padx=10, sticky="w")
+        for name, text in (("lower", "a-z"), ("upper", "A-Z"), ("digits", "0-9"), ("symbols", "Symbols")):
+            tk.Checkbutton(self.class_frame, text=text, variable=self.class_vars[name]).pack(side=tk.LEFT)
+
+        self.require_all = tk.BooleanVar(value=False)
+        self.exclude_ambiguous = tk.BooleanVar(value=False)
+        self.no_repeats = tk.BooleanVar(value=False)
+        self.rule_frame = tk.Frame(master)
+        self.rule_frame.grid(row=2, column=0, columnspan=2, padx=10, sticky="w")
+        tk.Checkbutton(self.rule_frame, text="Use every type", variable=self.require_all).pack(side=tk.LEFT)
+        tk.Checkbutton(self.rule_frame, text="No look-alikes", variable=self.exclude_ambiguous).pack(side=tk.LEFT)
+        tk.Checkbutton(self.rule_frame, text="No repeats", variable=self.no_repeats).pack(side=tk.LEFT)
+
         self.generate_button = tk.Button(master, text="Generate Password", command=self.generate_password)
-        self.generate_button.grid(row=1, column=0, columnspan=2, padx=10, pady=10)
+        self.generate_button.grid(row=3, column=0, columnspan=2, padx=10, pady=10)
 
         self.password_label = tk.Label(master, text="Generated Password:")
-        self.password_label.grid(row=2, column=0, padx=10, pady=10, sticky="w")
+        self.password_label.grid(row=4, column=0, padx=10, pady=10, sticky="w")
 
         self.password_display = tk.Label(master, text="", width=30, relief="sunken", borderwidth=2, anchor="w")
-        self.password_display.grid(row=2, column=1, padx=10, pady=10, sticky="ew")
+        self.password_display.grid(row=4, column=1, padx=10, pady=10, sticky="ew")
 
-    def generate_password(self):
+        self.entropy_label = tk.Label(master, text="", anchor="w")
+        self.entropy_label.grid(row=5, column=0, columnspan=2, padx=10, sticky="w")
+
+        self.count_label = tk.Label(master, text="Number of Passwords:")
+        self.count_label.grid(row=6, column=0, padx=10, pady=10, sticky="w")
+
+        self.count_entry = tk.Entry(master, width=10)
+        self.count_entry.grid(row=6, column=1, padx=10, pady=10, sticky="ew")
+        self.count_entry.insert(0, "1000")
+
+        self.save_button = tk.Button(master, text="Generate to File...", command=self.save_passwords)
+        self.save_button.grid(row=7, column=0, columnspan=2, padx=10, pady=5)
+
+        self.policies = OrderedDict()  # Settings -> PasswordPolicy, least recently used first
+
+        # --- Passphrase mode ---
+        self.passphrase_frame = tk.LabelFrame(master, text="Passphrase")
+        self.passphrase_frame.grid(row=8, column=0, columnspan=2, padx=10, pady=10, sticky="ew")
+
+        tk.Label(self.passphrase_frame, text="Words:").grid(row=0, column=0, padx=5, pady=2, sticky="w")
+        self.words_entry = tk.Entry(self.passphrase_frame, width=5)
+        self.words_entry.grid(row=0, column=1, padx=5, pady=2, sticky="w")
+        self.words_entry.insert(0, "6")
+
+        tk.Label(self.passphrase_frame, text="Separator:").grid(row=0, column=2, padx=5, pady=2, sticky="w")
+        self.separator_entry = tk.Entry(self.passphrase_frame, width=5)
+        self.separator_entry.grid(row=0, column=3, padx=5, pady=2, sticky="w")
+        self.separator_entry.insert(0, "-")
+
+        tk.Label(self.passphrase_frame, text="Digits:").grid(row=1, column=0, padx=5, pady=2, sticky="w")
+        self.digits_entry = tk.Entry(self.passphrase_frame, width=5)
+        self.digits_entry.grid(row=1, column=1, padx=5, pady=2, sticky="w")
+        self.digits_entry.insert(0, "0")
+
+        self.capitalize = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.passphrase_frame, text="Capitalize", variable=self.capitalize).grid(row=1, column=2, columnspan=2, sticky="w")
+
+        tk.Button(self.passphrase_frame, text="Wordlist...", command=self.choose_wordlist).grid(row=2, column=0, columnspan=2, padx=5, pady=5)
+        tk.Button(self.passphrase_frame, text="Generate Passphrase", command=self.generate_passphrase).grid(row=2, column=2, columnspan=2, padx=5, pady=5)
+
+        self.wordlist = None  # Opened on first use; mapping it is cheap thanks to its offset index
+        self.wordlist_path = default_wordlist()
+
+        # --- Breach check ---
+        self.breach_frame = tk.LabelFrame(master, text="Breach Check")
+        self.breach_frame.grid(row=9, column=0, columnspan=2, padx=10, pady=5, sticky="ew")
+
+        self.check_entry = tk.Entry(self.breach_frame, width=30, show="*")
+        self.check_entry.grid(row=0, column=0, columnspan=2, padx=5, pady=2, sticky="w")
+        self.check_entry.bind("<Return>", lambda event: self.check_password())
+        tk.Button(self.breach_frame, text="Check", command=self.check_password).grid(row=0, column=2, padx=5, pady=2)
+        tk.Button(self.breach_frame, text="Corpus...", command=self.choose_corpus).grid(row=0, column=3, padx=5, pady=2)
+
+        self.breach_label = tk.Label(self.breach_frame, text="", anchor="w")
+        self.breach_label.grid(row=1, column=0, columnspan=4, padx=5, sticky="w")
+
+        self.breach_checker = None  # Opened on first use; only the pages a lookup touches are read
+        self.corpus_path = default_corpus()
+
+    def read_length(self):
+        """Returns the entered password length, or None after showing an error."""
         try:
             length = int(self.length_entry.get())
-            if length <= 0:
-                messagebox.showerror("Error", "Password length must be a positive integer.")
-                return
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a valid integer for the password length.")
+            return None
+        if length <= 0:
+            messagebox.showerror("Error", "Password length must be a positive integer.")
+            return None
+        return length
+
+    def read_policy(self):
+        """Returns the PasswordPolicy for the current settings, or None after showing an error."""
+        length = self.read_length()
+        if length is None:
+            return None
+        settings = (length, *(var.get() for var in self.class_vars.values()),
+                    self.require_all.get(), self.exclude_ambiguous.get(), self.no_repeats.get())
+        policy = self.policies.get(settings)
+        if policy is not None:
+            self.policies.move_to_end(settings)
+        else:
+            try:
+                policy = PasswordPolicy.simple(length, **{name: var.get() for name, var in self.class_vars.items()},
+                                               require_all=self.require_all.get(),
+                                               exclude_ambiguous=self.exclude_ambiguous.get(),
+                                               no_repeats=self.no_repeats.get())
+            except PolicyError as e:
+                messagebox.showerror("Error", str(e))
+                return None
+            self.policies[settings] = policy
+            if len(self.policies) > POLICY_CACHE_SIZE:
+                self.policies.popitem(last=False)
+        return policy
 
-            characters = string.ascii_letters + string.digits + string.punctuation
-            password = ''.join(random.choice(characters) for _ in range(length))
+    def generate_password(self):
+        policy = self.read_policy()
+        if policy is not None:
+            if policy.unconstrained:
+                password = PasswordEngine(policy.alphabet).generate(policy.length)
+            else:
+                password = policy.generate()
             self.password_display.config(text=password)
+            self.entropy_label.config(text=f"Entropy: {policy.entropy_bits():.1f} bits")
+            self.show_breach_status(password)
 
+    def save_passwords(self):
+        """Writes the requested number of passwords to a file, one per line."""
+        policy = self.read_policy()
+        if policy is None:
+            return
+        try:
+            count = int(self.count_entry.get())
+            if count <= 0:
+                raise ValueError
         except ValueError:
-            messagebox.showerror("Error", "Please enter a valid integer for the password length.")
+            messagebox.showerror("Error", "Number of passwords must be a positive integer.")
+            return
+        path = filedialog.asksaveasfilename(title="Save passwords", defaultextension=".txt",
+                                            filetypes=[("Text files", "*.txt")])
+        if not path:
+            return
+        try:
+            with open(path, "wb") as out:
+                if policy.unconstrained:
+                    # No composition rules: the bulk engine draws straight from the alphabet.
+                    PasswordEngine(policy.alphabet).write(out, count, policy.length)
+                else:
+                    for _ in range(count):
+                        out.write(policy.generate().encode("latin-1") + b"\n")
+            messagebox.showinfo("Success", f"{count} passwords saved.")
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not save the passwords: {e}")
+
+    def choose_wordlist(self):
+        path = filedialog.askopenfilename(title="Choose a wordlist", filetypes=[("Text files", "*.txt"), ("All files", "*")])
+        if path:
+            self.wordlist_path = path
+            self.wordlist = None
+
+    def generate_passphrase(self):
+        """Shows a passphrase drawn from the wordlist with the chosen settings."""
+        if self.wordlist is None:
+            if self.wordlist_path is None:
+                messagebox.showerror("Error", "No wordlist found. Please choose one.")
+                return
+            try:
+                self.wordlist = Wordlist(self.wordlist_path)
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Error", f"Could not open the wordlist: {e}")
+                return
+        try:
+            words = int(self.words_entry.get())
+            digits = int(self.digits_entry.get())
+            generator = PassphraseGenerator(self.wordlist, words, self.separator_entry.get(), self.capitalize.get(), digits)
+        except ValueError:
+            messagebox.showerror("Error", "Words must be a positive integer and digits a non-negative integer.")
+            return
+        passphrase = generator.generate()
+        self.password_display.config(text=passphrase)
+        self.entropy_label.config(text=f"Entropy: {generator.entropy_bits():.1f} bits")
+        self.show_breach_status(passphrase)
+
+    def choose_corpus(self):
+        path = filedialog.askopenfilename(title="Choose a breach corpus (built with breach_check.py)",
+                                          filetypes=[("Corpus files", "*.bin"), ("All files", "*")])
+        if path:
+            self.corpus_path = path
+            self.breach_checker = None
+            self.breach_label.config(text="")
+
+    def open_breach_checker(self, quiet):
+        """Returns the BreachChecker for the chosen corpus, or None (showing an error unless `quiet`)."""
+        if self.breach_checker is None and self.corpus_path is not None:
+            try:
+                self.breach_checker = BreachChecker(self.corpus_path)
+            except (OSError, ValueError) as e:
+                self.corpus_path = None
+                if not quiet:
+                    messagebox.showerror("Error", f"Could not open the breach corpus: {e}")
+                return None
+        if self.breach_checker is None and not quiet:
+            messagebox.showerror("Error", "No breach corpus found. Please choose one.")
+        return self.breach_checker
+
+    def show_breach_status(self, password, quiet=True):
+        """Shows whether `password` is in the breach corpus; without a corpus, shows nothing."""
+        checker = self.open_breach_checker(quiet)
+        if checker is None:
+            self.breach_label.config(text="")
+        elif checker.is_breached(password):
+            self.breach_label.config(text="Found in the breach corpus - do not use it!", fg="red")
+        else:
+            self.breach_label.config(text=f"Not among {len(checker):,} breached passwords.", fg="dark green")
+
+    def check_password(self):
+        password = self.check_entry.get()
+        if not password:
+            messagebox.showerror("Error", "Please enter a password to check.")
+            return
+        self.show_breach_status(password, quiet=False)
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,241 @@
+"""
+Offline check of passwords against a corpus of breached-password SHA-1 hashes.
+
+The corpus is converted once from the usual dump format (one "SHA1HEX" or
+"SHA1HEX:COUNT" line per password, like the Have I Been Pwned downloads)
+into a compact binary file: the raw 20-byte digests in sorted order, after
+a header holding, for each 2-byte digest prefix, where its digests start.
+Checking a password memory-maps that file and binary-searches only the
+digests sharing its prefix, so each check touches a few pages, whatever
+the corpus size, and needs almost no RAM.
+
+Command line:
+    python breach_check.py build pwned-passwords-sha1.txt breached.bin
+    python breach_check.py check breached.bin < passwords.txt   (prints "LEAKED" or "ok" per line)
+"""
+import argparse
+import hashlib
+import heapq
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+MAGIC = b"SHA1SRT1"
+DIGEST_SIZE = 20
+PREFIXES = 1 << 16
+HEADER = struct.Struct("=8sQ")  # magic, digest count
+TABLE_OFFSET = HEADER.size
+DATA_OFFSET = TABLE_OFFSET + 8 * (PREFIXES + 1)
+SORT_RUN_SIZE = 5_000_000  # Digests sorted in memory at a time (100 MB) when the dump is not sorted
+# Tried in order when no corpus is given.
+CORPUS_CANDIDATES = (
+    os.environ.get("BREACH_CORPUS", ""),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "breached.bin"),
+)
+
+
+def default_corpus():
+    """Returns the first existing corpus of CORPUS_CANDIDATES, or None."""
+    for path in CORPUS_CANDIDATES:
+        if path and os.path.isfile(path):
+            return path
+    return None
+
+
+def sha1_digest(password):
+    return hashlib.sha1(password.encode("utf-8")).digest()
+
+
+# --- Building ---
+
+def _read_digests(lines):
+    """Yields the 20-byte digests of hash dump lines, skipping blank lines. Raises ValueError on bad ones."""
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            digest = bytes.fromhex(line.split(b":", 1)[0].decode("ascii"))
+        except (ValueError, UnicodeDecodeError):
+            digest = b""
+        if len(digest) != DIGEST_SIZE:
+            raise ValueError(f"Line {line_number} is not a SHA-1 hash: {line[:60]!r}")
+        yield digest
+
+
+def _sorted_runs(digests, run_size):
+    """
+    Returns an iterator over all digests in sorted order. Input that is
+    already sorted (like the official dumps) streams straight through;
+    otherwise runs of `run_size` digests are sorted into temporary files and merged.
+    """
+    runs = []
+    run = []
+    in_order = True
+    previous = b""
+    for digest in digests:
+        if digest < previous:
+            in_order = False
+        previous = digest
+        run.append(digest)
+        if len(run) >= run_size:
+            runs.append(_spill(run))
+            run = []
+    if in_order and not runs:
+        return iter(run)
+    if in_order:
+        # Sorted overall: the spilled runs are consecutive.
+        runs.append(run)
+        return (digest for part in runs for digest in (_read_run(part) if isinstance(part, str) else part))
+    run.sort()
+    return heapq.merge(*(_read_run(path) for path in runs), run)
+
+
+def _spill(run):
+    run.sort()
+    with tempfile.NamedTemporaryFile("wb", suffix=".run", delete=False) as f:
+        f.write(b"".join(run))
+        return f.name
+
+
+def _read_run(path):
+    try:
+        with open(path, "rb") as f:
+            while True:
+                block = f.read(DIGEST_SIZE * 4096)
+                if not block:
+                    return
+                for offset in range(0, len(block), DIGEST_SIZE):
+                    yield block[offset:offset + DIGEST_SIZE]
+    finally:
+        os.remove(path)
+
+
+def build_corpus(dump_path, corpus_path, run_size=SORT_RUN_SIZE):
+    """
+    Converts a hash dump into the sorted binary corpus and returns the number
+    of distinct digests. Raises ValueError on malformed lines.
+    """
+    table = array("Q", [0]) * (PREFIXES + 1)  # Digest number where each prefix starts
+    count = 0
+    temp_path = corpus_path + ".tmp"
+    with open(dump_path, "rb") as dump, open(temp_path, "wb") as out:
+        out.write(b"\0" * DATA_OFFSET)  # Header and table are filled in at the end
+        previous = None
+        buffer = []
+        for digest in _sorted_runs(_read_digests(dump), run_size):
+            if digest == previous:
+                continue
+            previous = digest
+            table[(digest[0] << 8 | digest[1]) + 1] += 1
+            buffer.append(digest)
+            count += 1
+            if len(buffer) >= 65536:
+                out.write(b"".join(buffer))
+                buffer = []
+        out.write(b"".join(buffer))
+        for prefix in range(1, PREFIXES + 1):
+            table[prefix] += table[prefix - 1]
+        out.seek(0)
+        out.write(HEADER.pack(MAGIC, count))
+        out.write(table.tobytes())
+    os.replace(temp_path, corpus_path)
+    return count
+
+
+# --- Checking ---
+
+class BreachChecker:
+    """Looks up passwords in a corpus file written by build_corpus(). Raises ValueError for other files."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._data) < DATA_OFFSET:
+            raise ValueError(f"{path} is not a breach corpus.")
+        magic, self.count = HEADER.unpack_from(self._data)
+        if magic != MAGIC or len(self._data) != DATA_OFFSET + DIGEST_SIZE * self.count:
+            raise ValueError(f"{path} is not a breach corpus.")
+        self._table = memoryview(self._data)[TABLE_OFFSET:DATA_OFFSET].cast("Q")
+
+    def __len__(self):
+        return self.count
+
+    def contains_digest(self, digest):
+        """Returns True if the 20-byte SHA-1 `digest` is in the corpus."""
+        prefix = digest[0] << 8 | digest[1]
+        low = self._table[prefix]
+        high = self._table[prefix + 1]
+        data = self._data
+        while low < high:
+            middle = (low + high) // 2
+            offset = DATA_OFFSET + middle * DIGEST_SIZE
+            found = data[offset:offset + DIGEST_SIZE]
+            if found < digest:
+                low = middle + 1
+            elif found > digest:
+                high = middle
+            else:
+                return True
+        return False
+
+    def is_breached(self, password):
+        """Returns True if `password` appears in the corpus."""
+        return self.contains_digest(sha1_digest(password))
+
+    def check_lines(self, lines, hashed=False):
+        """
+        Yields (line, breached) for each line of an iterable of text lines, without
+        their line endings. With `hashed`, lines are SHA-1 hex digests instead of passwords.
+        """
+        for line in lines:
+            line = line.rstrip("\r\n")
+            if hashed:
+                try:
+                    digest = bytes.fromhex(line.strip().split(":", 1)[0])
+                except ValueError:
+                    digest = b""
+                yield line, len(digest) == DIGEST_SIZE and self.contains_digest(digest)
+            else:
+                yield line, self.is_breached(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check passwords against a local breached-password corpus.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="convert a SHA-1 hash dump into a corpus file")
+    build.add_argument("dump", help="text file with one SHA1HEX[:COUNT] per line")
+    build.add_argument("corpus", help="corpus file to write")
+    check = commands.add_parser("check", help="check passwords read from stdin, one per line")
+    check.add_argument("corpus", nargs="?", default=None, help="corpus file (default: BREACH_CORPUS or breached.bin)")
+    check.add_argument("--sha1", action="store_true", help="stdin holds SHA-1 hex digests instead of passwords")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        try:
+            count = build_corpus(args.dump, args.corpus)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        print(f"Wrote {count} hashes to {args.corpus}")
+        return 0
+
+    path = args.corpus or default_corpus()
+    if path is None:
+        parser.error("no corpus found; pass one or set BREACH_CORPUS")
+    try:
+        checker = BreachChecker(path)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    leaked = 0
+    for line, breached in checker.check_lines(sys.stdin, hashed=args.sha1):
+        leaked += breached
+        sys.stdout.write(f"{'LEAKED' if breached else 'ok'}\t{line}\n")
+    return 1 if leaked else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""
+Diceware-style passphrases drawn from a memory-mapped wordlist.
+
+The wordlist is a text file with one word per line (diceware lists with a
+"11111<tab>word" layout work too). It is memory-mapped, never read into
+memory as a whole. The first time a list is used, the start offsets of its
+words are saved next to it in "<wordlist>.idx". After that, opening a list
+maps that index as well, so startup does not depend on the list's size.
+
+Command line:
+    python passphrase.py -n 10 [-w 6] [--separator -] [--capitalize] [--digits 2] [--wordlist words.txt]
+"""
+import argparse
+import math
+import mmap
+import os
+import secrets
+import struct
+import sys
+from array import array
+
+INDEX_MAGIC = b"WLIDX1\0\0"
+INDEX_HEADER = struct.Struct("=8sQQQ")  # magic, wordlist size, wordlist mtime (ns), word count
+# Tried in order when no wordlist is given.
+WORDLIST_CANDIDATES = (
+    os.environ.get("PASSPHRASE_WORDLIST", ""),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "wordlist.txt"),
+    "/usr/share/dict/words",
+)
+
+
+def default_wordlist():
+    """Returns the first existing wordlist of WORDLIST_CANDIDATES, or None."""
+    for path in WORDLIST_CANDIDATES:
+        if path and os.path.isfile(path):
+            return path
+    return None
+
+
+class Wordlist:
+    """
+    Random access to the words of a wordlist file through mmap and an offset index.
+    Raises OSError if the file cannot be read and ValueError if it holds no words.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            if not stat.st_size:
+                raise ValueError(f"{path} is empty.")
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._index_map = None
+        self.offsets = self._open_index(stat)
+        if not len(self.offsets):
+            raise ValueError(f"{path} holds no words.")
+        # Diceware lists ("11111<tab>word") are recognized by their first line.
+        first = self._line(0)
+        self._numbered = first.split(None, 1)[0].isdigit() and len(first.split(None, 1)) == 2
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, number):
+        line = self._line(number)
+        if self._numbered:
+            line = line.split(None, 1)[-1]
+        return line.decode("utf-8", errors="replace")
+
+    def _line(self, number):
+        start = self.offsets[number]
+        end = self._data.find(b"\n", start)
+        return self._data[start:end if end != -1 else len(self._data)].strip()
+
+    def _open_index(self, stat):
+        """Maps the saved offset index if it matches the wordlist, otherwise builds and saves it."""
+        index_path = self.path + ".idx"
+        expected = (INDEX_MAGIC, stat.st_size, stat.st_mtime_ns)
+        try:
+            with open(index_path, "rb") as f:
+                index_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, size, mtime, count = INDEX_HEADER.unpack_from(index_map)
+            if (magic, size, mtime) == expected and len(index_map) == INDEX_HEADER.size + 8 * count:
+                self._index_map = index_map
+                return memoryview(index_map)[INDEX_HEADER.size:].cast("Q")
+            index_map.close()
+        except (OSError, ValueError, struct.error):
+            pass  # Missing, stale or damaged: rebuild it
+
+        offsets = self._build_index()
+        temp_path = index_path + ".tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(INDEX_HEADER.pack(*expected, len(offsets)))
+                offsets.tofile(f)
+            os.replace(temp_path, index_path)
+        except OSError:
+            pass  # A read-only location: keep the index in memory only
+        return offsets
+
+    def _build_index(self):
+        """Returns the start offset of every non-blank line."""
+        data = self._data
+        offsets = array("Q")
+        start = 0
+        size = len(data)
+        while start < size:
+            end = data.find(b"\n", start)
+            if end == -1:
+                end = size
+            if data[start:end].strip():
+                offsets.append(start)
+            start = end + 1
+        return offsets
+
+
+def random_below(limit, count):
+    """
+    Returns `count` uniformly random integers in [0, limit) from the OS CSPRNG.
+    32-bit values are drawn in one os.urandom call and those at or above the
+    largest multiple of `limit` are rejected, so the modulo is unbiased.
+    """
+    if limit > 1 << 32:
+        return [secrets.randbelow(limit) for _ in range(count)]
+    accept_below = (1 << 32) - (1 << 32) % limit
+    numbers = []
+    while len(numbers) < count:
+        values = array("I")
+        values.frombytes(os.urandom(4 * (count - len(numbers) + 16)))
+        numbers.extend(value % limit for value in values if value < accept_below)
+    del numbers[count:]
+    return numbers
+
+
+class PassphraseGenerator:
+    """
+    Passphrases of `words` random words joined by `separator`, optionally
+    capitalized, with a random `digits`-digit number inserted at a random position.
+    """
+
+    def __init__(self, wordlist, words=6, separator="-", capitalize=False, digits=0):
+        if words <= 0:
+            raise ValueError("A passphrase needs at least one word.")
+        if digits < 0:
+            raise ValueError("The number of digits cannot be negative.")
+        self.wordlist = wordlist
+        self.words = words
+        self.separator = separator
+        self.capitalize = capitalize
+        self.digits = digits
+
+    def entropy_bits(self):
+        """Returns the entropy of a passphrase in bits, assuming the wordlist holds distinct words."""
+        bits = self.words * math.log2(len(self.wordlist))
+        if self.digits:
+            bits += self.digits * math.log2(10) + math.log2(self.words + 1)
+        return bits
+
+    def generate(self):
+        return self.generate_many(1)[0]
+
+    def generate_many(self, count):
+        """Returns `count` passphrases; the random word numbers for all of them are drawn at once."""
+        wordlist = self.wordlist
+        numbers = iter(random_below(len(wordlist), count * self.words))
+        positions = iter(random_below(self.words + 1, count)) if self.digits else None
+        values = iter(random_below(10 ** self.digits, count)) if self.digits else None
+        passphrases = []
+        for _ in range(count):
+            parts = [wordlist[next(numbers)] for _ in range(self.words)]
+            if self.capitalize:
+                parts = [part.capitalize() for part in parts]
+            if self.digits:
+                parts.insert(next(positions), f"{next(values):0{self.digits}d}")
+            passphrases.append(self.separator.join(parts))
+        return passphrases
+
+    def write(self, out, count):
+        """Writes `count` passphrases, one per line, to the text file `out`."""
+        batch = 10_000
+        for start in range(0, count, batch):
+            out.write("\n".join(self.generate_many(min(batch, count - start))) + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate diceware-style passphrases.")
+    parser.add_argument("-n", "--count", type=int, default=1, help="number of passphrases (default: 1)")
+    parser.add_argument("-w", "--words", type=int, default=6, help="words per passphrase (default: 6)")
+    parser.add_argument("--separator", default="-", help="text between words (default: -)")
+    parser.add_argument("--capitalize", action="store_true", help="capitalize every word")
+    parser.add_argument("--digits", type=int, default=0, help="insert a number with this many digits")
+    parser.add_argument("--wordlist", default=None, help="wordlist file, one word per line")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    path = args.wordlist or default_wordlist()
+    if path is None:
+        parser.error("no wordlist found; pass --wordlist or set PASSPHRASE_WORDLIST")
+    try:
+        generator = PassphraseGenerator(Wordlist(path), args.words, args.separator, args.capitalize, args.digits)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    print(f"{generator.entropy_bits():.1f} bits per passphrase", file=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as out:
+            generator.write(out, args.count)
+    else:
+        generator.write(sys.stdout, args.count)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
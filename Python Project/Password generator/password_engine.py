@@ -0,0 +1,166 @@
+"""
+Headless password generation engine.
+
+Randomness comes from the OS CSPRNG (os.urandom), read in large chunks.
+Random bytes are mapped onto the alphabet by rejection sampling: bytes at or
+above the largest multiple of the alphabet size are dropped, so every
+character is exactly equally likely. Mapping and rejection are done by
+bytes.translate, or by NumPy when it is installed, never byte by byte in Python.
+
+Command line:
+    python password_engine.py -n 1000000 -l 16 [-o passwords.txt] [--workers 4]
+"""
+import argparse
+import os
+import string
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEFAULT_ALPHABET = string.ascii_letters + string.digits + string.punctuation
+RANDOM_CHUNK_SIZE = 1 << 16
+BATCH_SIZE = 100_000  # Passwords per generated block
+
+
+class PasswordEngine:
+    """
+    Generates passwords over a single-byte alphabet (at most 256 distinct characters).
+    Raises ValueError for an empty, oversized or non-Latin-1 alphabet.
+    """
+
+    def __init__(self, alphabet=DEFAULT_ALPHABET, chunk_size=RANDOM_CHUNK_SIZE, use_numpy=True):
+        alphabet = "".join(dict.fromkeys(alphabet))  # Duplicates would skew the distribution
+        if not alphabet:
+            raise ValueError("The alphabet is empty.")
+        if len(alphabet) > 256:
+            raise ValueError("The alphabet has more than 256 characters.")
+        try:
+            self.symbols = alphabet.encode("latin-1")
+        except UnicodeEncodeError:
+            raise ValueError("The alphabet may only contain Latin-1 characters.") from None
+        self.alphabet = alphabet
+        self.chunk_size = chunk_size
+        self.use_numpy = use_numpy and np is not None
+
+        size = len(self.symbols)
+        self._limit = 256 - 256 % size  # Bytes from here up are rejected
+        self._table = bytes(self.symbols[byte % size] for byte in range(self._limit)) + bytes(256 - self._limit)
+        self._rejected = bytes(range(self._limit, 256))
+        if self.use_numpy:
+            self._lut = np.frombuffer(self._table, dtype=np.uint8)
+        self._buffer = b""  # Accepted symbols not handed out yet, from self._offset on
+        self._offset = 0
+
+    def random_symbols(self, count):
+        """Returns `count` uniformly random alphabet characters as bytes."""
+        parts = []
+        needed = count
+        while needed:
+            if self._offset == len(self._buffer):
+                self._buffer = self._draw(max(self.chunk_size, needed * 256 // self._limit + 64))
+                self._offset = 0
+            part = self._buffer[self._offset:self._offset + needed]
+            self._offset += len(part)
+            parts.append(part)
+            needed -= len(part)
+        return b"".join(parts)
+
+    def _draw(self, size):
+        """Reads `size` bytes from the CSPRNG and returns the accepted ones mapped to the alphabet."""
+        raw = os.urandom(size)
+        if self.use_numpy:
+            values = np.frombuffer(raw, dtype=np.uint8)
+            return self._lut[values[values < self._limit]].tobytes()
+        return raw.translate(self._table, self._rejected)
+
+    def generate(self, length):
+        """Returns one password of `length` characters."""
+        return self.random_symbols(length).decode("latin-1")
+
+    def generate_block(self, count, length):
+        """Returns `count` passwords of `length` characters as newline-terminated Latin-1 lines."""
+        data = self.random_symbols(count * length)
+        if self.use_numpy:
+            lines = np.empty((count, length + 1), dtype=np.uint8)
+            lines[:, :length] = np.frombuffer(data, dtype=np.uint8).reshape(count, length)
+            lines[:, length] = ord("\n")
+            return lines.tobytes()
+        # Strided slice copies place each column of characters, then the newlines, without a per-password loop.
+        width = length + 1
+        lines = bytearray(count * width)
+        for column in range(length):
+            lines[column::width] = data[column::length]
+        lines[length::width] = b"\n" * count
+        return bytes(lines)
+
+    def generate_many(self, count, length):
+        """Returns a list of `count` passwords."""
+        return self.generate_block(count, length).decode("latin-1").splitlines()
+
+    def iter_blocks(self, count, length, batch_size=BATCH_SIZE, workers=1):
+        """
+        Yields blocks of newline-terminated passwords, `count` in total.
+        With more than one worker, blocks are generated in a process pool
+        (each worker reads its own CSPRNG stream) and yielded in order.
+        """
+        sizes = [min(batch_size, count - start) for start in range(0, count, batch_size)]
+        if workers <= 1 or len(sizes) < 2:
+            for size in sizes:
+                yield self.generate_block(size, length)
+            return
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Only a few blocks are in flight, so a slow consumer never has every block buffered.
+            pending = []
+            for size in sizes:
+                pending.append(pool.submit(_generate_block, self.alphabet, size, length))
+                if len(pending) >= workers * 2:
+                    yield pending.pop(0).result()
+            for future in pending:
+                yield future.result()
+
+    def write(self, out, count, length, batch_size=BATCH_SIZE, workers=1):
+        """Streams `count` passwords, one per line, to the binary file `out`."""
+        for block in self.iter_blocks(count, length, batch_size, workers):
+            out.write(block)
+
+
+_engines = {}  # alphabet -> PasswordEngine, per worker process
+
+
+def _generate_block(alphabet, count, length):
+    engine = _engines.get(alphabet)
+    if engine is None:
+        engine = _engines[alphabet] = PasswordEngine(alphabet)
+    return engine.generate_block(count, length)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate passwords in bulk from the OS CSPRNG.")
+    parser.add_argument("-n", "--count", type=int, default=1, help="number of passwords (default: 1)")
+    parser.add_argument("-l", "--length", type=int, default=16, help="password length (default: 16)")
+    parser.add_argument("-a", "--alphabet", default=DEFAULT_ALPHABET, help="characters to draw from")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=1, help="generator processes (default: 1)")
+    args = parser.parse_args(argv)
+    if args.count < 0 or args.length <= 0:
+        parser.error("count must be non-negative and length positive")
+    try:
+        engine = PasswordEngine(args.alphabet)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.output:
+        with open(args.output, "wb") as out:
+            engine.write(out, args.count, args.length, workers=args.workers)
+    else:
+        engine.write(sys.stdout.buffer, args.count, args.length, workers=args.workers)
+        sys.stdout.buffer.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
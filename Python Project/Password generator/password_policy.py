@@ -0,0 +1,233 @@
+"""
+Policy-constrained password generation.
+
+A PasswordPolicy describes the characters a password may use (character
+classes, optionally without ambiguous look-alikes, or a custom alphabet),
+the classes it must contain and the longest allowed run of one repeated
+character. Instead of generating passwords and rejecting those that break
+the rules, the policy counts the compliant passwords exactly (dynamic
+programming over "classes seen so far, class of the last character, run
+length") and maps one CSPRNG number below that count onto a password. So
+every compliant password is equally likely, a password takes exactly one
+pass, and the entropy is exactly log2(count) bits.
+
+A policy without required classes or a run limit accepts every string over
+its alphabet, so it skips the counting: its passwords are plain uniform
+draws and its entropy is length * log2(alphabet size). Policies with rules
+are limited to MAX_RULE_LENGTH characters, as the counting tables grow
+with the length.
+"""
+import math
+import secrets
+import string
+
+CHARACTER_CLASSES = {
+    "lower": string.ascii_lowercase,
+    "upper": string.ascii_uppercase,
+    "digits": string.digits,
+    "symbols": string.punctuation,
+}
+AMBIGUOUS_CHARACTERS = "Il1|O0o`'\""
+MAX_RULE_LENGTH = 512  # Longest password a policy with required classes or a run limit may ask for
+
+
+class PolicyError(ValueError):
+    """Raised for a policy no password can satisfy."""
+
+
+class PasswordPolicy:
+    """
+    `classes` maps class names to their characters (default: CHARACTER_CLASSES).
+    `required` names the classes every password must contain (default: all of them).
+    `max_run` is the longest allowed run of one character (None: no limit; 1: no
+    character directly repeated). `exclude` characters are removed from every class.
+    """
+
+    def __init__(self, length, classes=None, required=None, exclude="", exclude_ambiguous=False, max_run=None):
+        if length <= 0:
+            raise PolicyError("Password length must be positive.")
+        if max_run is not None and max_run < 1:
+            raise PolicyError("The maximum run length must be at least 1.")
+        classes = dict(CHARACTER_CLASSES if classes is None else classes)
+        excluded = set(exclude) | (set(AMBIGUOUS_CHARACTERS) if exclude_ambiguous else set())
+
+        self.length = length
+        self.max_run = max_run
+        self.names = []
+        self.classes = []  # Characters of each class, disjoint
+        seen = set(excluded)
+        for name, characters in classes.items():
+            characters = "".join(c for c in dict.fromkeys(characters) if c not in seen)
+            seen.update(characters)
+            if characters:
+                self.names.append(name)
+                self.classes.append(characters)
+        if not self.classes:
+            raise PolicyError("The policy allows no characters.")
+
+        required = classes.keys() if required is None else required
+        unknown = set(required) - classes.keys()
+        if unknown:
+            raise PolicyError(f"Unknown character classes: {', '.join(sorted(unknown))}")
+        missing = [name for name in required if name not in self.names]
+        if missing:
+            raise PolicyError(f"No characters left in required classes: {', '.join(missing)}")
+        self.required_mask = sum(1 << self.names.index(name) for name in required)
+        if bin(self.required_mask).count("1") > length:
+            raise PolicyError("The password is too short to contain every required class.")
+
+        # Without rules every string over the alphabet complies; no counting needed.
+        self.unconstrained = not self.required_mask and max_run is None
+        if self.unconstrained:
+            self.total = len(self.alphabet) ** length
+            return
+        if length > MAX_RULE_LENGTH:
+            raise PolicyError(f"Passwords with required classes or a repeat limit can be at most "
+                              f"{MAX_RULE_LENGTH} characters long.")
+        self._counts = self._count_table()
+        self.total = self._counts[length][(0, -1, 0)]
+        if not self.total:
+            raise PolicyError("No password satisfies this policy.")
+
+    @classmethod
+    def simple(cls, length, lower=True, upper=True, digits=True, symbols=True, require_all=True,
+               exclude_ambiguous=False, no_repeats=False):
+        """Builds a policy from the usual on/off switches; enabled classes are required with `require_all`."""
+        enabled = {"lower": lower, "upper": upper, "digits": digits, "symbols": symbols}
+        classes = {name: CHARACTER_CLASSES[name] for name, on in enabled.items() if on}
+        return cls(length, classes, required=None if require_all else (), exclude_ambiguous=exclude_ambiguous,
+                   max_run=1 if no_repeats else None)
+
+    @property
+    def alphabet(self):
+        return "".join(self.classes)
+
+    def entropy_bits(self):
+        """Returns the exact entropy of a generated password: log2 of the number of compliant passwords."""
+        if self.unconstrained:
+            return self.length * math.log2(len(self.alphabet))
+        return math.log2(self.total)
+
+    def complies(self, password):
+        """Returns True if `password` satisfies the policy."""
+        if len(password) != self.length:
+            return False
+        mask = 0
+        run = 0
+        previous = None
+        for character in password:
+            for index, characters in enumerate(self.classes):
+                if character in characters:
+                    mask |= 1 << index
+                    break
+            else:
+                return False
+            run = run + 1 if character == previous else 1
+            if self.max_run is not None and run > self.max_run:
+                return False
+            previous = character
+        return mask & self.required_mask == self.required_mask
+
+    # --- Counting ---
+
+    def _transitions(self, state):
+        """
+        Returns (class index, same character as the last one, number of character
+        choices, next state) for every way to extend a password in `state`.
+        A state is (classes seen as a bit mask, class of the last character or -1, run length).
+        """
+        mask, last, run = state
+        transitions = []
+        for index, characters in enumerate(self.classes):
+            new_mask = mask | (1 << index)
+            if index != last or self.max_run is None:
+                # With unlimited runs, repeating the last character needs no separate state.
+                transitions.append((index, False, len(characters), (new_mask, index, 1)))
+                continue
+            if len(characters) > 1:
+                transitions.append((index, False, len(characters) - 1, (new_mask, index, 1)))
+            if run < self.max_run:
+                transitions.append((index, True, 1, (new_mask, index, run + 1)))
+        return transitions
+
+    def _count_table(self):
+        """
+        Returns counts[r][state]: the number of ways to add r more characters
+        to a password in `state` and end up compliant, for every reachable state.
+        Also fills self._steps[r][state] with the transitions out of `state`,
+        each with its weight (choices times completions), for password_at().
+        """
+        transitions = {}  # state -> self._transitions(state), computed once per state
+        reachable = [{(0, -1, 0)}]  # States reachable after each number of characters
+        for _ in range(self.length):
+            next_states = set()
+            for state in reachable[-1]:
+                if state not in transitions:
+                    transitions[state] = self._transitions(state)
+                next_states.update(transition[3] for transition in transitions[state])
+            reachable.append(next_states)
+
+        counts = [None] * (self.length + 1)
+        self._steps = [None] * (self.length + 1)
+        # counts[0] holds the states reached after all `length` characters.
+        counts[0] = {state: int(state[0] & self.required_mask == self.required_mask) for state in reachable[-1]}
+        for remaining in range(1, self.length + 1):
+            below = counts[remaining - 1]
+            level_counts = counts[remaining] = {}
+            level_steps = self._steps[remaining] = {}
+            for state in reachable[self.length - remaining]:
+                steps = [(choices * below[next_state], index, same, below[next_state], next_state)
+                         for index, same, choices, next_state in transitions[state] if below[next_state]]
+                level_steps[state] = steps
+                level_counts[state] = sum(step[0] for step in steps)
+        return counts
+
+    # --- Generation ---
+
+    def password_at(self, number):
+        """
+        Returns compliant password number `number` (0 <= number < self.total).
+        Every number maps to a different password, so a uniformly random
+        number gives a uniformly random compliant password.
+        """
+        if not 0 <= number < self.total:
+            raise ValueError("number is out of range")
+        if self.unconstrained:
+            # Base-(alphabet size) digits of `number`, most significant first
+            alphabet = self.alphabet
+            characters = []
+            for _ in range(self.length):
+                number, digit = divmod(number, len(alphabet))
+                characters.append(alphabet[digit])
+            return "".join(reversed(characters))
+        state = (0, -1, 0)
+        previous = None
+        characters = []
+        classes = self.classes
+        excludes_previous = self.max_run is not None
+        for remaining in range(self.length, 0, -1):
+            for weight, index, same, completions, next_state in self._steps[remaining][state]:
+                if number < weight:
+                    break
+                number -= weight
+            choice, number = divmod(number, completions)
+            if same:
+                character = previous
+            elif index == state[1] and excludes_previous:
+                # Any character of the class except the previous one
+                character = classes[index].replace(previous, "")[choice]
+            else:
+                character = classes[index][choice]
+            characters.append(character)
+            previous = character
+            state = next_state
+        return "".join(characters)
+
+    def generate(self):
+        """Returns a uniformly random compliant password, built in one pass from one CSPRNG draw."""
+        if self.unconstrained:
+            return "".join(secrets.choice(self.alphabet) for _ in range(self.length))
+        return self.password_at(secrets.randbelow(self.total))
+
+    def generate_many(self, count):
+        return [self.generate() for _ in range(count)]
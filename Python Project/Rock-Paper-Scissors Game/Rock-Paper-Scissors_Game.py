@@ -1,28 +1,47 @@
 import tkinter as tk
 from tkinter import messagebox
-import random
+
+from rps_engine import MOVES, RESULT_TEXT, GameEngine, move_number
+from rps_stats import MatchLog
+from rps_strategies import STRATEGIES, make_strategy
 
 class RockPaperScissorsGUI:
     def __init__(self, master):
         self.master = master
         master.title("Rock-Paper-Scissors")
-        master.geometry("400x300")
+        master.geometry("400x380")
         master.resizable(False, False)
 
-        self.user_score = 0
-        self.computer_score = 0
+        self.engine = GameEngine()
+        self.strategy_name = tk.StringVar(value=self.engine.strategy.name)
 
         self.user_choice = tk.StringVar()
         self.computer_choice_str = tk.StringVar()
         self.result_str = tk.StringVar()
+        self.all_time_str = tk.StringVar()
+
+        # All-time statistics survive "Play Again" and restarts.
+        try:
+            self.match_log = MatchLog()
+        except OSError as e:
+            self.match_log = None
+            messagebox.showerror("Error", f"Could not open the match log, statistics will not be kept: {e}")
 
         self.create_widgets()
+        self.update_all_time()
+        master.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def create_widgets(self):
         # Instructions
         instructions = tk.Label(self.master, text="Choose your move:", font=("Arial", 14))
         instructions.pack(pady=10)
 
+        # Computer strategy
+        strategy_frame = tk.Frame(self.master)
+        strategy_frame.pack()
+        tk.Label(strategy_frame, text="Computer plays:").pack(side=tk.LEFT, padx=5)
+        tk.OptionMenu(strategy_frame, self.strategy_name, *STRATEGIES, command=self.change_strategy).pack(side=tk.LEFT)
+
         # Buttons for choices
         button_frame = tk.Frame(self.master)
         button_frame.pack()
@@ -62,45 +81,60 @@ class RockPaperScissorsGUI:
 
         user_score_label = tk.Label(score_frame, text="Your Score:", font=("Arial", 12))
         user_score_label.pack(side=tk.LEFT, padx=10)
-        self.user_score_display_label = tk.Label(score_frame, text=self.user_score, font=("Arial", 12, "bold"))
+        self.user_score_display_label = tk.Label(score_frame, text=self.engine.player_score, font=("Arial", 12, "bold"))
         self.user_score_display_label.pack(side=tk.LEFT)
 
         computer_score_label = tk.Label(score_frame, text="Computer Score:", font=("Arial", 12))
         computer_score_label.pack(side=tk.LEFT, padx=10)
-        self.computer_score_display_label = tk.Label(score_frame, text=self.computer_score, font=("Arial", 12, "bold"))
+        self.computer_score_display_label = tk.Label(score_frame, text=self.engine.computer_score, font=("Arial", 12, "bold"))
         self.computer_score_display_label.pack(side=tk.LEFT)
 
         # Play Again button
         play_again_button = tk.Button(self.master, text="Play Again", command=self.reset_game)
         play_again_button.pack(pady=10)
 
+        # All-time statistics
+        all_time_label = tk.Label(self.master, textvariable=self.all_time_str, font=("Arial", 9))
+        all_time_label.pack()
+
     def play_round(self, user_selection):
-        choices = ["rock", "paper", "scissors"]
-        computer_selection = random.choice(choices)
+        computer_selection, result = self.engine.play_round(move_number(user_selection))
 
         self.user_choice.set(user_selection.capitalize())
-        self.computer_choice_str.set(computer_selection.capitalize())
-
-        if user_selection == computer_selection:
-            self.result_str.set("It's a tie!")
-        elif (user_selection == "rock" and computer_selection == "scissors") or \
-             (user_selection == "scissors" and computer_selection == "paper") or \
-             (user_selection == "paper" and computer_selection == "rock"):
-            self.result_str.set("You win!")
-            self.user_score += 1
-        else:
-            self.result_str.set("Computer wins!")
-            self.computer_score += 1
-
+        self.computer_choice_str.set(MOVES[computer_selection].capitalize())
+        self.result_str.set(RESULT_TEXT[result])
+
+        if self.match_log is not None:
+            try:
+                self.match_log.record(move_number(user_selection), computer_selection, self.strategy_name.get())
+            except OSError as e:
+                self.match_log = None
+                messagebox.showerror("Error", f"Could not write the match log, statistics will not be kept: {e}")
         self.update_scores()
+        self.update_all_time()
+
+    def change_strategy(self, name):
+        """Switches the computer to a fresh strategy; it learns the player's habits from scratch."""
+        self.engine.strategy = make_strategy(name)
 
     def update_scores(self):
-        self.user_score_display_label.config(text=self.user_score)
-        self.computer_score_display_label.config(text=self.computer_score)
+        self.user_score_display_label.config(text=self.engine.player_score)
+        self.computer_score_display_label.config(text=self.engine.computer_score)
+
+    def update_all_time(self):
+        self.all_time_str.set(f"All time: {self.match_log.stats}" if self.match_log is not None else "")
+
+    def on_close(self):
+        """Saves the statistics summary, so the next start does not replay the log."""
+        if self.match_log is not None:
+            try:
+                self.match_log.close()
+            except OSError:
+                pass  # The log itself is complete; the next start replays its tail
+        self.master.destroy()
 
     def reset_game(self):
-        self.user_score = 0
-        self.computer_score = 0
+        self.engine.reset()
         self.update_scores()
         self.user_choice.set("")
         self.computer_choice_str.set("")
@@ -0,0 +1,241 @@
+"""
+Headless Rock-Paper-Scissors rules and batch simulation.
+
+Moves are numbered so that each move beats the one before it (paper beats
+rock, scissors beat paper, rock beats scissors); the outcome of a round is
+then just a lookup in OUTCOMES[player][computer].
+
+The batch simulator does not play rounds one by one. A round is a pair
+code (player * 3 + computer, 0..8), and a whole chunk of rounds is one
+byte string of pair codes, made from random bytes by bytes.translate
+(bytes that would bias the draw are deleted, as in the password engine)
+or by NumPy when it is installed. Counting each of the nine codes with
+bytes.count gives every statistic, so a chunk costs a few C-level passes.
+Chunks can run in a process pool.
+
+Command line:
+    python rps_engine.py -n 10000000 [--player rock] [--computer random] [--workers 4] [--seed 1]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MOVES = ("rock", "paper", "scissors")
+TIE, WIN, LOSS = 0, 1, 2  # From the player's point of view
+# OUTCOMES[player][computer]; a move beats the move numbered one below it (mod 3).
+OUTCOMES = tuple(tuple((player - computer) % 3 for computer in range(3)) for player in range(3))
+RESULT_TEXT = {TIE: "It's a tie!", WIN: "You win!", LOSS: "Computer wins!"}
+CHUNK_ROUNDS = 1 << 22
+RANDOM = "random"
+
+
+def move_number(move):
+    """Returns the number of a move name (case-insensitive). Raises ValueError for others."""
+    try:
+        return MOVES.index(move.lower())
+    except ValueError:
+        raise ValueError(f"Unknown move {move!r}; choose {', '.join(MOVES)}.") from None
+
+
+def outcome(player, computer):
+    """Returns TIE, WIN or LOSS for the player's move against the computer's (move numbers)."""
+    return OUTCOMES[player][computer]
+
+
+class RandomStrategy:
+    """
+    Plays uniformly at random. Strategies choose() the next move (a number)
+    and observe() each finished round as (opponent's move, own move); see
+    rps_strategies.py for adaptive ones.
+    """
+
+    name = "random"
+
+    def __init__(self, rng=None):
+        self.rng = rng or random.Random()
+
+    def choose(self):
+        return self.rng.randrange(3)
+
+    def observe(self, opponent, own):
+        pass
+
+
+class GameEngine:
+    """A game of single rounds with running scores; `strategy` picks the computer's moves (default: random)."""
+
+    def __init__(self, strategy=None):
+        self.strategy = strategy or RandomStrategy()
+        self.player_score = 0
+        self.computer_score = 0
+        self.rounds = 0
+
+    def play_round(self, player):
+        """Plays the player's move (a number); returns (computer's move, outcome) and updates the scores."""
+        computer = self.strategy.choose()
+        result = OUTCOMES[player][computer]
+        self.strategy.observe(player, computer)
+        self.rounds += 1
+        if result == WIN:
+            self.player_score += 1
+        elif result == LOSS:
+            self.computer_score += 1
+        return computer, result
+
+    def reset(self):
+        self.player_score = 0
+        self.computer_score = 0
+        self.rounds = 0
+
+
+# --- Batch simulation ---
+
+class SimulationStats:
+    """Aggregate results of simulated rounds; `pairs[player][computer]` counts each move pair."""
+
+    def __init__(self, pairs=None):
+        self.pairs = pairs or [[0, 0, 0] for _ in range(3)]
+        self.seconds = 0.0
+
+    def add(self, counts):
+        """Adds nine pair-code counts (index player * 3 + computer)."""
+        for code, count in enumerate(counts):
+            self.pairs[code // 3][code % 3] += count
+
+    @property
+    def rounds(self):
+        return sum(map(sum, self.pairs))
+
+    def count(self, result):
+        return sum(self.pairs[player][computer] for player in range(3) for computer in range(3)
+                   if OUTCOMES[player][computer] == result)
+
+    @property
+    def wins(self):
+        return self.count(WIN)
+
+    @property
+    def losses(self):
+        return self.count(LOSS)
+
+    @property
+    def ties(self):
+        return self.count(TIE)
+
+    def player_moves(self):
+        return [sum(row) for row in self.pairs]
+
+    def computer_moves(self):
+        return [sum(row[computer] for row in self.pairs) for computer in range(3)]
+
+    def rounds_per_second(self):
+        return self.rounds / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        rounds = self.rounds or 1
+        return (f"{self.rounds:,} rounds: {self.wins / rounds:.2%} player wins, {self.losses / rounds:.2%} "
+                f"computer wins, {self.ties / rounds:.2%} ties "
+                f"({self.seconds:.2f} s, {self.rounds_per_second():,.0f} rounds/s)")
+
+
+def _pair_codes(player, computer):
+    """Returns the pair codes a round can have when `player` and `computer` are move numbers or None (random)."""
+    players = range(3) if player is None else [player]
+    computers = range(3) if computer is None else [computer]
+    return [p * 3 + c for p in players for c in computers]
+
+
+def simulate_chunk(rounds, player=None, computer=None, seed=None):
+    """
+    Returns the nine pair-code counts of `rounds` random rounds. `player` and
+    `computer` are move numbers, or None to play uniformly at random. With a
+    `seed` the rounds are reproducible; otherwise they come from os.urandom
+    (or NumPy's OS-seeded generator).
+    """
+    codes = _pair_codes(player, computer)
+    counts = [0] * 9
+    if len(codes) == 1:
+        counts[codes[0]] = rounds
+        return counts
+    if np is not None:
+        draws = np.random.default_rng(seed).integers(0, len(codes), rounds, dtype=np.uint8)
+        for index, count in enumerate(np.bincount(draws, minlength=len(codes)).tolist()):
+            counts[codes[index]] = count
+        return counts
+
+    # Bytes at or above the largest multiple of len(codes) are deleted, so every code is equally likely.
+    limit = 256 - 256 % len(codes)
+    table = bytes(codes[byte % len(codes)] for byte in range(limit)) + bytes(256 - limit)
+    rejected = bytes(range(limit, 256))
+    rng = random.Random(seed) if seed is not None else None
+    remaining = rounds
+    while remaining:
+        size = remaining * 256 // limit + 64
+        drawn = (rng.randbytes(size) if rng is not None else os.urandom(size)).translate(table, rejected)[:remaining]
+        for code in codes:
+            counts[code] += drawn.count(code)
+        remaining -= len(drawn)
+    return counts
+
+
+def simulate(rounds, player=None, computer=None, workers=1, seed=None, chunk_rounds=CHUNK_ROUNDS):
+    """
+    Plays `rounds` rounds in chunks and returns their SimulationStats. With
+    more than one worker, chunks run in a process pool, a few at a time.
+    Each chunk of a seeded run gets its own seed derived from `seed` and the chunk
+    number, so results do not depend on `workers`.
+    """
+    stats = SimulationStats()
+    started = time.perf_counter()
+    sizes = [min(chunk_rounds, rounds - start) for start in range(0, rounds, chunk_rounds)]
+    seeds = [None if seed is None else seed * 1_000_003 + index for index in range(len(sizes))]
+    if workers <= 1 or len(sizes) < 2:
+        for size, chunk_seed in zip(sizes, seeds):
+            stats.add(simulate_chunk(size, player, computer, chunk_seed))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = []
+            for size, chunk_seed in zip(sizes, seeds):
+                pending.append(pool.submit(simulate_chunk, size, player, computer, chunk_seed))
+                if len(pending) >= workers * 2:
+                    stats.add(pending.pop(0).result())
+            for future in pending:
+                stats.add(future.result())
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate Rock-Paper-Scissors rounds in bulk.")
+    parser.add_argument("-n", "--rounds", type=int, default=1_000_000, help="rounds to play (default: 1,000,000)")
+    parser.add_argument("--player", default=RANDOM, help="player's move, or random (default)")
+    parser.add_argument("--computer", default=RANDOM, help="computer's move, or random (default)")
+    parser.add_argument("--workers", type=int, default=1, help="simulation processes (default: 1)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for a reproducible run")
+    args = parser.parse_args(argv)
+    if args.rounds < 0:
+        parser.error("the number of rounds cannot be negative")
+    try:
+        player = None if args.player == RANDOM else move_number(args.player)
+        computer = None if args.computer == RANDOM else move_number(args.computer)
+    except ValueError as e:
+        parser.error(str(e))
+
+    stats = simulate(args.rounds, player, computer, args.workers, args.seed)
+    print(stats)
+    names = [move.capitalize() for move in MOVES]
+    print("Player moves:   " + ", ".join(f"{name} {count:,}" for name, count in zip(names, stats.player_moves())))
+    print("Computer moves: " + ", ".join(f"{name} {count:,}" for name, count in zip(names, stats.computer_moves())))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""
+Persistent Rock-Paper-Scissors statistics.
+
+Every round is appended to a plain-text match log, one CSV line per round
+("unix time,strategy,player move,computer move,W|L|T"), and is never rewritten,
+so the full history stays available for offline analysis. MatchStats
+keeps the aggregates (move pairs, streaks, a rolling window of recent
+results) and updates them in O(1) per round. They are saved as a small
+JSON summary that records how much of the log it covers. At startup the
+summary is loaded and only the log lines written after it are replayed, so
+loading time does not depend on the length of the history.
+
+Command line:
+    python rps_stats.py [rps_matches.log] [--rebuild]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+
+from rps_engine import LOSS, MOVES, OUTCOMES, TIE, WIN
+
+LOG_FILE = "rps_matches.log"
+SUMMARY_EVERY = 50  # Rounds between summary saves; at most this many log lines are replayed at startup
+RECENT_ROUNDS = 100
+RESULT_CODES = {WIN: "W", LOSS: "L", TIE: "T"}
+RESULTS_BY_CODE = {code: result for result, code in RESULT_CODES.items()}
+
+
+class MatchStats:
+    """Aggregates over every recorded round, each kept up to date in O(1) per round."""
+
+    def __init__(self):
+        self.pairs = [[0, 0, 0] for _ in range(3)]  # pairs[player move][computer move]
+        self.results = [0, 0, 0]  # Indexed by TIE, WIN, LOSS
+        self.streak_result = None
+        self.streak_length = 0
+        self.longest_win_streak = 0
+        self.longest_loss_streak = 0
+        self.recent = deque(maxlen=RECENT_ROUNDS)
+        self.recent_results = [0, 0, 0]
+
+    def record(self, player, computer):
+        """Adds one round (move numbers) and returns its result."""
+        result = OUTCOMES[player][computer]
+        self.pairs[player][computer] += 1
+        self.results[result] += 1
+
+        if result == self.streak_result:
+            self.streak_length += 1
+        else:
+            self.streak_result = result
+            self.streak_length = 1
+        if result == WIN:
+            self.longest_win_streak = max(self.longest_win_streak, self.streak_length)
+        elif result == LOSS:
+            self.longest_loss_streak = max(self.longest_loss_streak, self.streak_length)
+
+        if len(self.recent) == RECENT_ROUNDS:
+            self.recent_results[self.recent[0]] -= 1
+        self.recent.append(result)
+        self.recent_results[result] += 1
+        return result
+
+    @property
+    def rounds(self):
+        return sum(self.results)
+
+    @property
+    def wins(self):
+        return self.results[WIN]
+
+    @property
+    def losses(self):
+        return self.results[LOSS]
+
+    @property
+    def ties(self):
+        return self.results[TIE]
+
+    def win_rate(self):
+        return self.wins / self.rounds if self.rounds else 0.0
+
+    def recent_win_rate(self):
+        return self.recent_results[WIN] / len(self.recent) if self.recent else 0.0
+
+    def player_moves(self):
+        """Returns {move name: times the player chose it}."""
+        return {move: sum(self.pairs[number]) for number, move in enumerate(MOVES)}
+
+    def computer_moves(self):
+        return {move: sum(row[number] for row in self.pairs) for number, move in enumerate(MOVES)}
+
+    def to_dict(self):
+        return {
+            "pairs": self.pairs,
+            "streak_result": self.streak_result,
+            "streak_length": self.streak_length,
+            "longest_win_streak": self.longest_win_streak,
+            "longest_loss_streak": self.longest_loss_streak,
+            "recent": "".join(RESULT_CODES[result] for result in self.recent),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.pairs = [list(row) for row in data["pairs"]]
+        for player in range(3):
+            for computer in range(3):
+                stats.results[OUTCOMES[player][computer]] += stats.pairs[player][computer]
+        stats.streak_result = data["streak_result"]
+        stats.streak_length = data["streak_length"]
+        stats.longest_win_streak = data["longest_win_streak"]
+        stats.longest_loss_streak = data["longest_loss_streak"]
+        for code in data["recent"][-RECENT_ROUNDS:]:
+            result = RESULTS_BY_CODE[code]
+            stats.recent.append(result)
+            stats.recent_results[result] += 1
+        return stats
+
+    def __str__(self):
+        if not self.rounds:
+            return "No rounds played yet."
+        streak = f"{self.streak_length} {RESULT_CODES[self.streak_result]}"
+        return (f"{self.rounds} rounds, {self.win_rate():.0%} won (last {len(self.recent)}: "
+                f"{self.recent_win_rate():.0%}), streak {streak}, best {self.longest_win_streak} wins")
+
+
+def parse_line(line):
+    """Returns (time, strategy, player move, computer move, result) for a log line. Raises ValueError for bad ones."""
+    timestamp, strategy, player, computer, code = line.rstrip("\n").split(",")
+    if code not in RESULTS_BY_CODE:
+        raise ValueError(f"Unknown result code {code!r}")
+    return int(timestamp), strategy, MOVES.index(player), MOVES.index(computer), RESULTS_BY_CODE[code]
+
+
+class MatchLog:
+    """
+    The append-only round log at `path` with its summary at "<path>.summary.json".
+    Raises OSError if the log cannot be opened for appending.
+    """
+
+    def __init__(self, path=LOG_FILE):
+        self.path = path
+        self.summary_path = path + ".summary.json"
+        self.stats, offset = self._load_summary()
+        self.replayed = self._replay(offset)
+        self._file = open(self.path, "a")
+        self._unsaved = self.replayed
+
+    def _load_summary(self):
+        """Returns (stats, log offset covered) from the summary, or empty stats if it is missing or stale."""
+        try:
+            with open(self.summary_path) as f:
+                data = json.load(f)
+            if data["log_size"] <= os.path.getsize(self.path):
+                return MatchStats.from_dict(data["stats"]), data["log_size"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass  # No summary, or one for another log: rebuild from the whole log
+        return MatchStats(), 0
+
+    def _replay(self, offset):
+        """Adds the log's rounds from byte `offset` on to the stats; returns how many there were."""
+        replayed = 0
+        try:
+            with open(self.path, "rb+") as f:
+                f.seek(offset)
+                good_end = offset
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # A torn final line from a crash mid-append
+                    try:
+                        _, _, player, computer, _ = parse_line(line.decode("ascii"))
+                    except (ValueError, UnicodeDecodeError):
+                        good_end += len(line)
+                        continue
+                    self.stats.record(player, computer)
+                    replayed += 1
+                    good_end += len(line)
+                f.truncate(good_end)
+        except FileNotFoundError:
+            pass
+        return replayed
+
+    def record(self, player, computer, strategy="random"):
+        """Logs one round (move numbers) and returns its result."""
+        result = self.stats.record(player, computer)
+        self._file.write(f"{int(time.time())},{strategy},{MOVES[player]},{MOVES[computer]},{RESULT_CODES[result]}\n")
+        self._file.flush()
+        self._unsaved += 1
+        if self._unsaved >= SUMMARY_EVERY:
+            self.save_summary()
+        return result
+
+    def save_summary(self):
+        """Atomically rewrites the summary to cover the whole log."""
+        self._file.flush()
+        data = {"log_size": self._file.tell(), "stats": self.stats.to_dict()}
+        temp_path = self.summary_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(temp_path, self.summary_path)
+        self._unsaved = 0
+
+    def close(self):
+        if self._unsaved:
+            self.save_summary()
+        self._file.close()
+
+
+def iter_rounds(path=LOG_FILE):
+    """Yields (time, strategy, player move, computer move, result) for every valid line of a log."""
+    with open(path) as f:
+        for line in f:
+            try:
+                yield parse_line(line)
+            except ValueError:
+                continue
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show Rock-Paper-Scissors statistics from a match log.")
+    parser.add_argument("log", nargs="?", default=LOG_FILE, help=f"match log (default: {LOG_FILE})")
+    parser.add_argument("--rebuild", action="store_true", help="recompute the summary from the whole log")
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.log):
+        parser.error(f"{args.log} does not exist")
+    if args.rebuild:
+        try:
+            os.remove(args.log + ".summary.json")
+        except FileNotFoundError:
+            pass
+
+    started = time.perf_counter()
+    log = MatchLog(args.log)
+    log.close()
+    stats = log.stats
+    print(stats)
+    print(f"Loaded in {(time.perf_counter() - started) * 1000:.1f} ms, {log.replayed} rounds replayed from the log")
+    print(f"{stats.wins} wins, {stats.losses} losses, {stats.ties} ties; longest losing streak {stats.longest_loss_streak}")
+    print("Your moves:      " + ", ".join(f"{move} {count}" for move, count in stats.player_moves().items()))
+    print("Computer moves:  " + ", ".join(f"{move} {count}" for move, count in stats.computer_moves().items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+Adaptive computer strategies for Rock-Paper-Scissors.
+
+Every strategy predicts the opponent's next move and plays the move that
+beats it ((prediction + 1) % 3). Predictions come from count tables that
+observe() updates in O(1) per round, so choosing a move costs the same
+after a million rounds as after ten:
+
+    frequency  counts of the opponent's moves
+    markov     counts of the opponent's next move after each context of the
+               last `order` moves (optionally both players' moves)
+    ensemble   several strategies side by side, following whichever has the
+               best recent record (scores decay, so it switches when the
+               opponent changes its play)
+"""
+import random
+
+from rps_engine import OUTCOMES, WIN, LOSS, RandomStrategy, SimulationStats
+
+
+def _most_likely(counts, rng):
+    """Returns the index of the largest of three counts, a random one if all are equal."""
+    a, b, c = counts
+    if a == b == c:
+        return rng.randrange(3)
+    if a >= b and a >= c:
+        return 0
+    return 1 if b >= c else 2
+
+
+class FrequencyStrategy:
+    """Counters the opponent's most frequent move so far."""
+
+    name = "frequency"
+
+    def __init__(self, rng=None):
+        self.rng = rng or random.Random()
+        self.counts = [0, 0, 0]
+
+    def choose(self):
+        return (_most_likely(self.counts, self.rng) + 1) % 3
+
+    def observe(self, opponent, own):
+        self.counts[opponent] += 1
+
+
+class MarkovStrategy:
+    """
+    Counters the move the opponent most often made after the current context:
+    its last `order` moves, or with `pairs` the last `order` rounds' move pairs.
+    The count table has one row per possible context (3**order or 9**order),
+    allocated up front.
+    """
+
+    name = "markov"
+
+    def __init__(self, order=2, pairs=False, rng=None):
+        if order < 1:
+            raise ValueError("The order must be at least 1.")
+        self.rng = rng or random.Random()
+        self.order = order
+        self.pairs = pairs
+        self.base = 9 if pairs else 3
+        self.contexts = self.base ** order
+        self.table = [[0, 0, 0] for _ in range(self.contexts)]
+        self.context = 0
+        self.seen = 0  # Rounds observed, until the context is full
+
+    def choose(self):
+        if self.seen < self.order:
+            return self.rng.randrange(3)
+        return (_most_likely(self.table[self.context], self.rng) + 1) % 3
+
+    def observe(self, opponent, own):
+        if self.seen >= self.order:
+            self.table[self.context][opponent] += 1
+        else:
+            self.seen += 1
+        symbol = opponent * 3 + own if self.pairs else opponent
+        self.context = (self.context * self.base + symbol) % self.contexts
+
+
+class EnsembleStrategy:
+    """
+    Plays the move of the member strategy with the best decayed score, where
+    a member scores +1 for each round its move would have won and -1 for each
+    it would have lost. Every member observes every round.
+    """
+
+    name = "ensemble"
+
+    def __init__(self, members=None, decay=0.95, rng=None):
+        self.rng = rng or random.Random()
+        self.members = members or default_members(self.rng)
+        self.decay = decay
+        self.scores = [0.0] * len(self.members)
+        self.moves = [0] * len(self.members)  # Each member's choice for the current round
+
+    def choose(self):
+        self.moves = [member.choose() for member in self.members]
+        best = max(range(len(self.members)), key=self.scores.__getitem__)
+        return self.moves[best]
+
+    def observe(self, opponent, own):
+        decay = self.decay
+        for index, member in enumerate(self.members):
+            result = OUTCOMES[self.moves[index]][opponent]
+            self.scores[index] = self.scores[index] * decay + (result == WIN) - (result == LOSS)
+            member.observe(opponent, self.moves[index])
+
+
+def default_members(rng):
+    return [
+        RandomStrategy(rng),
+        FrequencyStrategy(rng),
+        MarkovStrategy(1, rng=rng),
+        MarkovStrategy(2, rng=rng),
+        MarkovStrategy(3, rng=rng),
+        MarkovStrategy(2, pairs=True, rng=rng),
+    ]
+
+
+STRATEGIES = {
+    "random": RandomStrategy,
+    "frequency": FrequencyStrategy,
+    "markov": MarkovStrategy,
+    "ensemble": EnsembleStrategy,
+}
+
+
+def make_strategy(name, rng=None):
+    """Returns a new strategy of one of the STRATEGIES names. Raises ValueError for others."""
+    try:
+        return STRATEGIES[name](rng=rng)
+    except KeyError:
+        raise ValueError(f"Unknown strategy {name!r}; choose {', '.join(STRATEGIES)}.") from None
+
+
+def play_match(first, second, rounds):
+    """
+    Plays `rounds` rounds between two strategies and returns SimulationStats
+    from the first strategy's point of view (it is the "player").
+    """
+    counts = [0] * 9
+    choose_first, choose_second = first.choose, second.choose
+    observe_first, observe_second = first.observe, second.observe
+    for _ in range(rounds):
+        a = choose_first()
+        b = choose_second()
+        observe_first(b, a)
+        observe_second(a, b)
+        counts[a * 3 + b] += 1
+    stats = SimulationStats()
+    stats.add(counts)
+    return stats
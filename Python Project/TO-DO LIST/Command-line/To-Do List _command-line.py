@@ -1,9 +1,26 @@
 import os
+import sys
+
+# One-shot subcommands, storage setup and the shared helpers live in todo.py, next to this file.
+from todo import clear_screen, format_task, open_storage
+from todo import main as run_command
+
+if __name__ == "__main__" and len(sys.argv) > 1:
+    # Hand subcommands over before importing what only the interactive list needs,
+    # so they start as quickly as with todo.py itself.
+    sys.exit(run_command(sys.argv[1:]))
+
 import json  # For more robust saving/loading
+import sqlite3
+from datetime import date
+from itertools import islice
+
+# Shared modules live in "Python Project/common".
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
+from common.records import Task
+from common.tasks import TaskList
 
-def clear_screen():
-    """Clears the terminal screen."""
-    os.system('cls' if os.name == 'nt' else 'clear')
+LOAD_BATCH_SIZE = 10000
 
 def display_tasks(tasks):
     """Displays the current to-do list with index and status summary."""
@@ -12,15 +29,9 @@ def display_tasks(tasks):
         return
 
     print("\n--- Your To-Do List ---")
-    completed_count = sum(1 for task in tasks if task.get('completed', False))
-    print(f"Total tasks: {len(tasks)}, Completed: {completed_count}")
-    for index, task in enumerate(tasks):
-        status = "[X]" if task.get('completed', False) else "[ ]"
-        description = task.get('description', 'No description')
-        priority = f"(Priority: {task.get('priority', 'N/A')})" if task.get('priority') else ""
-        due_date = f"(Due: {task.get('due_date', 'N/A')})" if task.get('due_date') else ""
-        tags_str = f"(Tags: {', '.join(task.get('tags', []))})" if task.get('tags') else ""
-        print(f"{index + 1}. {status} {description} {priority} {due_date} {tags_str}")
+    print(f"Total tasks: {len(tasks)}, Completed: {tasks.completed_count}")
+    for index in range(len(tasks)):
+        print(f"{index + 1}. {tasks.line(index)}")
     print("-----------------------\n")
 
 def get_valid_input(prompt, input_type=str, error_message="Invalid input. Please try again."):
@@ -59,7 +70,7 @@ def add_task(tasks):
 
     tags = get_valid_input("Enter tags (comma-separated, or leave blank): ", input_type=list)
 
-    tasks.append({'description': description, 'completed': False, 'priority': priority, 'due_date': due_date, 'tags': tags})
+    tasks.add(Task(description, False, priority, due_date, tags))
     print(f"Task '{description}' added successfully!\n")
 
 def mark_complete(tasks):
@@ -70,8 +81,8 @@ def mark_complete(tasks):
     try:
         task_number = get_valid_input("Enter the number of the task to mark as complete: ", input_type=int) - 1
         if 0 <= task_number < len(tasks):
-            tasks[task_number]['completed'] = True
-            print(f"Task '{tasks[task_number].get('description', 'Task')}' marked as complete!\n")
+            tasks.update(task_number, completed=True)
+            print(f"Task '{tasks[task_number].description}' marked as complete!\n")
         else:
             print("Invalid task number. Please enter a number from the list.\n")
     except ValueError:
@@ -85,11 +96,11 @@ def delete_task(tasks):
     try:
         task_number = get_valid_input("Enter the number of the task to delete: ", input_type=int) - 1
         if 0 <= task_number < len(tasks):
-            task_to_delete = tasks[task_number].get('description', 'Task')
+            task_to_delete = tasks[task_number].description
             confirm = get_valid_input(f"Are you sure you want to delete task '{task_to_delete}'? (y/n): ").lower()
             if confirm == 'y':
                 deleted_task = tasks.pop(task_number)
-                print(f"Task '{deleted_task.get('description', 'Task')}' deleted successfully!\n")
+                print(f"Task '{deleted_task.description}' deleted successfully!\n")
             else:
                 print("Deletion cancelled.\n")
         else:
@@ -106,56 +117,99 @@ def edit_task(tasks):
         task_number = get_valid_input("Enter the number of the task to edit: ", input_type=int) - 1
         if 0 <= task_number < len(tasks):
             task = tasks[task_number]
-            print(f"\nEditing task: {task.get('description', 'Task')}")
-            new_description = get_valid_input(f"Enter new description (leave blank to keep '{task.get('description', '')}'): ")
+            changes = {}
+            print(f"\nEditing task: {task.description}")
+            new_description = get_valid_input(f"Enter new description (leave blank to keep '{task.description}'): ")
             if new_description:
-                task['description'] = new_description
+                changes['description'] = new_description
 
-            priority = get_valid_input(f"Enter new priority (High, Medium, Low, blank to keep '{task.get('priority', 'N/A')}'): ").strip().capitalize()
+            priority = get_valid_input(f"Enter new priority (High, Medium, Low, blank to keep '{task.priority}'): ").strip().capitalize()
             if priority in ["High", "Medium", "Low", ""]:
-                task['priority'] = priority or None
+                changes['priority'] = priority or None
             elif priority is not None:
                 print("Invalid priority level.\n")
 
-            due_date = get_valid_input(f"Enter new due date (YYYY-MM-DD, blank to keep '{task.get('due_date', 'N/A')}'): ").strip()
+            due_date = get_valid_input(f"Enter new due date (YYYY-MM-DD, blank to keep '{task.due_date}'): ").strip()
             if due_date and not all(part.isdigit() and len(part) in [2, 4] for i, part in enumerate(due_date.split('-')) if i < 3 and (i == 0 and len(part) == 4 or len(part) == 2) and len(due_date.split('-')) == 3):
                 print("Invalid date format. Please use YYYY-MM-DD.\n")
             else:
-                task['due_date'] = due_date or None
+                changes['due_date'] = due_date or None
 
-            tags = get_valid_input(f"Enter new tags (comma-separated, blank to keep '{', '.join(task.get('tags', [])) if task.get('tags') else 'N/A'}'): ", input_type=list)
+            tags = get_valid_input(f"Enter new tags (comma-separated, blank to keep '{', '.join(task.tags) if task.tags else 'N/A'}'): ", input_type=list)
             if tags is not None:
-                task['tags'] = tags
+                changes['tags'] = tags
 
+            tasks.update(task_number, **changes)
             print("Task updated successfully!\n")
         else:
             print("Invalid task number. Please enter a number from the list.\n")
     except ValueError:
         print("Invalid input. Please enter a number.\n")
 
-def save_tasks(tasks, filename="todo.json"):
-    """Saves the to-do list to a JSON file."""
+def filter_tasks(tasks):
+    """Shows the tasks matching a priority, tag, status and due date filter, in a chosen order."""
+    if not tasks:
+        print("\nYour to-do list is empty!\n")
+        return
+    filters = {}
+    priority = get_valid_input("Priority (High, Medium, Low, or leave blank for any): ").strip().capitalize()
+    if priority in ["High", "Medium", "Low"]:
+        filters['priority'] = priority
+    tag = get_valid_input("Tag (leave blank for any): ")
+    if tag:
+        filters['tag'] = tag
+    status = get_valid_input("Status (open, done, or leave blank for any): ").lower()
+    if status in ["open", "done"]:
+        filters['completed'] = status == "done"
+    if get_valid_input("Only overdue tasks? (y/n): ").lower() == 'y':
+        filters['due_before'] = date.today().isoformat()
+        filters['completed'] = False
+    sort = get_valid_input("Sort by (due, priority, or leave blank for list order): ").lower()
+    filters['sort'] = sort if sort in ["due", "priority"] else "list"
+
+    matches = tasks.filter(**filters)
+    print(f"\n--- {len(matches)} matching tasks ---")
+    for task in matches:
+        print(f"{tasks.position(task) + 1}. {tasks.task_line(task)}")
+    print("-----------------------\n")
+
+def save_tasks(tasks):
+    """Saves the changes made to the to-do list since the last save."""
     try:
-        with open(filename, "w") as f:
-            json.dump(tasks, f, indent=4)
-        print(f"Tasks saved to {filename}\n")
-    except IOError:
-        print(f"Error saving tasks to {filename}\n")
+        tasks.save()
+        print(f"Tasks saved to {tasks.storage.path}\n")
+    except (IOError, sqlite3.Error):
+        print(f"Error saving tasks to {tasks.storage.path}\n")
 
 def load_tasks(filename="todo.json"):
-    """Loads the to-do list from a JSON file."""
-    tasks = []
+    """Streams the to-do list from storage in batches, showing progress for large lists."""
+    storage = open_storage(filename)
+    tasks = TaskList(storage, tasks=[], render=format_task)
+    records = storage.iter_records()
     try:
-        with open(filename, "r") as f:
-            tasks = json.load(f)
-    except FileNotFoundError:
-        print("No existing to-do list found. Starting with an empty list.\n")
+        while True:
+            batch = list(islice(records, LOAD_BATCH_SIZE))
+            tasks.extend_loaded(batch)
+            if len(batch) < LOAD_BATCH_SIZE:
+                break
+            print(f"\rLoading tasks... {len(tasks)}", end="", flush=True)
     except json.JSONDecodeError:
-        print("Error decoding the to-do list file. Starting with an empty list.\n")
+        print("\nError decoding the to-do list file. Starting with an empty list.\n")
+        return TaskList(storage, tasks=[], render=format_task)
+    if len(tasks) >= LOAD_BATCH_SIZE:
+        print(f"\rLoaded {len(tasks)} tasks.")
+    if not tasks:
+        print("No existing to-do list found. Starting with an empty list.\n")
     return tasks
 
 def main():
-    """Main function to run the to-do list application with numbered choices."""
+    """
+    Main function to run the to-do list application with numbered choices.
+    With arguments, runs one todo.py command instead (`add`, `done 3`, `ls --tag work`, ...).
+    """
+    if len(sys.argv) > 1:
+        return run_command(sys.argv[1:])
+
     todo_list = load_tasks()
 
     while True:
@@ -169,7 +223,8 @@ def main():
         print("4. Delete task")
         print("5. Edit task")
         print("6. Save tasks")
-        print("7. Exit")
+        print("7. Filter and sort tasks")
+        print("8. Exit")
 
         choice = get_valid_input("Enter your choice: ", input_type=int, error_message="Invalid choice. Please enter a number from the menu.")
 
@@ -186,6 +241,8 @@ def main():
         elif choice == 6:
             save_tasks(todo_list)
         elif choice == 7:
+            filter_tasks(todo_list)
+        elif choice == 8:
             print("Exiting the to-do list application. Goodbye!\n")
             break
         else:
@@ -194,4 +251,4 @@ def main():
         input("Press Enter to continue...")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
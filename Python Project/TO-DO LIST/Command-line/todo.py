@@ -0,0 +1,394 @@
+"""
+Scriptable to-do list commands: each run does one thing and exits.
+
+    python todo.py add "Write report" --priority High --due 2024-05-01 --tag work
+    python todo.py done 3
+    python todo.py rm 3
+    python todo.py ls [--tag work] [--priority High] [--status open] [--overdue] [--sort due]
+    python todo.py daemon      # keeps the list loaded and answers later commands
+    python todo.py stop        # stops the daemon
+
+Task numbers are list positions, as shown by `ls` and the interactive menu
+(To-Do List _command-line.py, which also runs these commands when given
+arguments). A command works on the storage directly instead of loading
+the list: with the SQLite backend, `done` and `rm` fetch the one task they
+change, `add` reads nothing and `ls` streams the rows through its filter.
+
+While a daemon runs, commands are sent to it over a Unix socket next to
+the task file and answered from the list it keeps in memory, so the task
+file is not read at all. The daemon reloads the list when another program
+changes it. Everything that is only needed without a daemon (argparse, the
+storage modules) is imported after the socket has been tried, so a command
+answered by the daemon costs little more than starting Python.
+"""
+import os
+import sys
+
+# Shared modules live in "Python Project/common".
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
+
+STORAGE_BACKEND = "sqlite"  # "sqlite" or "json"
+TASK_INDEXED_FIELDS = ("completed", "priority", "due_date")
+TASK_FILE = "todo.json"
+PRIORITY_CHOICES = ("High", "Medium", "Low")
+SORT_CHOICES = ("list", "due", "priority")
+DAEMON_TIMEOUT = 5  # Seconds the daemon waits for a client to send its command
+CLEAR_SCREEN = "\033[H\033[2J\033[3J"  # Cursor home, clear the screen and the scrollback
+
+
+def clear_screen():
+    """Clears the terminal with ANSI escape sequences instead of running a clear command."""
+    sys.stdout.write(CLEAR_SCREEN)
+    sys.stdout.flush()
+
+
+def format_task(task):
+    """Formats a task as a to-do list line. TaskList caches the result until the task changes."""
+    status = "[X]" if task.completed else "[ ]"
+    priority = f"(Priority: {task.priority})" if task.priority else ""
+    due_date = f"(Due: {task.due_date})" if task.due_date else ""
+    tags_str = f"(Tags: {', '.join(task.tags)})" if task.tags else ""
+    return f"{status} {task.description} {priority} {due_date} {tags_str}"
+
+
+def open_storage(filename=TASK_FILE):
+    """Opens the configured storage backend. The SQLite backend imports an existing JSON list on first start."""
+    import json
+    from common.storage import JsonBackend, open_sqlite
+
+    if STORAGE_BACKEND == "json":
+        return JsonBackend(filename)
+
+    def legacy_tasks():
+        try:
+            return JsonBackend(filename).load()
+        except json.JSONDecodeError:
+            print("Error decoding the old to-do list file. It was not migrated.\n")
+            return []
+
+    return open_sqlite(os.path.splitext(filename)[0] + ".db", "tasks", TASK_INDEXED_FIELDS, legacy_tasks)
+
+
+def socket_path(filename=TASK_FILE):
+    return os.path.splitext(filename)[0] + ".sock"
+
+
+class CommandError(Exception):
+    """A command that cannot be carried out, such as a task number that does not exist."""
+
+
+# --- Task sources ---
+
+class StoredTasks:
+    """Runs commands directly on a storage backend, reading only what each command needs."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def _record_at(self, number):
+        page = self.storage.page(number - 1, 1) if number >= 1 else []
+        if not page:
+            raise CommandError(f"There is no task {number}.")
+        return page[0]
+
+    def _save_replacing(self, record_id, record):
+        """Saves, with the record `record_id` replaced by `record` (None deletes it) in backends that rewrite everything."""
+        def snapshot():
+            if record is None:
+                return [stored for stored in self.storage.iter_records() if stored["id"] != record_id]
+            return [record if stored["id"] == record_id else stored for stored in self.storage.iter_records()]
+        self.storage.save(snapshot)
+
+    def add(self, task):
+        """Adds a task; returns its number."""
+        with self.storage.transaction():  # Another process must not take the same ID in between
+            task.id = str(self.storage.next_id())
+            record = task.to_dict()
+            self.storage.put(task.id, record)
+        self.storage.save(lambda: [*self.storage.iter_records(), record])
+        return self.storage.count()
+
+    def complete(self, number):
+        from common.records import Task
+        with self.storage.transaction():
+            record = self._record_at(number)
+            record["completed"] = True
+            self.storage.put(record["id"], record)
+        self._save_replacing(record["id"], record)
+        return Task.from_dict(record)
+
+    def delete(self, number):
+        from common.records import Task
+        with self.storage.transaction():
+            record = self._record_at(number)
+            self.storage.delete(record["id"])
+        self._save_replacing(record["id"], None)
+        return Task.from_dict(record)
+
+    def query(self, sort="list", **filters):
+        """Returns (number, Task) pairs for the matching tasks, streamed from storage."""
+        from common.records import Task
+        from common.task_index import sort_key, task_matches
+        matches = []
+        numbers = {}
+        for number, record in enumerate(self.storage.iter_records(), 1):
+            task = Task.from_dict(record)
+            if task_matches(task, **filters):
+                matches.append((number, task))
+                numbers[task.id] = number
+        if sort != "list":
+            key = sort_key(sort, lambda task: numbers[task.id])
+            matches.sort(key=lambda match: key(match[1]))
+        return matches
+
+
+class LoadedTasks:
+    """Runs commands on a fully loaded TaskList, for the daemon; reloads it when another program saves."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.tasks = None
+        self.reload()
+
+    def reload(self):
+        from common.tasks import TaskList
+        if self.tasks is not None:
+            self.tasks.storage.close()
+        storage = open_storage(self.filename)
+        self.tasks = TaskList(storage, render=format_task)
+        self.version = storage.version()
+
+    def check(self):
+        if self.tasks.storage.version() != self.version:
+            self.reload()
+
+    def _save(self):
+        self.tasks.save()
+        self.version = self.tasks.storage.version()
+
+    def _index(self, number):
+        if not 1 <= number <= len(self.tasks):
+            raise CommandError(f"There is no task {number}.")
+        return number - 1
+
+    def add(self, task):
+        self.tasks.add(task)
+        self._save()
+        return len(self.tasks)
+
+    def complete(self, number):
+        task = self.tasks.update(self._index(number), completed=True)
+        self._save()
+        return task
+
+    def delete(self, number):
+        task = self.tasks.pop(self._index(number))
+        self._save()
+        return task
+
+    def query(self, sort="list", **filters):
+        if not filters and sort == "list":
+            return [(number, task) for number, task in enumerate(self.tasks, 1)]
+        return [(self.tasks.position(task) + 1, task) for task in self.tasks.filter(sort=sort, **filters)]
+
+
+# --- Commands ---
+
+def build_parser():
+    import argparse
+    parser = argparse.ArgumentParser(prog="todo", description="Run one to-do list command.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="add a task")
+    add.add_argument("description")
+    add.add_argument("--priority", type=str.capitalize, choices=PRIORITY_CHOICES)
+    add.add_argument("--due", metavar="YYYY-MM-DD", help="due date")
+    add.add_argument("--tag", action="append", default=[], help="a tag (repeat for more)")
+
+    done = commands.add_parser("done", help="mark a task as complete")
+    done.add_argument("number", type=int)
+
+    rm = commands.add_parser("rm", help="delete a task")
+    rm.add_argument("number", type=int)
+
+    ls = commands.add_parser("ls", help="list tasks, optionally filtered and sorted")
+    ls.add_argument("--tag")
+    ls.add_argument("--priority", type=str.capitalize, choices=PRIORITY_CHOICES)
+    ls.add_argument("--status", choices=("open", "done"))
+    ls.add_argument("--overdue", action="store_true", help="open tasks due before today")
+    ls.add_argument("--sort", choices=SORT_CHOICES, default="list")
+
+    commands.add_parser("daemon", help="keep the list loaded and answer commands over a Unix socket")
+    commands.add_parser("stop", help="stop the daemon")
+    return parser
+
+
+def run_command(args, source):
+    """Runs a parsed add, done, rm or ls command on a task source; returns the exit status."""
+    from datetime import date
+    from common.records import Task
+
+    if args.command == "add":
+        description = args.description.strip()
+        if not description:
+            raise CommandError("The task description cannot be empty.")
+        if args.due:
+            try:
+                date.fromisoformat(args.due)
+            except ValueError:
+                raise CommandError(f"Invalid due date {args.due!r}; use YYYY-MM-DD.") from None
+        tags = [tag.strip() for value in args.tag for tag in value.split(",") if tag.strip()]
+        number = source.add(Task(description, False, args.priority, args.due or None, tags))
+        print(f"Added task {number}: {description}")
+    elif args.command == "done":
+        print(f"Completed task {args.number}: {source.complete(args.number).description}")
+    elif args.command == "rm":
+        print(f"Deleted task {args.number}: {source.delete(args.number).description}")
+    elif args.command == "ls":
+        filters = {"sort": args.sort}
+        if args.tag:
+            filters["tag"] = args.tag
+        if args.priority:
+            filters["priority"] = args.priority
+        if args.status:
+            filters["completed"] = args.status == "done"
+        if args.overdue:
+            filters["due_before"] = date.today().isoformat()
+            filters["completed"] = False
+        for number, task in source.query(**filters):
+            print(f"{number}. {format_task(task)}")
+    return 0
+
+
+def run_locally(argv, filename=TASK_FILE):
+    import sqlite3
+    args = build_parser().parse_args(argv)
+    if args.command == "daemon":
+        return serve(filename)
+    if args.command == "stop":
+        print("No daemon is running.", file=sys.stderr)
+        return 1
+    storage = open_storage(filename)
+    try:
+        return run_command(args, StoredTasks(storage))
+    except (CommandError, OSError, sqlite3.Error) as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        storage.close()
+
+
+# --- Daemon ---
+
+def connect(filename=TASK_FILE):
+    """Returns a socket connected to the daemon, or None if no daemon is listening."""
+    import socket
+    path = socket_path(filename)
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(path):
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+    except OSError:
+        client.close()
+        return None  # A socket left behind by a daemon that did not shut down cleanly
+    return client
+
+
+def send_to_daemon(argv, filename=TASK_FILE):
+    """
+    Runs a command in the daemon and prints its output. Returns the exit status,
+    or None if no daemon is listening.
+    """
+    import socket
+    client = connect(filename)
+    if client is None:
+        return None
+    with client:
+        client.sendall("\0".join(argv).encode())
+        client.shutdown(socket.SHUT_WR)
+        reply = b"".join(iter(lambda: client.recv(65536), b""))
+    status, _, output = reply.partition(b"\n")
+    sys.stdout.write(output.decode())
+    return int(status or 1)
+
+
+def serve(filename=TASK_FILE):
+    """Keeps the list loaded and runs the commands sent to its socket, one at a time, until `stop`."""
+    import io
+    import socket
+    from contextlib import redirect_stderr, redirect_stdout
+
+    if not hasattr(socket, "AF_UNIX"):
+        print("The daemon needs Unix sockets, which this system does not have.", file=sys.stderr)
+        return 1
+    path = socket_path(filename)
+    running = connect(filename)
+    if running is not None:
+        running.close()
+        print(f"A daemon is already listening on {path}.", file=sys.stderr)
+        return 1
+    if os.path.exists(path):
+        os.remove(path)
+
+    source = LoadedTasks(filename)
+    parser = build_parser()
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        server.bind(path)
+        os.chmod(path, 0o600)
+        server.listen()
+        print(f"Serving {len(source.tasks)} tasks on {path}; stop with `todo stop` or Ctrl+C.")
+        running = True
+        while running:
+            connection, _ = server.accept()
+            with connection:
+                connection.settimeout(DAEMON_TIMEOUT)
+                try:
+                    request = b"".join(iter(lambda: connection.recv(65536), b""))
+                except OSError:
+                    continue  # A client that never finished sending
+                output = io.StringIO()
+                with redirect_stdout(output), redirect_stderr(output):
+                    try:
+                        args = parser.parse_args(request.decode().split("\0"))
+                        if args.command == "stop":
+                            print("Daemon stopped.")
+                            running = False
+                            status = 0
+                        elif args.command == "daemon":
+                            print("The daemon is already running.")
+                            status = 1
+                        else:
+                            source.check()
+                            status = run_command(args, source)
+                    except SystemExit as e:  # From argparse: usage errors and --help
+                        status = e.code if isinstance(e.code, int) else 1
+                    except CommandError as e:
+                        print(e)
+                        status = 1
+                    except Exception as e:
+                        print(f"Error: {e}")
+                        status = 1
+                connection.sendall(f"{status}\n{output.getvalue()}".encode())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        if os.path.exists(path):
+            os.remove(path)
+        source.tasks.storage.close()
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] != "daemon":
+        status = send_to_daemon(argv)
+        if status is not None:
+            return status
+    return run_locally(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
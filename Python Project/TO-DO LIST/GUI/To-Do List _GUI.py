@@ -1,15 +1,70 @@
 import tkinter as tk
 from tkinter import messagebox, simpledialog
+from itertools import islice
 import json
 import os
+import sqlite3
+import sys
 from datetime import datetime
 
+# Shared modules live in "Python Project/common".
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
+from common.autosave import Autosaver
+from common.background import BackgroundTasks
+from common.storage import JsonBackend, open_sqlite
+from common.records import Task
+from common.tasks import TaskList
+
+STORAGE_BACKEND = "sqlite"  # "sqlite" or "json"
+TASK_INDEXED_FIELDS = ("completed", "priority", "due_date")
+LOAD_BATCH_SIZE = 2000
+LOAD_QUEUE_BATCHES = 2  # Loaded batches buffered between the storage thread and the UI
+STORAGE_LANE = "storage"  # Every storage read and write runs on this one background thread, in order
+SORT_ORDERS = {"List order": "list", "Due date": "due", "Priority": "priority"}
+
+def format_task(task):
+    """Formats a task as a listbox line. TaskList caches the result until the task changes."""
+    status = "[X]" if task.completed else "[ ]"
+    priority = f"(P:{task.priority})" if task.priority else ""
+    due_date = f"(D:{task.due_date})" if task.due_date else ""
+    tags_str = f"(T:{', '.join(task.tags)})" if task.tags else ""
+    return f"{status} {task.description} {priority} {due_date} {tags_str}"
+
 class TodoGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("To-Do List")
 
-        self.tasks = self.load_tasks()
+        self.loading = False
+        self.status_text = tk.StringVar()
+        self.background = BackgroundTasks(root)
+        self.load_task = None
+        self.autosave = None  # Started once the tasks are loaded
+        self.confirm_save = False  # "Save Tasks" was pressed: report how the save went
+        self.filters = None  # Active TaskList.filter() arguments, or None to show every task
+        self.view = None  # Tasks shown in the listbox while a filter is active
+
+        # --- Filter bar ---
+        self.filter_frame = tk.Frame(self.root)
+        self.filter_frame.pack(pady=(10, 0))
+
+        self.filter_priority = tk.StringVar(value="Any")
+        self.filter_status = tk.StringVar(value="Any")
+        self.filter_tag = tk.StringVar()
+        self.filter_overdue = tk.BooleanVar(value=False)
+        self.sort_order = tk.StringVar(value="List order")
+
+        tk.Label(self.filter_frame, text="Priority:").pack(side=tk.LEFT)
+        tk.OptionMenu(self.filter_frame, self.filter_priority, "Any", "High", "Medium", "Low").pack(side=tk.LEFT)
+        tk.Label(self.filter_frame, text="Status:").pack(side=tk.LEFT)
+        tk.OptionMenu(self.filter_frame, self.filter_status, "Any", "Open", "Completed").pack(side=tk.LEFT)
+        tk.Label(self.filter_frame, text="Tag:").pack(side=tk.LEFT)
+        tk.Entry(self.filter_frame, textvariable=self.filter_tag, width=10).pack(side=tk.LEFT)
+        tk.Checkbutton(self.filter_frame, text="Overdue", variable=self.filter_overdue).pack(side=tk.LEFT)
+        tk.Label(self.filter_frame, text="Sort:").pack(side=tk.LEFT)
+        tk.OptionMenu(self.filter_frame, self.sort_order, *SORT_ORDERS).pack(side=tk.LEFT)
+        tk.Button(self.filter_frame, text="Apply", command=self.apply_filter).pack(side=tk.LEFT, padx=2)
+        tk.Button(self.filter_frame, text="Clear", command=self.clear_filter).pack(side=tk.LEFT, padx=2)
 
         self.task_list_frame = tk.Frame(self.root)
         self.task_list_frame.pack(pady=10)
@@ -38,53 +93,215 @@ class TodoGUI:
         tk.Button(self.button_frame, text="Delete Task", command=self.delete_task).pack(side=tk.LEFT, padx=5)
         tk.Button(self.button_frame, text="Save Tasks", command=self.save_tasks).pack(side=tk.LEFT, padx=5)
 
-        self.update_task_list()
+        tk.Label(self.root, textvariable=self.status_text, anchor=tk.W).pack(fill=tk.X, padx=5)
+
+        self.load_tasks()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def open_storage(self, filename="todo_gui.json"):
+        """Opens the configured storage backend. The SQLite backend imports an existing JSON list on first start."""
+        if STORAGE_BACKEND == "json":
+            return JsonBackend(filename)
+
+        def legacy_tasks():
+            try:
+                return JsonBackend(filename).load()
+            except json.JSONDecodeError:
+                self.background.call_soon(messagebox.showerror, "Error",
+                                          "Error decoding the old to-do list file. It was not migrated.")
+                return []
+
+        return open_sqlite(os.path.splitext(filename)[0] + ".db", "tasks", TASK_INDEXED_FIELDS, legacy_tasks)
 
     def load_tasks(self, filename="todo_gui.json"):
-        """Loads tasks from a JSON file."""
-        tasks = []
-        try:
-            with open(filename, "r") as f:
-                tasks = json.load(f)
-        except FileNotFoundError:
-            pass
-        except json.JSONDecodeError:
-            messagebox.showerror("Error", "Error decoding the to-do list file.")
-        return tasks
-
-    def save_tasks(self, filename="todo_gui.json"):
-        """Saves tasks to a JSON file."""
-        try:
-            with open(filename, "w") as f:
-                json.dump(self.tasks, f, indent=4)
+        """
+        Streams tasks from storage into the list in batches.
+        Storage is opened and read on the storage thread; each batch is added
+        from an after() callback, so the window and the first tasks appear
+        immediately while the rest keep loading. If the list cannot be
+        opened, it is left empty and the user may retry.
+        """
+        self.tasks = TaskList(None, tasks=[], render=format_task)  # Gets its storage once loading is done
+        self.loading = True
+        self.status_text.set("Loading tasks...")
+
+        def read(task):
+            storage = self.open_storage(filename)
+            records = storage.iter_records()
+            try:
+                for batch in iter(lambda: list(islice(records, LOAD_BATCH_SIZE)), []):
+                    task.report(batch)
+            except json.JSONDecodeError:
+                self.background.call_soon(messagebox.showerror, "Error", "Error decoding the to-do list file.")
+            except BaseException:
+                storage.close()
+                raise
+            return storage
+
+        def add_batch(batch):
+            start = len(self.tasks)
+            self.tasks.extend_loaded(batch)
+            for index in range(start, len(self.tasks)):
+                self.insert_task_line(index)
+            self.status_text.set(f"Loading tasks... {len(self.tasks)} so far")
+
+        def loaded(storage):
+            self.tasks.storage = storage
+            self.autosave = Autosaver(self.background, self.tasks.begin_save, STORAGE_LANE,
+                                      on_saved=self.saved, on_error=self.save_failed)
+            self.loading = False
+            self.update_status()
+
+        def failed(error):
+            # Drop what was read before the error; edits could not be saved anyway.
+            self.tasks = TaskList(None, tasks=[], render=format_task)
+            self.update_task_list()
+            self.loading = False
+            self.status_text.set("Could not open the to-do list.")
+            if messagebox.askretrycancel("Error", f"Could not open the to-do list: {error}"):
+                self.load_tasks(filename)
+
+        self.load_task = self.background.submit(read, on_progress=add_batch, max_pending=LOAD_QUEUE_BATCHES,
+                                                on_done=loaded, on_error=failed, lane=STORAGE_LANE)
+
+    def still_loading(self):
+        """
+        Tells the user to wait if tasks are still loading, or offers to retry
+        if they could not be opened. Returns True in either case.
+        """
+        if self.loading:
+            messagebox.showinfo("Please wait", "Tasks are still loading.")
+        elif self.tasks.storage is None:
+            if messagebox.askretrycancel("Error", "The to-do list could not be opened."):
+                self.load_tasks()
+        return self.tasks.storage is None
+
+    def save_tasks(self):
+        """
+        Saves the changes made so far right away instead of waiting for the
+        autosave. The changes are taken here and written on the storage thread.
+        """
+        if self.still_loading():
+            return
+        self.confirm_save = True
+        self.autosave.save_now()
+
+    def saved(self):
+        if self.confirm_save:
+            self.confirm_save = False
             messagebox.showinfo("Info", "Tasks saved successfully!")
-        except IOError:
+
+    def save_failed(self, error):
+        if not isinstance(error, (IOError, sqlite3.Error)):
+            raise error
+        self.status_text.set(f"Autosave failed, retrying: {error}")
+        if self.confirm_save:
+            self.confirm_save = False
             messagebox.showerror("Error", "Error saving tasks.")
 
+    def on_close(self):
+        """Cancels loading, writes unsaved changes and waits for the writes, then closes the window."""
+        if self.load_task is not None:
+            self.load_task.cancel()
+        if self.autosave is not None:
+            self.autosave.close()
+        self.background.shutdown()
+        if self.tasks.storage is not None:
+            self.tasks.storage.close()
+        self.root.destroy()
+
     def update_task_list(self):
-        """Updates the listbox with the current tasks."""
+        """Updates the listbox with the current tasks, or the tasks matching the active filter."""
         self.task_list.delete(0, tk.END)
-        for i, task in enumerate(self.tasks):
-            status = "[X]" if task.get('completed', False) else "[ ]"
-            description = task.get('description', 'No description')
-            priority = f"(P:{task.get('priority', 'N/A')})" if task.get('priority') else ""
-            due_date = f"(D:{task.get('due_date', 'N/A')})" if task.get('due_date') else ""
-            tags_str = f"(T:{', '.join(task.get('tags', []))})" if task.get('tags') else ""
-            self.task_list.insert(tk.END, f"{status} {description} {priority} {due_date} {tags_str}")
-            if task.get('completed'):
-                self.task_list.itemconfig(i, fg="gray")
+        if self.filters is None:
+            self.view = None
+            for i in range(len(self.tasks)):
+                self.insert_task_line(i)
+        else:
+            self.view = self.tasks.filter(**self.filters)
+            for row, task in enumerate(self.view):
+                self.insert_row(row, task)
+        self.update_status()
+
+    def insert_task_line(self, index):
+        """Inserts the listbox line for the task at the given index."""
+        self.insert_row(index, self.tasks[index])
+
+    def insert_row(self, row, task):
+        self.task_list.insert(row, self.tasks.task_line(task))
+        if task.completed:
+            self.task_list.itemconfig(row, fg="gray")
+
+    def refresh_task_line(self, index):
+        """
+        Re-renders only the listbox line of the task at the given index, keeping it selected.
+        While a filter is active the view is re-queried instead, as the task may no longer match.
+        """
+        if self.view is not None:
+            self.update_task_list()
+            return
+        self.task_list.delete(index)
+        self.insert_task_line(index)
+        self.task_list.selection_set(index)
+        self.update_status()
+
+    def update_status(self):
+        status = f"{len(self.tasks)} tasks, {self.tasks.completed_count} completed"
+        if self.view is not None:
+            status = f"Showing {len(self.view)} of {status}"
+        self.status_text.set(status)
+
+    def selected_index(self):
+        """Returns the task list position of the selected row, or None if nothing is selected."""
+        selection = self.task_list.curselection()
+        if not selection:
+            return None
+        if self.view is None:
+            return selection[0]
+        return self.tasks.position(self.view[selection[0]])
+
+    def apply_filter(self):
+        """Shows the tasks matching the filter bar, answered from the task indexes."""
+        if self.still_loading():
+            return
+        filters = {}
+        if self.filter_priority.get() != "Any":
+            filters['priority'] = self.filter_priority.get()
+        if self.filter_status.get() != "Any":
+            filters['completed'] = self.filter_status.get() == "Completed"
+        tag = self.filter_tag.get().strip()
+        if tag:
+            filters['tag'] = tag
+        if self.filter_overdue.get():
+            filters['due_before'] = datetime.now().strftime("%Y-%m-%d")
+            filters['completed'] = False
+        sort = SORT_ORDERS[self.sort_order.get()]
+        if filters or sort != "list":
+            filters['sort'] = sort
+            self.filters = filters
+        else:
+            self.filters = None
+        self.update_task_list()
+
+    def clear_filter(self):
+        """Resets the filter bar and shows every task."""
+        self.filter_priority.set("Any")
+        self.filter_status.set("Any")
+        self.filter_tag.set("")
+        self.filter_overdue.set(False)
+        self.sort_order.set("List order")
+        self.apply_filter()
 
     def show_task_details(self, event):
         """Shows detailed information about the selected task."""
-        selected_index = self.task_list.curselection()
-        if selected_index:
-            index = selected_index[0]
+        index = self.selected_index()
+        if index is not None:
             task = self.tasks[index]
-            details = f"Description: {task.get('description', 'N/A')}\n"
-            details += f"Priority: {task.get('priority', 'N/A')}\n"
-            details += f"Due Date: {task.get('due_date', 'N/A')}\n"
-            details += f"Tags: {', '.join(task.get('tags', []))}\n"
-            details += f"Completed: {'Yes' if task.get('completed', False) else 'No'}"
+            details = f"Description: {task.description}\n"
+            details += f"Priority: {task.priority}\n"
+            details += f"Due Date: {task.due_date}\n"
+            details += f"Tags: {', '.join(task.tags)}\n"
+            details += f"Completed: {'Yes' if task.completed else 'No'}"
             self.details_text.config(state=tk.NORMAL)
             self.details_text.delete("1.0", tk.END)
             self.details_text.insert(tk.END, details)
@@ -92,6 +309,8 @@ class TodoGUI:
 
     def add_task(self):
         """Opens a dialog to add a new task."""
+        if self.still_loading():
+            return
         add_window = tk.Toplevel(self.root)
         add_window.title("Add New Task")
 
@@ -120,46 +339,52 @@ class TodoGUI:
             due_date = due_date_entry.get().strip()
             tags = [tag.strip() for tag in tags_entry.get().split(',') if tag.strip()]
 
-            self.tasks.append({'description': description, 'completed': False, 'priority': priority, 'due_date': due_date, 'tags': tags})
-            self.update_task_list()
+            self.tasks.add(Task(description, False, priority, due_date, tags))
+            self.autosave.changed()
+            if self.view is None:
+                self.insert_task_line(len(self.tasks) - 1)
+                self.update_status()
+            else:
+                self.update_task_list()
             add_window.destroy()
 
         tk.Button(add_window, text="Save", command=save_new_task).grid(row=4, column=0, columnspan=2, pady=10)
 
     def edit_task(self):
         """Opens a dialog to edit the selected task."""
-        selected_index = self.task_list.curselection()
-        if not selected_index:
+        if self.still_loading():
+            return
+        index = self.selected_index()
+        if index is None:
             messagebox.showerror("Error", "Please select a task to edit.")
             return
 
-        index = selected_index[0]
-        task = self.tasks[index].copy()  # Edit a copy to avoid direct modification
+        task = self.tasks[index]  # Changes are applied through self.tasks.update() on save
 
         edit_window = tk.Toplevel(self.root)
         edit_window.title("Edit Task")
 
         tk.Label(edit_window, text="Description:").grid(row=0, column=0, padx=5, pady=5, sticky=tk.W)
         description_entry = tk.Entry(edit_window, width=40)
-        description_entry.insert(0, task.get('description', ''))
+        description_entry.insert(0, task.description)
         description_entry.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
 
         tk.Label(edit_window, text="Priority:").grid(row=1, column=0, padx=5, pady=5, sticky=tk.W)
         priority_entry = tk.Entry(edit_window, width=40)
-        priority_entry.insert(0, task.get('priority', ''))
+        priority_entry.insert(0, task.priority or '')
         priority_entry.grid(row=1, column=1, padx=5, pady=5, sticky="ew")
 
         tk.Label(edit_window, text="Due Date (YYYY-MM-DD):").grid(row=2, column=0, padx=5, pady=5, sticky=tk.W)
         due_date_entry = tk.Entry(edit_window, width=40)
-        due_date_entry.insert(0, task.get('due_date', ''))
+        due_date_entry.insert(0, task.due_date or '')
         due_date_entry.grid(row=2, column=1, padx=5, pady=5, sticky="ew")
 
         tk.Label(edit_window, text="Tags (comma-separated):").grid(row=3, column=0, padx=5, pady=5, sticky=tk.W)
         tags_entry = tk.Entry(edit_window, width=40)
-        tags_entry.insert(0, ', '.join(task.get('tags', [])))
+        tags_entry.insert(0, ', '.join(task.tags))
         tags_entry.grid(row=3, column=1, padx=5, pady=5, sticky="ew")
 
-        completed_var = tk.BooleanVar(value=task.get('completed', False))
+        completed_var = tk.BooleanVar(value=task.completed)
         completed_check = tk.Checkbutton(edit_window, text="Completed", variable=completed_var)
         completed_check.grid(row=4, column=0, columnspan=2, pady=5)
 
@@ -173,33 +398,47 @@ class TodoGUI:
             tags = [tag.strip() for tag in tags_entry.get().split(',') if tag.strip()]
             completed = completed_var.get()
 
-            self.tasks[index] = {'description': description, 'completed': completed, 'priority': priority, 'due_date': due_date, 'tags': tags}
-            self.update_task_list()
+            if task not in self.tasks:
+                messagebox.showerror("Error", "This task was deleted while it was being edited.", parent=edit_window)
+                edit_window.destroy()
+                return
+            position = self.tasks.position(task)  # Other tasks may have been deleted meanwhile
+            self.tasks.update(position, description=description, completed=completed, priority=priority, due_date=due_date, tags=tags)
+            self.autosave.changed()
+            self.refresh_task_line(position)
             edit_window.destroy()
 
         tk.Button(edit_window, text="Save", command=save_edited_task).grid(row=5, column=0, columnspan=2, pady=10)
 
     def mark_complete(self):
         """Marks the selected task as complete."""
-        selected_index = self.task_list.curselection()
-        if not selected_index:
+        if self.still_loading():
+            return
+        index = self.selected_index()
+        if index is None:
             messagebox.showerror("Error", "Please select a task to mark as complete.")
             return
-        index = selected_index[0]
-        self.tasks[index]['completed'] = not self.tasks[index].get('completed', False)
-        self.update_task_list()
+        self.tasks.update(index, completed=not self.tasks[index].completed)
+        self.autosave.changed()
+        self.refresh_task_line(index)
 
     def delete_task(self):
         """Deletes the selected task after confirmation."""
-        selected_index = self.task_list.curselection()
-        if not selected_index:
+        if self.still_loading():
+            return
+        index = self.selected_index()
+        if index is None:
             messagebox.showerror("Error", "Please select a task to delete.")
             return
-        index = selected_index[0]
-        task_to_delete = self.tasks[index].get('description', 'Task')
+        task_to_delete = self.tasks[index].description
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete '{task_to_delete}'?"):
-            del self.tasks[index]
-            self.update_task_list()
+            self.tasks.pop(index)
+            self.autosave.changed()
+            if self.view is None:
+                self.task_list.delete(index)
+                self.update_status()
+            else:
+                self.update_task_list()
             self.details_text.config(state=tk.NORMAL)
             self.details_text.delete("1.0", tk.END)
             self.details_text.config(state=tk.DISABLED)
@@ -0,0 +1,69 @@
+"""
+Times the calculator's numeric backends on workloads with long operands:
+sums and products of 40-digit integers (the exact backends' int fast path),
+long division, a polynomial with decimal fractions, and a big power.
+
+Usage: python bench_calculator_backends.py [evaluations per workload]   (default 20,000)
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Calculator"))
+from expression import compile_expression
+from numeric import make_backend
+
+BACKENDS = [
+    ("float", make_backend("float")),
+    ("decimal, 28 digits", make_backend("decimal", 28)),
+    ("decimal, 100 digits", make_backend("decimal", 100)),
+    ("fraction", make_backend("fraction")),
+]
+# (label, expression, operand digits before the point, digits after it)
+WORKLOADS = [
+    ("integer sum and product", "a * b + a - b", 40, 0),
+    ("long division", "a / b", 40, 0),
+    ("decimal polynomial", "a * b^2 + 3.25 * b - a / 7", 20, 10),
+    ("big power", "a ^ 25", 12, 0),
+]
+
+
+def operands(count, whole_digits, fraction_digits, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        row = []
+        for _ in range(2):
+            text = str(rng.randrange(10 ** (whole_digits - 1), 10 ** whole_digits))
+            if fraction_digits:
+                text += "." + str(rng.randrange(10 ** fraction_digits)).zfill(fraction_digits)
+            row.append(text)
+        rows.append(row)
+    return rows
+
+
+def run(backend, expression, rows):
+    """Returns the seconds taken to parse `rows` and evaluate `expression` on each."""
+    start = time.perf_counter()
+    for a, b in rows:
+        backend.evaluate(expression, {"a": backend.parse(a), "b": backend.parse(b)})
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    print(f"{count:,} evaluations per workload\n")
+    print(f"{'Workload':<26}" + "".join(f"{label:>22}" for label, _ in BACKENDS))
+    for label, text, whole_digits, fraction_digits in WORKLOADS:
+        expression = compile_expression(text)
+        rows = operands(count, whole_digits, fraction_digits)
+        cells = []
+        for _, backend in BACKENDS:
+            seconds = run(backend, expression, rows)
+            cells.append(f"{count / seconds:>14,.0f} eval/s")
+        print(f"{label:<26}" + "".join(f"{cell:>22}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Times duplicate detection on a synthetic contact book in which a share of
+contacts has a near-duplicate (typo in the name, reformatted phone number,
+differently cased email), and checks how many of those are found.
+
+Usage: python bench_dedup.py [contact count] [workers]   (default 500,000, CPU count)
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Contact Book"))
+from common.records import Contact
+from contact_dedup import candidate_blocks, find_duplicates
+
+DUPLICATE_SHARE = 0.05
+FIRST_NAMES = ["James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda", "William", "Elizabeth",
+               "David", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen",
+               "Priya", "Arjun", "Naveen", "Ananya", "Wei", "Mei", "Hiroshi", "Yuki", "Olga", "Ivan"]
+SYLLABLES = ["ka", "ro", "mi", "ta", "ne", "lo", "vi", "sa", "du", "re", "po", "zi", "han", "berg", "son", "ley"]
+
+
+def make_book(count, seed=0):
+    rng = random.Random(seed)
+    book = []
+    planted = []  # (original id, duplicate id)
+    while len(book) < count:
+        last = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        first = rng.choice(FIRST_NAMES)
+        number = f"{rng.randint(200, 999)}{rng.randint(0, 9999999):07d}"
+        contact = Contact(f"{first} {last}", f"({number[:3]}) {number[3:6]}-{number[6:]}",
+                          f"{first}.{last}{rng.randint(1, 99)}@example.com".lower(), f"{rng.randint(1, 9999)} Main St")
+        book.append((str(len(book) + 1), contact))
+        if rng.random() < DUPLICATE_SHARE and len(book) < count:
+            name = list(contact.name)
+            position = rng.randrange(1, len(name))
+            name[position] = rng.choice("aeiou")
+            copy = Contact("".join(name), "+1 " + number, contact.email.upper() if rng.random() < 0.5 else "", "")
+            book.append((str(len(book) + 1), copy))
+            planted.append((book[-2][0], book[-1][0]))
+    return book, planted
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    book, planted = make_book(count)
+    print(f"{count:,} contacts, {len(planted):,} planted duplicates, {workers or os.cpu_count()} worker(s)")
+
+    start = time.perf_counter()
+    blocks, _ = candidate_blocks(book)
+    pairs = sum(len(ids) * (len(ids) - 1) // 2 for ids in blocks)
+    del blocks
+    print(f"Blocking:        {time.perf_counter() - start:6.2f} s  {pairs:,} candidate pairs "
+          f"instead of {count * (count - 1) // 2:,}")
+
+    start = time.perf_counter()
+    groups = find_duplicates(book, workers=workers)
+    elapsed = time.perf_counter() - start
+    found = sum(len(group.ids) - 1 for group in groups)
+    print(f"Full detection:  {elapsed:6.2f} s  {len(groups):,} groups, {found:,} duplicates")
+    # A planted duplicate counts as found only if it landed in the same group as its original.
+    group_of = {contact_id: number for number, group in enumerate(groups) for contact_id in group.ids}
+    recalled = sum(1 for original, copy in planted if original in group_of and group_of.get(copy) == group_of[original])
+    print(f"Recall of planted duplicates: {recalled / len(planted):.1%}" if planted else "")
+
+
+if __name__ == "__main__":
+    main()
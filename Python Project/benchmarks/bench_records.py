@@ -0,0 +1,103 @@
+"""
+Compares the memory and throughput of plain dicts, slotted Task/Contact
+records and the TaskColumns column store.
+
+Usage: python bench_records.py [record count]   (default 1,000,000)
+"""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from common.records import Contact, Task, TaskColumns
+
+PRIORITY_CYCLE = ("High", "Medium", "Low", None)
+TAG_CYCLE = (["work"], ["home", "errands"], [], ["work", "urgent"])
+
+
+def task_dicts(count):
+    # Field values are rebuilt per record, as json.load would produce them.
+    for i in range(count):
+        priority = PRIORITY_CYCLE[i % 4]
+        yield {'description': f"Task number {i}", 'completed': i % 3 == 0,
+               'priority': "".join(priority) if priority else None,
+               'due_date': f"2026-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+               'tags': ["".join(tag) for tag in TAG_CYCLE[i % 4]], 'id': str(i + 1)}
+
+
+def contact_dicts(count):
+    for i in range(count):
+        yield {"name": f"Contact {i}", "phone": f"555-{i:07d}", "email": f"user{i}@example.com", "address": ""}
+
+
+# tracemalloc slows allocation-heavy code several times over, so memory is
+# measured on a separate, smaller build and scaled up.
+MEMORY_SAMPLE = 100_000
+
+
+def measure(label, build, use, count):
+    """Builds a collection, reporting the memory it holds and the time to build and use it."""
+    sample = min(count, MEMORY_SAMPLE)
+    gc.collect()
+    tracemalloc.start()
+    collection = build(sample)
+    memory = tracemalloc.get_traced_memory()[0] * count / sample
+    tracemalloc.stop()
+    del collection
+
+    gc.collect()
+    start = time.perf_counter()
+    collection = build(count)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    use(collection)
+    use_time = time.perf_counter() - start
+    print(f"{label:<28} {memory / 1e6:>9.1f} MB {build_time:>9.2f} s {use_time:>9.2f} s")
+    del collection
+
+
+def render_dicts(tasks):
+    for task in tasks:
+        status = "[X]" if task.get('completed', False) else "[ ]"
+        priority = f"(P:{task.get('priority', 'N/A')})" if task.get('priority') else ""
+        tags = f"(T:{', '.join(task.get('tags', []))})" if task.get('tags') else ""
+        f"{status} {task.get('description', 'No description')} {priority} {tags}"
+
+
+def render_records(tasks):
+    for task in tasks:
+        status = "[X]" if task.completed else "[ ]"
+        priority = f"(P:{task.priority})" if task.priority else ""
+        tags = f"(T:{', '.join(task.tags)})" if task.tags else ""
+        f"{status} {task.description} {priority} {tags}"
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"{count:,} records; memory held (scaled from {min(count, MEMORY_SAMPLE):,}), build time,")
+    print("then render time (tasks) or field scan (contacts)\n")
+    print(f"{'Representation':<28} {'Memory':>12} {'Build':>11} {'Use':>11}")
+
+    measure("Task dicts", lambda n: list(task_dicts(n)), render_dicts, count)
+    measure("Task records (__slots__)", lambda n: [Task.from_dict(d) for d in task_dicts(n)], render_records, count)
+    measure("TaskColumns", lambda n: TaskColumns(task_dicts(n)), render_records, count)
+    measure("Task dicts completed count", lambda n: list(task_dicts(n)),
+            lambda tasks: sum(1 for task in tasks if task.get('completed', False)), count)
+    measure("TaskColumns completed count", lambda n: TaskColumns(task_dicts(n)), lambda c: c.completed_count(), count)
+
+    measure("Contact dicts", lambda n: list(contact_dicts(n)),
+            lambda contacts: [contact.get("name", "") for contact in contacts], count)
+    measure("Contact records (__slots__)", lambda n: [Contact.from_dict(d) for d in contact_dicts(n)],
+            lambda contacts: [contact.name for contact in contacts], count)
+
+    # Round trip through the JSON layout must be lossless.
+    sample = list(task_dicts(1000))
+    assert [Task.from_dict(d).to_dict() for d in sample] == sample
+    assert TaskColumns(sample).to_dicts() == sample
+
+
+if __name__ == "__main__":
+    main()
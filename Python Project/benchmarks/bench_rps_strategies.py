@@ -0,0 +1,116 @@
+"""
+Round-robin tournament of the Rock-Paper-Scissors strategies against each
+other and against scripted opponents (cycling, biased, copying). Each
+match is played in two halves on the same strategy objects. Similar times
+per round in both halves show that move latency does not grow with the
+history. Matches run in a process pool.
+
+Usage: python bench_rps_strategies.py [rounds per match] [workers]   (default 1,000,000, CPU count)
+"""
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Rock-Paper-Scissors Game"))
+from rps_strategies import STRATEGIES, make_strategy, play_match
+
+
+class CycleBot:
+    """Rock, paper, scissors, rock, ..."""
+
+    def __init__(self, rng):
+        self.move = 2
+
+    def choose(self):
+        self.move = (self.move + 1) % 3
+        return self.move
+
+    def observe(self, opponent, own):
+        pass
+
+
+class BiasedBot:
+    """Rock half of the time, otherwise random."""
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def choose(self):
+        return 0 if self.rng.random() < 0.5 else self.rng.randrange(3)
+
+    def observe(self, opponent, own):
+        pass
+
+
+class CopyBot:
+    """Plays the opponent's previous move."""
+
+    def __init__(self, rng):
+        self.last = rng.randrange(3)
+
+    def choose(self):
+        return self.last
+
+    def observe(self, opponent, own):
+        self.last = opponent
+
+
+OPPONENTS = {"cycle": CycleBot, "biased": BiasedBot, "copy": CopyBot}
+
+
+def make_player(name, seed):
+    rng = random.Random(seed)
+    if name in OPPONENTS:
+        return OPPONENTS[name](rng)
+    return make_strategy(name, rng)
+
+
+def run_match(first, second, rounds, seed):
+    """Returns (wins, losses, rounds, seconds of the first half, seconds of the second half)."""
+    a, b = make_player(first, seed), make_player(second, seed + 1)
+    half = rounds // 2
+    wins = losses = 0
+    times = []
+    for size in (half, rounds - half):
+        start = time.perf_counter()
+        stats = play_match(a, b, size)
+        times.append(time.perf_counter() - start)
+        wins += stats.wins
+        losses += stats.losses
+    return wins, losses, rounds, times[0], times[1]
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    strategies = list(STRATEGIES)
+    opponents = strategies + list(OPPONENTS)
+    matches = [(first, second) for first in strategies for second in opponents]
+    print(f"{rounds:,} rounds per match, {len(matches)} matches, {workers} workers\n")
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_match, first, second, rounds, seed) for seed, (first, second) in enumerate(matches)]
+        results = dict(zip(matches, (future.result() for future in futures)))
+    elapsed = time.perf_counter() - start
+
+    print("Net win rate (wins - losses) / rounds, row strategy against column opponent")
+    print(f"{'':<11}" + "".join(f"{name:>10}" for name in opponents) + f"{'us/round':>20}")
+    for first in strategies:
+        cells = []
+        halves = [0.0, 0.0]
+        for second in opponents:
+            wins, losses, played, first_half, second_half = results[first, second]
+            cells.append(f"{(wins - losses) / played:>+10.3f}")
+            halves[0] += first_half / (played // 2)
+            halves[1] += second_half / (played - played // 2)
+        latency = f"{halves[0] / len(opponents) * 1e6:.2f} -> {halves[1] / len(opponents) * 1e6:.2f}"
+        print(f"{first:<11}" + "".join(cells) + f"{latency:>20}")
+    total = len(matches) * rounds
+    print(f"\n{total:,} rounds in {elapsed:.1f} s ({total / elapsed:,.0f} rounds/s)")
+
+
+if __name__ == "__main__":
+    main()
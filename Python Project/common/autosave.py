@@ -0,0 +1,108 @@
+"""
+Debounced autosave for the tkinter apps.
+
+The app calls changed() after every edit. A save starts once edits have
+stopped for `delay_ms`, or `max_delay_ms` after the first unsaved edit if
+they never stop, so a burst of edits becomes one write and no edit stays
+unsaved for longer than that. The write runs as a background task on the
+storage lane; edits made while it runs are picked up by one more write
+when it finishes.
+"""
+import time
+
+AUTOSAVE_DELAY_MS = 1000
+AUTOSAVE_MAX_DELAY_MS = 10_000
+
+
+class Autosaver:
+    """
+    Saves through `begin_save()`, which captures the changes on the Tk thread
+    and returns a function that writes them (see StorageBackend.begin_save).
+    `on_saved()` is called when every change so far is written and
+    `on_error(exception)` when a write fails; a failed save is retried
+    after `max_delay_ms`.
+    """
+
+    def __init__(self, background, begin_save, lane, delay_ms=AUTOSAVE_DELAY_MS, max_delay_ms=AUTOSAVE_MAX_DELAY_MS,
+                 on_saved=None, on_error=None):
+        self.background = background
+        self.root = background.root
+        self.begin_save = begin_save
+        self.lane = lane
+        self.delay_ms = delay_ms
+        self.max_delay_ms = max_delay_ms
+        self.on_saved = on_saved
+        self.on_error = on_error
+        self.dirty = False
+        self._deadline = None  # time.monotonic() by which the oldest unsaved change must be saving
+        self._timer = None
+        self._writing = False
+        self._again = False  # Changes arrived while a write was running
+
+    def changed(self):
+        """Records that the store has unsaved changes and (re)starts the save timer."""
+        self.dirty = True
+        now = time.monotonic()
+        if self._deadline is None:
+            self._deadline = now + self.max_delay_ms / 1000
+        self._schedule(min(self.delay_ms, (self._deadline - now) * 1000))
+
+    def save_now(self):
+        """Starts writing every change so far, or right after the running write if there is one."""
+        self._cancel_timer()
+        if not self.dirty:
+            if not self._writing and self.on_saved is not None:
+                self.on_saved()
+            return
+        if self._writing:
+            self._again = True
+            return
+        self._write()
+
+    def close(self):
+        """
+        Queues a write of any unsaved changes without waiting for callbacks.
+        Call it before BackgroundTasks.shutdown(), which waits for the write.
+        """
+        self._cancel_timer()
+        if self.dirty:
+            write = self.begin_save()
+            self.dirty = False
+            self.background.submit(lambda task: write(), lane=self.lane)
+
+    def _write(self):
+        write = self.begin_save()
+        self.dirty = False
+        self._deadline = None
+        self._writing = True
+        self.background.submit(lambda task: write(), on_done=self._written, on_error=self._failed, lane=self.lane)
+
+    def _written(self, result):
+        self._writing = False
+        if self._again:
+            self._again = False
+            self.save_now()
+        elif not self.dirty and self.on_saved is not None:
+            self.on_saved()
+
+    def _failed(self, error):
+        self._writing = False
+        self._again = False
+        self.dirty = True  # The backends keep the changes of a failed write for the next one
+        self._deadline = None
+        self._schedule(self.max_delay_ms)
+        if self.on_error is not None:
+            self.on_error(error)
+
+    def _schedule(self, delay_ms):
+        self._cancel_timer()
+        self._timer = self.root.after(max(0, int(delay_ms)), self._fire)
+
+    def _fire(self):
+        self._timer = None
+        self.save_now()
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self.root.after_cancel(self._timer)
+            self._timer = None
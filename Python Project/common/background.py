@@ -0,0 +1,173 @@
+"""
+Background work for the tkinter apps.
+
+Tk widgets may only be used from the thread running mainloop(). BackgroundTasks
+runs slow work (file I/O, JSON encoding, big computations) on worker
+threads and hands everything that comes back (progress values, results,
+errors, and calls scheduled with call_soon()) to a queue. The Tk thread
+drains that queue from an after() callback, so every callback runs on
+the Tk thread and may update widgets. The queue is only polled while
+tasks are outstanding.
+
+Work submitted to the same named lane runs one task at a time in
+submission order, on one thread. The apps put all their storage work on
+one lane, so saves never overlap or overtake each other.
+"""
+import queue
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+POLL_MS = 50
+WORKERS = 2
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task's work when it has been cancelled."""
+
+
+class TaskHandle:
+    """
+    One submitted task. Its work receives the handle to report progress and to
+    notice cancellation; the Tk thread uses it to cancel the task.
+    """
+
+    def __init__(self, tasks, on_progress=None, max_pending=None):
+        self._tasks = tasks
+        self._on_progress = on_progress
+        self._cancel = threading.Event()
+        # Bounds the progress values queued for the Tk thread; report() waits for a free slot.
+        self._slots = threading.Semaphore(max_pending) if max_pending else None
+        self.future = None
+
+    def cancel(self):
+        """Asks the task to stop. Its callbacks are not called once it has been cancelled."""
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def raise_if_cancelled(self):
+        """Raises TaskCancelled if the task was cancelled or the tasks were shut down; for use by the work."""
+        if self._cancel.is_set() or self._tasks.closed:
+            raise TaskCancelled()
+
+    def report(self, value):
+        """
+        Sends a progress value to the task's on_progress callback; for use by
+        the work. Values arrive in order and before the result. With
+        `max_pending`, waits while that many are still undelivered. Raises
+        TaskCancelled if the task was cancelled.
+        """
+        self.raise_if_cancelled()
+        if self._slots is not None:
+            while not self._slots.acquire(timeout=0.1):
+                self.raise_if_cancelled()
+        self._tasks._results.put((self._deliver_progress, value))
+
+    def _deliver_progress(self, value):
+        if self._slots is not None:
+            self._slots.release()
+        if self._on_progress is not None and not self.cancelled:
+            self._on_progress(value)
+
+
+class BackgroundTasks:
+    """
+    Runs work off the Tk thread and its callbacks on it. Create it and call
+    submit() from the thread that runs `root.mainloop()`.
+    """
+
+    def __init__(self, root, workers=WORKERS, poll_ms=POLL_MS):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.closed = False
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="background")
+        self._lanes = {}  # Lane name -> single-thread executor
+        self._results = queue.SimpleQueue()  # (callable, argument) pairs for the Tk thread
+        self._tasks = set()
+        self._thread = threading.get_ident()
+        self._polling = False
+
+    def submit(self, work, *args, on_done=None, on_error=None, on_progress=None, max_pending=None, lane=None):
+        """
+        Runs `work(task, *args)` on a worker thread, where `task` is the
+        returned TaskHandle. On the Tk thread, `on_done(result)` or
+        `on_error(exception)` is called when it finishes and
+        `on_progress(value)` for each task.report(value). Errors without an
+        `on_error` go to Tk's report_callback_exception().
+        """
+        if threading.get_ident() != self._thread:
+            raise RuntimeError("Tasks must be submitted from the Tk thread.")
+        if self.closed:
+            raise RuntimeError("The background tasks have been shut down.")
+        task = TaskHandle(self, on_progress, max_pending)
+        executor = self._pool if lane is None else self._lane(lane)
+        self._tasks.add(task)
+        task.future = executor.submit(self._run, task, work, args, on_done, on_error)
+        self._poll()
+        return task
+
+    def call_soon(self, callback, *args):
+        """Runs `callback(*args)` on the Tk thread; may be called from a running task's work."""
+        self._results.put((lambda args: callback(*args), args))
+
+    def _lane(self, name):
+        executor = self._lanes.get(name)
+        if executor is None:
+            executor = self._lanes[name] = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"background-{name}")
+        return executor
+
+    def _run(self, task, work, args, on_done, on_error):
+        callback = value = None
+        try:
+            if task.cancelled:
+                raise TaskCancelled()
+            # Work queued before shutdown() still runs; only its progress reports stop it.
+            callback, value = on_done, work(task, *args)
+        except TaskCancelled:
+            pass
+        except Exception as e:
+            callback, value = on_error or self._report_error, e
+        self._results.put((lambda value: self._finish(task, callback, value), value))
+
+    def _finish(self, task, callback, value):
+        self._tasks.discard(task)
+        if callback is not None and not task.cancelled:
+            callback(value)
+
+    def _report_error(self, error):
+        self.root.report_callback_exception(type(error), error, error.__traceback__)
+
+    def _poll(self, delay=None):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms if delay is None else delay, self._drain)
+
+    def _drain(self):
+        """
+        Runs the callbacks queued so far; keeps polling while tasks are outstanding.
+        Callbacks queued meanwhile wait for the next round, so a fast producer
+        cannot keep the Tk thread from handling events.
+        """
+        for _ in range(self._results.qsize()):
+            callback, value = self._results.get_nowait()
+            try:
+                callback(value)
+            except Exception:
+                self.root.report_callback_exception(*sys.exc_info())
+        self._polling = False
+        if self._tasks and not self.closed:
+            self._poll(1 if not self._results.empty() else None)
+
+    def shutdown(self, wait=True):
+        """
+        Stops polling and refuses new tasks. Running tasks that report
+        progress or check for cancellation stop at their next check; others,
+        such as saves, run to completion, and with `wait` this waits for them.
+        Their callbacks are not called.
+        """
+        self.closed = True
+        for executor in (self._pool, *self._lanes.values()):
+            executor.shutdown(wait=wait)
@@ -0,0 +1,91 @@
+import json
+
+CHUNK_SIZE = 1 << 16
+WHITESPACE = " \t\n\r"
+
+
+class JsonArrayStream:
+    """
+    Incrementally parses a file holding one JSON array, yielding its items.
+    Only the current chunk and the item being decoded are held in memory,
+    so huge files can be read with bounded memory. `bytes_read` and
+    `total_bytes` allow progress reporting while iterating.
+    """
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.bytes_read = 0
+        self.total_bytes = 0
+        self.items_read = 0
+
+    def progress(self):
+        """Returns the fraction of the file read so far, from 0.0 to 1.0."""
+        return self.bytes_read / self.total_bytes if self.total_bytes else 1.0
+
+    def __iter__(self):
+        """Yields the array items. Raises json.JSONDecodeError on malformed input."""
+        decoder = json.JSONDecoder()
+        with open(self.path, "r") as f:
+            f.seek(0, 2)
+            self.total_bytes = f.tell()
+            f.seek(0)
+            buffer = ""
+            pos = 0
+            eof = False
+
+            def fill():
+                nonlocal buffer, pos, eof
+                chunk = f.read(self.chunk_size)
+                self.bytes_read = f.tell()
+                if not chunk:
+                    eof = True
+                buffer = buffer[pos:] + chunk
+                pos = 0
+
+            def next_char():
+                """Skips whitespace and returns the next character, or '' at end of file."""
+                nonlocal pos
+                while True:
+                    while pos < len(buffer) and buffer[pos] in WHITESPACE:
+                        pos += 1
+                    if pos < len(buffer) or eof:
+                        return buffer[pos:pos + 1]
+                    fill()
+
+            if next_char() != "[":
+                raise json.JSONDecodeError("Expecting '['", buffer, pos)
+            pos += 1
+            if next_char() == "]":
+                return
+
+            while True:
+                next_char()
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                    # A number cut off by the chunk boundary ("12" of "123") still decodes,
+                    # so an item only counts once the delimiter after it is buffered too.
+                    complete = eof or (end < len(buffer) and buffer[end] in WHITESPACE + ",]")
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    complete = False
+                if not complete:
+                    # The item runs past the buffered text: read more and retry.
+                    fill()
+                    continue
+                pos = end
+                self.items_read += 1
+                yield item
+
+                separator = next_char()
+                if separator == "]":
+                    return
+                if separator != ",":
+                    raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+                pos += 1
+
+
+def iter_json_array(path, chunk_size=CHUNK_SIZE):
+    """Yields the items of the JSON array stored in `path` one at a time."""
+    return iter(JsonArrayStream(path, chunk_size))
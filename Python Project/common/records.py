@@ -0,0 +1,161 @@
+from sys import intern
+
+PRIORITIES = ("High", "Medium", "Low")
+PRIORITY_CODES = {priority: code for code, priority in enumerate(PRIORITIES)}
+
+
+def _intern(value):
+    return intern(value) if isinstance(value, str) else value
+
+
+class Task:
+    """
+    A to-do task.
+    Uses __slots__ instead of a per-task dict, and interns the priority and
+    tags so the few distinct values are shared across all tasks. `_line`
+    caches the task's rendered display line; set() invalidates it.
+    """
+
+    __slots__ = ("id", "description", "completed", "priority", "due_date", "tags", "_line")
+
+    def __init__(self, description, completed=False, priority=None, due_date=None, tags=(), id=None):
+        self.id = id
+        self.description = description
+        self.completed = completed
+        self.priority = _intern(priority)
+        self.due_date = due_date
+        self.tags = tuple(intern(tag) for tag in tags)
+        self._line = None
+
+    @classmethod
+    def from_dict(cls, data):
+        """Builds a Task from the JSON layout used by the to-do files."""
+        return cls(
+            data.get('description', 'No description'),
+            data.get('completed', False),
+            data.get('priority'),
+            data.get('due_date'),
+            data.get('tags') or (),
+            data.get('id'),
+        )
+
+    def to_dict(self):
+        """Returns the task in the JSON layout used by the to-do files."""
+        data = {'description': self.description, 'completed': self.completed, 'priority': self.priority,
+                'due_date': self.due_date, 'tags': list(self.tags)}
+        if self.id is not None:
+            data['id'] = self.id
+        return data
+
+    def set(self, field, value):
+        """Sets a field, interning values the same way the constructor does."""
+        if field == 'priority':
+            value = _intern(value)
+        elif field == 'tags':
+            value = tuple(intern(tag) for tag in value)
+        setattr(self, field, value)
+        self._line = None
+
+    def __repr__(self):
+        return f"Task({self.description!r}, completed={self.completed!r}, id={self.id!r})"
+
+
+class Contact:
+    """A contact book entry, stored with __slots__ instead of a per-contact dict."""
+
+    __slots__ = ("name", "phone", "email", "address")
+
+    def __init__(self, name="", phone="", email="", address=""):
+        self.name = name
+        self.phone = phone
+        self.email = email
+        self.address = address
+
+    @classmethod
+    def from_dict(cls, data):
+        """Builds a Contact from the JSON layout used by contacts.json."""
+        return cls(data.get("name") or "", data.get("phone") or "", data.get("email") or "", data.get("address") or "")
+
+    def to_dict(self):
+        """Returns the contact in the JSON layout used by contacts.json."""
+        return {"name": self.name, "phone": self.phone, "email": self.email, "address": self.address}
+
+    def __repr__(self):
+        return f"Contact({self.name!r}, {self.phone!r})"
+
+
+class TaskColumns:
+    """
+    Column store for large task sets: one list or array per field instead of
+    one object per task. Completion is a byte array and priority a byte code
+    into PRIORITIES, so whole-column questions ("how many are done?") run
+    at C speed. Rows are materialized as Task objects only on access.
+    """
+
+    NO_PRIORITY = 255
+
+    def __init__(self, tasks=()):
+        self.ids = []
+        self.descriptions = []
+        self.completed = bytearray()
+        self.priorities = bytearray()
+        self.due_dates = []
+        self.tags = []
+        self._extra_priorities = []  # Free-form priorities outside PRIORITIES, kept verbatim
+        self._extra_codes = {}
+        for task in tasks:
+            self.append(task)
+
+    def __len__(self):
+        return len(self.descriptions)
+
+    def append(self, task):
+        """Appends a Task or a task dict."""
+        if isinstance(task, dict):
+            task = Task.from_dict(task)
+        self.ids.append(task.id)
+        self.descriptions.append(task.description)
+        self.completed.append(1 if task.completed else 0)
+        self.priorities.append(self._encode_priority(task.priority))
+        self.due_dates.append(task.due_date)
+        self.tags.append(task.tags)
+
+    def __getitem__(self, index):
+        return Task(self.descriptions[index], bool(self.completed[index]), self._decode_priority(self.priorities[index]),
+                    self.due_dates[index], self.tags[index], self.ids[index])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def completed_count(self):
+        return self.completed.count(1)
+
+    def priority_count(self, priority):
+        return self.priorities.count(self._encode_priority(priority))
+
+    def to_dicts(self):
+        return [task.to_dict() for task in self]
+
+    def _encode_priority(self, priority):
+        if priority in PRIORITY_CODES:
+            return PRIORITY_CODES[priority]
+        if not priority:
+            return self.NO_PRIORITY if priority is None else self.NO_PRIORITY - 1
+        code = self._extra_codes.get(priority)
+        if code is None:
+            code = len(PRIORITIES) + len(self._extra_priorities)
+            if code >= self.NO_PRIORITY - 1:
+                raise ValueError("Too many distinct priority values for a column store")
+            self._extra_priorities.append(priority)
+            self._extra_codes[priority] = code
+        return code
+
+    def _decode_priority(self, code):
+        if code < len(PRIORITIES):
+            return PRIORITIES[code]
+        if code == self.NO_PRIORITY:
+            return None
+        if code == self.NO_PRIORITY - 1:
+            return ""
+        return self._extra_priorities[code - len(PRIORITIES)]
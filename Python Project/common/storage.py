@@ -0,0 +1,316 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from common.json_stream import JsonArrayStream
+
+
+def with_ids(records):
+    """
+    Yields the records, giving any record without an "id" its 1-based
+    position as ID. Files written before records had IDs have none at all,
+    so this numbers them exactly as the in-memory stores do.
+    """
+    for position, record in enumerate(records, 1):
+        if "id" not in record:
+            record["id"] = str(position)
+        yield record
+
+
+class StorageBackend:
+    """
+    Interface for persisting records (dicts) keyed by a string "id".
+    Records keep their insertion order. put() and delete() record changes;
+    save() makes every change since the last save durable.
+    """
+
+    def load(self):
+        """Returns all records as a list of dicts, each carrying its "id"."""
+        return list(self.iter_records())
+
+    def iter_records(self, batch_size=1000):
+        """Yields all records in order without requiring them all in memory at once."""
+        raise NotImplementedError
+
+    def count(self):
+        raise NotImplementedError
+
+    def page(self, offset, limit):
+        """Returns up to `limit` records starting at position `offset`."""
+        raise NotImplementedError
+
+    def put(self, record_id, record):
+        raise NotImplementedError
+
+    def put_many(self, records):
+        """Records many added or updated records (dicts carrying their "id") at once."""
+        for record in records:
+            self.put(record["id"], {key: value for key, value in record.items() if key != "id"})
+
+    def delete(self, record_id):
+        raise NotImplementedError
+
+    @contextmanager
+    def transaction(self):
+        """
+        Groups reads and changes so no other process writes in between, for
+        backends that other processes write while this one is open.
+        """
+        yield
+
+    def next_id(self):
+        """Returns the lowest numeric ID above every stored one, for adding records without loading them."""
+        highest = 0
+        for record in self.iter_records():
+            record_id = str(record["id"])
+            if record_id.isdigit():
+                highest = max(highest, int(record_id))
+        return highest + 1
+
+    def save(self, snapshot):
+        """
+        Persists all changes since the last save.
+        `snapshot` is a callable returning the full record list, for backends
+        that need to rewrite everything.
+        """
+        raise NotImplementedError
+
+    def begin_save(self, snapshot):
+        """
+        Captures what the next save must write, on the calling thread, and
+        returns a function that writes it. The function may run on another
+        thread while put() and delete() go on recording newer changes.
+        """
+        records = snapshot()
+        return lambda: self.save(lambda: records)
+
+    def version(self):
+        """
+        Returns a value that changes when the stored records are written, so
+        a long-running process can tell that another one changed them.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def close(self):
+        pass
+
+
+class JsonBackend(StorageBackend):
+    """The original layout: the whole record list in one JSON file, rewritten on every save."""
+
+    def __init__(self, path, indent=4):
+        self.path = path
+        self.indent = indent
+        self._records = None
+
+    def load(self):
+        """Raises json.JSONDecodeError if the file is corrupt."""
+        self._records = list(self.iter_records())
+        return list(self._records)
+
+    def iter_records(self, batch_size=1000):
+        """Streams the records from the file. Raises json.JSONDecodeError if it is corrupt."""
+        try:
+            yield from with_ids(JsonArrayStream(self.path))
+        except FileNotFoundError:
+            return
+
+    def count(self):
+        if self._records is None:
+            self.load()
+        return len(self._records)
+
+    def page(self, offset, limit):
+        if self._records is None:
+            self.load()
+        return self._records[offset:offset + limit]
+
+    def put(self, record_id, record):
+        pass  # The whole list is written by save()
+
+    def delete(self, record_id):
+        pass
+
+    def save(self, snapshot):
+        self.begin_save(snapshot)()
+
+    def begin_save(self, snapshot):
+        # Only the list is built here; encoding and writing it is left to the returned function.
+        records = self._records = snapshot()
+        return lambda: self._write(records)
+
+    def _write(self, records):
+        # Written to a temp file and renamed over the old one, so a crash mid-save keeps the previous list.
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(records, f, indent=self.indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+
+class SqliteBackend(StorageBackend):
+    """
+    Records in one SQLite table, in WAL mode.
+    Each record is stored as JSON alongside copies of `indexed_fields` in
+    their own indexed columns. put(), put_many() and delete() each commit
+    their own short transaction, so no write lock is held between changes
+    and other processes can write meanwhile; save() has nothing left to do.
+    transaction() groups several changes into one. All SQL, including one
+    find() query per indexed field, is built once per backend, so sqlite3's
+    statement cache reuses the prepared statements. The connection may be
+    used from any thread; a lock serializes its use.
+    """
+
+    def __init__(self, path, table, indexed_fields=()):
+        self.path = path
+        self.table = table
+        self.indexed_fields = tuple(indexed_fields)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.RLock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+
+        columns = "".join(f", {field}" for field in self.indexed_fields)
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            f"seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT NOT NULL UNIQUE{columns}, data TEXT NOT NULL)"
+        )
+        for field in self.indexed_fields:
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_{field} ON {table} ({field})")
+        self.conn.commit()
+
+        placeholders = ", ?" * len(self.indexed_fields)
+        updates = "".join(f"{field} = excluded.{field}, " for field in self.indexed_fields)
+        # Upserting on id keeps seq, and with it the record's position.
+        self._put_sql = (
+            f"INSERT INTO {table} (id{columns}, data) VALUES (?{placeholders}, ?) "
+            f"ON CONFLICT(id) DO UPDATE SET {updates}data = excluded.data"
+        )
+        self._delete_sql = f"DELETE FROM {table} WHERE id = ?"
+        self._select_sql = f"SELECT id, data FROM {table} ORDER BY seq"
+        self._page_sql = f"SELECT id, data FROM {table} ORDER BY seq LIMIT ? OFFSET ?"
+        self._count_sql = f"SELECT COUNT(*) FROM {table}"
+        self._max_id_sql = f"SELECT MAX(CAST(id AS INTEGER)) FROM {table} WHERE id NOT GLOB '*[^0-9]*'"
+        self._find_sql = {field: f"SELECT id, data FROM {table} WHERE {field} = ? ORDER BY seq"
+                          for field in self.indexed_fields}
+
+    @staticmethod
+    def _record(row):
+        return {"id": row[0], **json.loads(row[1])}
+
+    def _params(self, record_id, record):
+        data = {key: value for key, value in record.items() if key != "id"}
+        return (record_id, *(record.get(field) for field in self.indexed_fields),
+                json.dumps(data, separators=(",", ":")))
+
+    def iter_records(self, batch_size=1000):
+        with self._lock:
+            cursor = self.conn.execute(self._select_sql)
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for row in rows:
+                yield self._record(row)
+
+    def count(self):
+        with self._lock:
+            return self.conn.execute(self._count_sql).fetchone()[0]
+
+    def page(self, offset, limit):
+        with self._lock:
+            rows = self.conn.execute(self._page_sql, (limit, offset)).fetchall()
+        return [self._record(row) for row in rows]
+
+    def find(self, field, value):
+        """Returns the records whose indexed `field` equals `value`."""
+        sql = self._find_sql.get(field)
+        if sql is None:
+            raise ValueError(f"{field!r} is not an indexed field")
+        with self._lock:
+            rows = self.conn.execute(sql, (value,)).fetchall()
+        return [self._record(row) for row in rows]
+
+    def put(self, record_id, record):
+        params = self._params(record_id, record)
+        with self.transaction():
+            self.conn.execute(self._put_sql, params)
+
+    def put_many(self, records):
+        params = [self._params(record["id"], record) for record in records]
+        with self.transaction():
+            self.conn.executemany(self._put_sql, params)
+
+    def delete(self, record_id):
+        with self.transaction():
+            self.conn.execute(self._delete_sql, (record_id,))
+
+    @contextmanager
+    def transaction(self):
+        """
+        Runs the block in one write transaction, committed when it ends and
+        rolled back if it raises. Nested uses join the outer transaction.
+        """
+        with self._lock:
+            if self.conn.in_transaction:
+                yield
+                return
+            # IMMEDIATE takes the write lock up front, so reads in the block see what the writes build on.
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self.conn.rollback()
+                raise
+            self.conn.commit()
+
+    def next_id(self):
+        with self._lock:
+            return (self.conn.execute(self._max_id_sql).fetchone()[0] or 0) + 1
+
+    def save(self, snapshot=None):
+        pass  # Every change was committed when it was made
+
+    def begin_save(self, snapshot=None):
+        return self.save
+
+    def version(self):
+        # Changes whenever another connection commits; this connection's own commits leave it alone.
+        with self._lock:
+            return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def import_records(self, records):
+        """Bulk-inserts an iterable of records (numbering any without IDs) in a single transaction."""
+        with self.transaction():
+            self._insert_all(records)
+
+    def _insert_all(self, records):
+        self.conn.executemany(self._put_sql, (self._params(record["id"], record) for record in with_ids(records)))
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def open_sqlite(path, table, indexed_fields=(), legacy_records=None):
+    """
+    Opens a SqliteBackend. On first start, the records returned by
+    `legacy_records()` (e.g. an old JSON file) are migrated into it.
+    The migration is marked with PRAGMA user_version in the same
+    transaction, so an interrupted one is simply retried.
+    """
+    backend = SqliteBackend(path, table, indexed_fields)
+    if backend.conn.execute("PRAGMA user_version").fetchone()[0] == 0:
+        if legacy_records is not None:
+            backend._insert_all(legacy_records())
+        backend.conn.execute("PRAGMA user_version = 1")
+        backend.conn.commit()
+    return backend
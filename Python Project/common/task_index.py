@@ -0,0 +1,152 @@
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+from common.records import PRIORITY_CODES
+
+SORT_ORDERS = ("list", "due", "priority")
+
+
+def task_matches(task, priority=None, tag=None, completed=None, due_before=None):
+    """Tells whether a task passes every given TaskIndex.query() filter."""
+    if priority is not None and (task.priority or None) != (priority or None):
+        return False
+    if tag is not None and tag not in task.tags:
+        return False
+    if completed is not None and bool(task.completed) != bool(completed):
+        return False
+    if due_before is not None and not (task.due_date and task.due_date < due_before):
+        return False
+    return True
+
+
+def sort_key(sort, position):
+    """Returns the key function for a sort order; `position(task)` gives a task's list order."""
+    if sort == "due":
+        # Undated tasks go last.
+        return lambda task: (not task.due_date, task.due_date or "", position(task))
+    if sort == "priority":
+        lowest = len(PRIORITY_CODES)
+        return lambda task: (PRIORITY_CODES.get(task.priority, lowest), task.due_date or "\uffff", position(task))
+    return position
+
+
+class TaskIndex:
+    """
+    Secondary indexes over a task list, kept up to date on every change so
+    filtered and sorted views never scan or re-sort the whole list.
+
+    - due dates: a list of (due_date, seq, id) kept sorted with bisect, so
+      "due before X" is a prefix of the list. Bulk loads append and sort once,
+      on the next query.
+    - priority: one bucket (set of ids) per priority.
+    - tags: an inverted index tag -> ids.
+    - completion: one set of ids per state.
+
+    `seq` is the order in which a task was first indexed, i.e. its list order.
+    """
+
+    def __init__(self):
+        self._tasks = {}  # id -> Task
+        self._seq = {}  # id -> insertion order
+        self._next_seq = 0
+        self._due = []
+        self._due_sorted = True
+        self._by_priority = defaultdict(set)
+        self._by_tag = defaultdict(set)
+        self._by_completed = {True: set(), False: set()}
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def add(self, task, bulk=False):
+        """Indexes a task. With `bulk`, sorting the due dates is deferred to the next query."""
+        task_id = task.id
+        self._tasks[task_id] = task
+        seq = self._seq.get(task_id)
+        if seq is None:
+            seq = self._seq[task_id] = self._next_seq
+            self._next_seq += 1
+        if task.due_date:
+            entry = (task.due_date, seq, task_id)
+            if bulk or not self._due_sorted:
+                self._due.append(entry)
+                self._due_sorted = False
+            else:
+                insort(self._due, entry)
+        self._by_priority[task.priority or None].add(task_id)
+        for tag in task.tags:
+            self._by_tag[tag].add(task_id)
+        self._by_completed[bool(task.completed)].add(task_id)
+
+    def remove(self, task, keep_order=False):
+        """
+        Drops a task from the indexes. Call it before changing a task and add()
+        it again afterwards; `keep_order` keeps its place in list order.
+        """
+        task_id = task.id
+        del self._tasks[task_id]
+        seq = self._seq[task_id] if keep_order else self._seq.pop(task_id)
+        if task.due_date:
+            due = self._sorted_due()
+            del due[bisect_left(due, (task.due_date, seq, task_id))]
+        self._discard(self._by_priority, task.priority or None, task_id)
+        for tag in task.tags:
+            self._discard(self._by_tag, tag, task_id)
+        self._by_completed[bool(task.completed)].discard(task_id)
+
+    def query(self, priority=None, tag=None, completed=None, due_before=None, sort="list"):
+        """
+        Returns the tasks matching every given filter, in the requested order.
+        `due_before` is an ISO date string; tasks without a due date never match it.
+        The smallest matching index is walked and the remaining filters are checked
+        per candidate, so the cost follows the result size rather than the list size.
+        """
+        if sort not in SORT_ORDERS:
+            raise ValueError(f"Unknown sort order: {sort}")
+        # (size, candidate ids) for each active filter
+        sources = []
+        if priority is not None:
+            ids = self._by_priority.get(priority or None, ())
+            sources.append((len(ids), ids))
+        if tag is not None:
+            ids = self._by_tag.get(tag, ())
+            sources.append((len(ids), ids))
+        if completed is not None:
+            ids = self._by_completed[bool(completed)]
+            sources.append((len(ids), ids))
+        due_end = None
+        if due_before is not None:
+            due_end = bisect_left(self._sorted_due(), (due_before,))
+            sources.append((due_end, None))
+
+        if not sources:
+            candidates = self._tasks
+        else:
+            candidates = min(sources, key=lambda source: source[0])[1]
+            if candidates is None:
+                due = self._due
+                candidates = (due[i][2] for i in range(due_end))
+
+        tasks = self._tasks
+        matches = []
+        for task_id in candidates:
+            task = tasks[task_id]
+            if task_matches(task, priority, tag, completed, due_before):
+                matches.append(task)
+        seq = self._seq
+        matches.sort(key=sort_key(sort, lambda task: seq[task.id]))
+        return matches
+
+    def _sorted_due(self):
+        if not self._due_sorted:
+            self._due.sort()
+            self._due_sorted = True
+        return self._due
+
+    @staticmethod
+    def _discard(index, key, task_id):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(task_id)
+            if not ids:
+                del index[key]
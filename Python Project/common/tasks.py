@@ -0,0 +1,127 @@
+from bisect import bisect_left
+
+from common.records import Task
+from common.task_index import TaskIndex
+
+
+class TaskList:
+    """
+    Ordered list of to-do tasks kept in step with a storage backend.
+    Tasks are Task records; each one carries a stable id used by the backend,
+    which still stores the plain JSON dict layout.
+    All changes go through add(), update() and pop() so the backend sees them,
+    the completed count stays current, cached display lines are
+    invalidated for the changed task only and the TaskIndex behind
+    filtered views is maintained in place.
+
+    Each task also gets an increasing sequence number, kept in a list
+    parallel to self.tasks. That list stays sorted through appends and
+    removals, so position() is a bisect, and pop() never renumbers the tasks
+    after the removed one.
+    """
+
+    def __init__(self, storage, tasks=None, render=None):
+        self.storage = storage
+        self.render = render  # callable: Task -> display line
+        self.tasks = []
+        self.completed_count = 0
+        self.index = TaskIndex()
+        self._seq = {}  # id -> sequence number
+        self._seqs = []  # Sequence number of each task in self.tasks, ascending
+        self._next_seq = 0
+        self._next_id = 1
+        self.extend_loaded(storage.iter_records() if tasks is None else tasks)
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def __getitem__(self, index):
+        return self.tasks[index]
+
+    def __iter__(self):
+        return iter(self.tasks)
+
+    def __contains__(self, task):
+        return task.id in self._seq and self.tasks[self.position(task)] is task
+
+    def line(self, index):
+        """Returns the display line for the task at `index`, rendering it only if it changed."""
+        return self.task_line(self.tasks[index])
+
+    def task_line(self, task):
+        if task._line is None:
+            task._line = self.render(task)
+        return task._line
+
+    def extend_loaded(self, tasks):
+        """
+        Appends tasks (dicts or Task records) read from storage.
+        Unlike add(), they keep their IDs and are not recorded as changes.
+        """
+        for task in tasks:
+            if isinstance(task, dict):
+                task = Task.from_dict(task)
+            self._append(task)
+            self.index.add(task, bulk=True)
+            if task.completed:
+                self.completed_count += 1
+            task_id = str(task.id)
+            if task_id.isdigit():
+                self._next_id = max(self._next_id, int(task_id) + 1)
+
+    def position(self, task):
+        """Returns the list position of `task`."""
+        return bisect_left(self._seqs, self._seq[task.id])
+
+    def _append(self, task):
+        self._seq[task.id] = self._next_seq
+        self._seqs.append(self._next_seq)
+        self._next_seq += 1
+        self.tasks.append(task)
+
+    def filter(self, **filters):
+        """Returns the tasks matching `filters`; see TaskIndex.query()."""
+        return self.index.query(**filters)
+
+    def add(self, task):
+        """Appends a task, giving it a new ID."""
+        task.id = str(self._next_id)
+        self._next_id += 1
+        self._append(task)
+        self.index.add(task)
+        if task.completed:
+            self.completed_count += 1
+        self.storage.put(task.id, task.to_dict())
+        return task
+
+    def update(self, index, **fields):
+        """Applies `fields` to the task at `index` (if any) and records the change."""
+        task = self.tasks[index]
+        was_completed = bool(task.completed)
+        self.index.remove(task, keep_order=True)
+        for field, value in fields.items():
+            task.set(field, value)
+        self.index.add(task)
+        self.completed_count += bool(task.completed) - was_completed
+        task._line = None
+        self.storage.put(task.id, task.to_dict())
+        return task
+
+    def pop(self, index):
+        """Removes and returns the task at `index`."""
+        task = self.tasks.pop(index)
+        del self._seqs[index]
+        del self._seq[task.id]
+        self.index.remove(task)
+        if task.completed:
+            self.completed_count -= 1
+        self.storage.delete(task.id)
+        return task
+
+    def save(self):
+        self.begin_save()()
+
+    def begin_save(self):
+        """Captures the changes to save; returns a function that writes them and may run on another thread."""
+        return self.storage.begin_save(lambda: [task.to_dict() for task in self.tasks])
+
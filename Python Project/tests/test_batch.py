@@ -0,0 +1,22 @@
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Calculator"))
+from batch import run_batch
+
+ROWS = "a,b\n1,2\n2,1\nx,1\n"
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+@pytest.mark.parametrize("text, results", [
+    ("round(a / 3, 2)", ["0.33", "0.67", "#N/A"]),
+    ("round(a / 3, b)", ["0.33", "0.7", "#N/A"]),
+    ("round(a / 3, 0.5)", ["#N/A", "#N/A", "#N/A"]),
+])
+def test_round_gives_the_same_results_with_and_without_numpy(text, results, use_numpy):
+    out = io.StringIO()
+    run_batch(io.StringIO(ROWS), out, text, result_only=True, use_numpy=use_numpy)
+    assert out.getvalue().splitlines() == ["result", *results]
@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Contact Book"))
+from common.records import Contact
+from contact_dedup import find_duplicates
+
+
+class Cancelled(Exception):
+    pass
+
+
+def test_scan_stops_when_cancelled():
+    book = [(str(number), Contact(f"Person {number}", f"555{number:07d}", "", "")) for number in range(20000)]
+    checks = []
+
+    def check_cancelled():
+        checks.append(None)
+        if len(checks) > 3:
+            raise Cancelled()
+
+    with pytest.raises(Cancelled):
+        find_duplicates(book, workers=1, check_cancelled=check_cancelled)
+
+
+def test_scan_finds_duplicates_without_a_check():
+    book = [("1", Contact("Ann Lee", "5551234567", "ann@example.com", "")),
+            ("2", Contact("Anne Lee", "+1 555 123 4567", "ANN@example.com", ""))]
+    assert [group.ids for group in find_duplicates(book, workers=1)] == [["1", "2"]]
@@ -0,0 +1,72 @@
+import csv
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Contact Book"))
+from contact_io import main
+from contact_journal import COMPACT_MIN_RECORDS, ContactJournal
+
+
+def write_csv(path, count):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(("name", "phone"))
+        for number in range(count):
+            writer.writerow((f"Contact {number}", f"555{number:07d}"))
+
+
+def test_import_into_journal_keeps_contacts_through_compaction(tmp_path):
+    count = COMPACT_MIN_RECORDS * 3  # Enough to compact the journal during the import's save
+    source = str(tmp_path / "in.csv")
+    book = str(tmp_path / "book.json")
+    write_csv(source, count)
+
+    assert main(["import", source, "--storage", book, "--workers", "1"]) == 0
+
+    assert len(ContactJournal(book).load()) == count
+    assert not os.path.exists(book + ".tmp")
+    assert not os.path.exists(book + ".journal.old")
+
+
+def test_second_import_appends_to_compacted_book(tmp_path):
+    source = str(tmp_path / "in.csv")
+    book = str(tmp_path / "book.json")
+    write_csv(source, COMPACT_MIN_RECORDS * 2)
+
+    assert main(["import", source, "--storage", book, "--workers", "1"]) == 0
+    assert main(["import", source, "--storage", book, "--workers", "1"]) == 0
+
+    assert len(ContactJournal(book).load()) == COMPACT_MIN_RECORDS * 4
+
+
+def write_legacy_book(path, count):
+    """Writes contacts in the original contacts.json layout, without IDs."""
+    with open(path, "w") as f:
+        json.dump([{"name": f"Old {number}", "phone": f"444{number:07d}", "email": "", "address": ""}
+                   for number in range(count)], f)
+
+
+def test_import_into_legacy_book_numbers_the_old_contacts(tmp_path):
+    source = str(tmp_path / "in.csv")
+    book = str(tmp_path / "contacts.json")
+    write_csv(source, 3)
+    write_legacy_book(book, 2)
+
+    assert main(["import", source, "--storage", book, "--workers", "1"]) == 0
+
+    records = ContactJournal(book).load()
+    assert [record["id"] for record in records] == ["1", "2", "3", "4", "5"]
+    assert [record["name"] for record in records[:2]] == ["Old 0", "Old 1"]
+
+
+def test_export_from_new_database_migrates_legacy_book(tmp_path):
+    write_legacy_book(str(tmp_path / "contacts.json"), 2)
+    database = str(tmp_path / "contacts.db")
+    exported = str(tmp_path / "out.csv")
+
+    assert main(["export", exported, "--storage", database]) == 0
+
+    with open(exported, newline="") as f:
+        assert [row["name"] for row in csv.DictReader(f)] == ["Old 0", "Old 1"]
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Calculator"))
+from expression import ExpressionError, compile_expression, evaluate
+from numeric import make_backend
+
+
+@pytest.mark.parametrize("text", ["(" * 5000 + "1" + ")" * 5000, "+".join(["1"] * 5000), "-" * 5000 + "1"])
+def test_deep_nesting_is_an_expression_error(text):
+    with pytest.raises(ExpressionError):
+        evaluate(text)
+
+
+@pytest.mark.parametrize("backend", ["float", "decimal", "fraction"])
+def test_fractional_power_of_negative_number_is_rejected(backend):
+    with pytest.raises(ValueError):
+        make_backend(backend).evaluate(compile_expression("(-8) ** 0.5"), {})
+
+
+def test_real_powers_still_work():
+    assert evaluate("(-2) ^ 3") == -8
+    assert evaluate("4 ** 0.5") == 2
+
+
+@pytest.mark.parametrize("backend", ["float", "decimal", "fraction"])
+def test_round_to_digits(backend):
+    backend = make_backend(backend)
+    assert backend.evaluate(compile_expression("round(2 / 3, 2)"), {}) == backend.parse("0.67")
+    with pytest.raises(ValueError):
+        backend.evaluate(compile_expression("round(1, 0.5)"), {})
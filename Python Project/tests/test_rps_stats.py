@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Rock-Paper-Scissors Game"))
+from rps_stats import TIE, WIN, MatchLog, iter_rounds, parse_line
+
+
+def test_unknown_result_code_is_a_value_error():
+    with pytest.raises(ValueError):
+        parse_line("2,random,rock,paper,?\n")
+
+
+def test_damaged_line_is_skipped(tmp_path):
+    path = str(tmp_path / "rps_log.csv")
+    with open(path, "w") as f:
+        f.write("1,random,rock,scissors,W\n2,random,rock,paper,?\n3,random,paper,paper,T\n")
+
+    log = MatchLog(path)
+    log.close()
+
+    assert log.replayed == 2
+    assert log.stats.rounds == 2
+    assert [result for *_, result in iter_rounds(path)] == [WIN, TIE]
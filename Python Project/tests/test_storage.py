@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from common.storage import SqliteBackend
+
+
+def test_sqlite_changes_do_not_lock_out_other_connections(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    first = SqliteBackend(path, "tasks")
+    second = SqliteBackend(path, "tasks")
+    second.conn.execute("PRAGMA busy_timeout = 0")  # Fail at once instead of waiting for a lock
+
+    first.put("1", {"description": "first"})
+    second.put("2", {"description": "second"})  # Would raise "database is locked" before first.save()
+    first.delete("1")
+
+    assert [record["id"] for record in second.load()] == ["2"]
+    first.close()
+    second.close()
+
+
+def test_sqlite_transaction_rolls_back_on_error(tmp_path):
+    storage = SqliteBackend(str(tmp_path / "tasks.db"), "tasks")
+    with pytest.raises(RuntimeError):
+        with storage.transaction():
+            storage.put("1", {"description": "first"})
+            raise RuntimeError()
+
+    assert storage.count() == 0
+    storage.close()
@@ -0,0 +1,41 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from common.records import Task
+from common.storage import StorageBackend
+from common.tasks import TaskList
+
+
+class MemoryBackend(StorageBackend):
+    def __init__(self):
+        self.records = {}
+
+    def put(self, record_id, record):
+        self.records[record_id] = record
+
+    def delete(self, record_id):
+        del self.records[record_id]
+
+
+def test_positions_follow_pops_and_adds():
+    tasks = TaskList(MemoryBackend(), tasks=[])
+    for number in range(10):
+        tasks.add(Task(f"task {number}"))
+    tasks.pop(3)
+    tasks.pop(0)
+    tasks.pop(-1)
+    tasks.add(Task("task 10"))
+
+    assert [task.description for task in tasks] == [f"task {number}" for number in (1, 2, 4, 5, 6, 7, 8, 10)]
+    assert [tasks.position(task) for task in tasks] == list(range(len(tasks)))
+    assert sorted(tasks.storage.records) == sorted(task.id for task in tasks)
+
+
+def test_popped_task_is_no_longer_contained():
+    tasks = TaskList(MemoryBackend(), tasks=[])
+    first, second = tasks.add(Task("first")), tasks.add(Task("second"))
+    tasks.pop(0)
+
+    assert first not in tasks
+    assert second in tasks
@@ -0,0 +1,80 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Contact Book"))
+from virtual_list import VirtualTreeview
+
+
+class FakeTree:
+    """The part of ttk.Treeview that VirtualTreeview uses, without a display."""
+
+    def __init__(self):
+        self.rows = []
+        self.selected = ()
+
+    def bind(self, sequence, callback):
+        pass
+
+    def get_children(self):
+        return tuple(self.rows)
+
+    def exists(self, row_id):
+        return row_id in self.rows
+
+    def index(self, row_id):
+        return self.rows.index(row_id)
+
+    def insert(self, parent, position, iid, values):
+        self.rows.insert(position, iid)
+
+    def move(self, row_id, parent, position):
+        self.rows.remove(row_id)
+        self.rows.insert(position, row_id)
+
+    def delete(self, *row_ids):
+        for row_id in row_ids:
+            self.rows.remove(row_id)
+
+    def item(self, row_id, values):
+        pass
+
+    def selection(self):
+        return self.selected
+
+    def selection_set(self, row_id):
+        self.selected = (row_id,)
+
+
+class FakeScrollbar:
+    def config(self, command):
+        pass
+
+    def set(self, first, last):
+        pass
+
+
+def make_view(ids, visible_rows=3):
+    view = VirtualTreeview(FakeTree(), FakeScrollbar(), lambda row_id: (row_id,), buffer=0)
+    view.visible_rows = visible_rows
+    view.set_ids(ids)
+    return view
+
+
+def test_positions_follow_removals_and_appends():
+    view = make_view([str(number) for number in range(10)])
+    view.remove("3")
+    view.remove("0")
+    view.remove("missing")
+    view.append("10")
+
+    assert view.ids == ["1", "2", "4", "5", "6", "7", "8", "9", "10"]
+    assert [view.index(row_id) for row_id in view.ids] == list(range(len(view.ids)))
+
+
+def test_select_scrolls_the_row_into_view():
+    view = make_view([str(number) for number in range(100)])
+    view.remove("50")
+    view.select("80")
+
+    assert view.selection() == ("80",)
+    assert view.tree.get_children() == ("78", "79", "80")